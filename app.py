@@ -1,23 +1,30 @@
-from flask import Flask, request, jsonify, render_template
+import threading
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from chatbot_core.bot import MedicalChatbot
-import os
+from chatbot_core.decoding import DECODING_PROFILES
+from chatbot_core.loading import ModelsNotReady
+from chatbot_core.settings import chatbot_config
+import json
 
 app = Flask(__name__)
 
 # --- Initialize the Chatbot Once ---
-# This loads the models into memory when the server starts
-print("Starting server and initializing chatbot...")
-project_root = os.path.dirname(os.path.abspath(__file__))
-gen_model_path = os.path.join(project_root, "outputs/scifive_finetuned_final")
-class_model_path = os.path.join(project_root, "outputs/intent_classifier_final")
-db_path = os.path.join(project_root, "data/knowledge_base_final.csv")
-
-chatbot = MedicalChatbot(
-    generative_model_path=gen_model_path,
-    classifier_model_path=class_model_path,
-    db_path=db_path
-)
-print("Chatbot is ready.")
+# Built on first use rather than at import, so tools importing this module do not load models.
+# Models then load on background threads; until they are ready, medical questions get a 503 (see not_ready)
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
+def get_chatbot() -> MedicalChatbot:
+    global _chatbot
+    with _chatbot_lock:
+        if _chatbot is None:
+            print("Initializing chatbot...")
+            _chatbot = MedicalChatbot(**chatbot_config())
+        return _chatbot
+
+def not_ready(e: ModelsNotReady):
+    response = jsonify({"error": "The chatbot is still loading, please retry shortly.", "loading": e.progress})
+    return response, 503, {"Retry-After": "5"}
 
 @app.route('/')
 def index():
@@ -33,11 +40,58 @@ def chat():
     
     if not user_prompt or not session_id:
         return jsonify({"error": "A prompt and session_id are required."}), 400
+    decoding_profile = data.get("decoding")
+    if decoding_profile is not None and decoding_profile not in DECODING_PROFILES:
+        return jsonify({"error": f"Unknown decoding profile, expected one of {list(DECODING_PROFILES)}."}), 400
 
     # Call our chatbot's main function, passing the session_id to manage memory
-    response_dict = chatbot.get_response(user_prompt, session_id)
+    try:
+        response_dict = get_chatbot().get_response(user_prompt, session_id, decoding_profile)
+    except ModelsNotReady as e:
+        return not_ready(e)
     
     return jsonify(response_dict)
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """API endpoint that streams the answer as server-sent events while it is generated."""
+    data = request.json
+    user_prompt = data.get("prompt")
+    session_id = data.get("session_id")
+
+    if not user_prompt or not session_id:
+        return jsonify({"error": "A prompt and session_id are required."}), 400
+    decoding_profile = data.get("decoding")
+    if decoding_profile is not None and decoding_profile not in DECODING_PROFILES:
+        return jsonify({"error": f"Unknown decoding profile, expected one of {list(DECODING_PROFILES)}."}), 400
+
+    # The first event is produced before responding, so a 503 can still be sent
+    stream = get_chatbot().stream_response(user_prompt, session_id, decoding_profile)
+    try:
+        first_event = next(stream)
+    except ModelsNotReady as e:
+        return not_ready(e)
+
+    def events():
+        try:
+            yield f"data: {json.dumps(first_event)}\n\n"
+            for event in stream:
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            stream.close()  # the server closes this early when the client disconnects, which stops generation
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/stats')
+def stats():
+    """Runtime counters such as response cache hit rate and batch sizes."""
+    return jsonify(get_chatbot().stats())
+
 if __name__ == '__main__':
+    print("Starting server and initializing chatbot...")
+    get_chatbot()  # start loading the models before the first request
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Production ASGI server for the Medical AI Chatbot
+
+Inference runs on a fixed pool of worker threads behind a bounded admission
+queue. When the queue is full, /chat answers 503 with Retry-After instead of
+letting latency pile up. Models load in the background after startup, and
+emergency keywords and greetings are answered right away. Medical questions
+get 503 with the loading progress until the generator and retrieval index
+are ready. /healthz reports liveness and /readyz turns 200 once everything is
+loaded (and, with CHATBOT_INFERENCE_MODE=compiled, warmed up).
+
+Run with:  uvicorn asgi:app --host 0.0.0.0 --port 5000
+      or:  python asgi.py
+
+Tuning (environment variables):
+  CHATBOT_INFERENCE_WORKERS  requests computing at once; sets torch's thread split (default 2).
+                             With batching the pool has at least CHATBOT_MAX_BATCH_SIZE threads,
+                             since each request holds its thread while it waits for its batch;
+                             streamed answers, which are not batched, still generate at most
+                             this many at a time
+  CHATBOT_MAX_BATCH_SIZE     largest micro-batch of the generator (default 8)
+  CHATBOT_MAX_QUEUE          requests admitted beyond the busy workers (default 16)
+  CHATBOT_RETRY_AFTER        Retry-After seconds sent when overloaded (default 5)
+  CHATBOT_PROCESSES          server processes sharing the machine (set by gunicorn_conf.py)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from chatbot_core.bot import MedicalChatbot
+from chatbot_core.decoding import DECODING_PROFILES
+from chatbot_core.loading import ModelsNotReady
+from chatbot_core.settings import PROJECT_ROOT, chatbot_config
+from chatbot_core.worker_pool import InferencePool, QueueFullError
+
+INFERENCE_WORKERS = int(os.environ.get("CHATBOT_INFERENCE_WORKERS", 2))
+MAX_QUEUE = int(os.environ.get("CHATBOT_MAX_QUEUE", 16))
+RETRY_AFTER = int(os.environ.get("CHATBOT_RETRY_AFTER", 5))
+PROCESSES = int(os.environ.get("CHATBOT_PROCESSES", 1))
+
+def pool_size(config: dict) -> int:
+    """Inference worker threads: with batching, fewer than max_batch_size would cap every batch at the pool size."""
+    if config["batching"]:
+        return max(INFERENCE_WORKERS, config["max_batch_size"])
+    return INFERENCE_WORKERS
+
+class ServerState:
+    """Chatbot instance and loading status shared by the request handlers."""
+
+    def __init__(self):
+        self.chatbot = None
+        self.load_error = None
+        self.started_at = time.time()
+        self.ready_at = None
+        self.pool = None
+
+    def load(self):
+        try:
+            # Split the CPU between processes and workers instead of letting every worker grab all cores.
+            # Extra threads added for batching mostly wait on the batcher, so they get no share
+            import torch
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // (INFERENCE_WORKERS * PROCESSES)))
+            config = chatbot_config()
+            # Streamed answers bypass the batcher, so at most INFERENCE_WORKERS of them generate at once
+            self.chatbot = MedicalChatbot(**config, max_concurrent_streams=INFERENCE_WORKERS)
+            self.pool = InferencePool(pool_size(config), MAX_QUEUE, RETRY_AFTER)
+            self.ready_at = time.time()
+            print(f"Chatbot is accepting requests after {self.ready_at - self.started_at:.1f}s.")
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"Chatbot failed to load: {e}")
+
+    @property
+    def ready(self) -> bool:
+        """Requests can be accepted; the models themselves may still be loading (see chatbot.loading)."""
+        return self.chatbot is not None and self.pool is not None
+
+state = ServerState()
+
+def unavailable(message: str, retry_after: int, loading: dict = None) -> JSONResponse:
+    content = {"error": message} if loading is None else {"error": message, "loading": loading}
+    return JSONResponse(content, status_code=503, headers={"Retry-After": str(retry_after)})
+
+def models_loading(e: ModelsNotReady) -> JSONResponse:
+    return unavailable("The chatbot is still loading, please retry shortly.", RETRY_AFTER, e.progress)
+
+async def parse_chat_request(request):
+    """Returns (prompt, session_id, decoding_profile, error_response)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not data.get("prompt") or not data.get("session_id"):
+        return None, None, None, JSONResponse({"error": "A prompt and session_id are required."}, status_code=400)
+    decoding_profile = data.get("decoding")
+    if decoding_profile is not None and decoding_profile not in DECODING_PROFILES:
+        error = {"error": f"Unknown decoding profile, expected one of {list(DECODING_PROFILES)}."}
+        return None, None, None, JSONResponse(error, status_code=400)
+    if not state.ready:
+        return None, None, None, unavailable("The chatbot is still loading.", RETRY_AFTER)
+    return data["prompt"], data["session_id"], decoding_profile, None
+
+async def index(request):
+    """Serves the main HTML page for the user interface."""
+    return FileResponse(os.path.join(PROJECT_ROOT, "templates/index.html"))
+
+async def chat(request):
+    """API endpoint to handle chat messages."""
+    prompt, session_id, decoding_profile, error = await parse_chat_request(request)
+    if error is not None:
+        return error
+    try:
+        future = state.pool.submit(state.chatbot.get_response, prompt, session_id, decoding_profile)
+    except QueueFullError as e:
+        return unavailable("The server is busy, please retry shortly.", e.retry_after)
+    try:
+        return JSONResponse(await asyncio.wrap_future(future))
+    except ModelsNotReady as e:
+        return models_loading(e)
+
+async def chat_stream(request):
+    """API endpoint that streams the answer as server-sent events while it is generated."""
+    prompt, session_id, decoding_profile, error = await parse_chat_request(request)
+    if error is not None:
+        return error
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    disconnected = threading.Event()
+
+    def produce():
+        # Runs on an inference worker; hands events back to the event loop as they are generated
+        stream = state.chatbot.stream_response(prompt, session_id, decoding_profile)
+        try:
+            for event in stream:
+                if disconnected.is_set():
+                    break
+                loop.call_soon_threadsafe(events.put_nowait, event)
+        except ModelsNotReady as e:
+            loop.call_soon_threadsafe(events.put_nowait, e)  # raised before the first event
+        finally:
+            stream.close()  # stops generation if the client went away
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    try:
+        state.pool.submit(produce)
+    except QueueFullError as e:
+        return unavailable("The server is busy, please retry shortly.", e.retry_after)
+
+    # Wait for the first event, so a request the models are not ready for still gets a 503
+    first_event = await events.get()
+    if isinstance(first_event, ModelsNotReady):
+        return models_loading(first_event)
+
+    async def body():
+        event = first_event
+        try:
+            while event is not None:
+                yield f"data: {json.dumps(event)}\n\n"
+                event = await events.get()
+        finally:
+            disconnected.set()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def healthz(request):
+    """Liveness: the process is up and serving HTTP."""
+    return JSONResponse({"status": "ok", "uptime": time.time() - state.started_at})
+
+async def readyz(request):
+    """Readiness: models and retrieval index are loaded and requests can be served."""
+    if state.load_error is not None:
+        return JSONResponse({"status": "failed", "error": state.load_error}, status_code=503)
+    if not state.ready:
+        return unavailable("loading", RETRY_AFTER)
+    loading = state.chatbot.loading.snapshot()
+    if state.chatbot.loading.failed:
+        return JSONResponse({"status": "failed", "loading": loading}, status_code=503)
+    if not loading["ready"]:
+        return unavailable("loading", RETRY_AFTER, loading)
+    return JSONResponse({"status": "ready", "pool": state.pool.stats(), "loading": loading,
+                         "warmup": state.chatbot.warmup_report})
+
+async def stats(request):
+    """Runtime counters such as response cache hit rate, batch sizes and pool load."""
+    if not state.ready:
+        return unavailable("loading", RETRY_AFTER)
+    return JSONResponse({**state.chatbot.stats(), "pool": state.pool.stats()})
+
+@asynccontextmanager
+async def lifespan(app):
+    # Start in the background so /healthz answers right away
+    threading.Thread(target=state.load, name="chatbot-loader", daemon=True).start()
+    yield
+    if state.pool is not None:
+        state.pool.shutdown()
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/chat", chat, methods=["POST"]),
+        Route("/chat/stream", chat_stream, methods=["POST"]),
+        Route("/healthz", healthz),
+        Route("/readyz", readyz),
+        Route("/stats", stats),
+    ],
+    lifespan=lifespan
+)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Retrieval Index Benchmark
+Compares recall@k and query latency of the FAISS index backends against the
+exact brute-force search currently used by the chatbot
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import torch
+from sentence_transformers import SentenceTransformer
+
+from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+from chatbot_core.ann_index import VectorIndex
+
+RETRIEVER_MODEL = 'microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext'
+
+# (backend, params) operating points to compare
+CONFIGURATIONS = [
+    ("flat", {}),
+    ("hnsw", {"ef_search": 16}),
+    ("hnsw", {"ef_search": 64}),
+    ("hnsw", {"ef_search": 256}),
+    ("ivf", {"nprobe": 4}),
+    ("ivf", {"nprobe": 16}),
+    ("ivf", {"nprobe": 64}),
+    ("ivfpq", {"nprobe": 16}),
+    ("ivfpq", {"nprobe": 64}),
+]
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db-path", default=os.path.join(project_root, "data/knowledge_base_final.csv"))
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=6)
+    args = parser.parse_args()
+
+    print("RETRIEVAL INDEX BENCHMARK")
+    print("="*60)
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(RETRIEVER_MODEL, device=device)
+    db = pd.read_csv(args.db_path).dropna()
+    cache = EmbeddingCache(embedding_store_dir(args.db_path, RETRIEVER_MODEL, "completions"), model, RETRIEVER_MODEL)
+    embeddings = cache.encode(db['completion'].tolist())
+    print(f"Knowledge base: {len(embeddings):,} vectors of dimension {embeddings.shape[1]}")
+
+    # Queries are KB questions, i.e. the kind of text users actually send
+    queries = db['prompt'].sample(n=min(args.num_queries, len(db)), random_state=42).tolist()
+    query_embeddings = model.encode(queries, convert_to_tensor=True, device=device)
+
+    exact = VectorIndex("exact").build(embeddings)
+    ground_truth = []
+    exact_times = []
+    for query_embedding in query_embeddings:
+        start = time.perf_counter()
+        hits = exact.search(query_embedding, args.top_k)[0]
+        exact_times.append(time.perf_counter() - start)
+        ground_truth.append({hit['corpus_id'] for hit in hits})
+
+    print(f"\n{'backend':<8} {'params':<18} {'build s':>8} {'recall@' + str(args.top_k):>10} {'p50 ms':>8} {'p99 ms':>8}")
+    print("-"*66)
+    print(f"{'exact':<8} {'-':<18} {'-':>8} {1.0:>10.4f} {percentile_ms(exact_times, 50):>8.2f} {percentile_ms(exact_times, 99):>8.2f}")
+
+    for backend, params in CONFIGURATIONS:
+        index = VectorIndex(backend, **params)
+        start = time.perf_counter()
+        index.build(embeddings)
+        build_time = time.perf_counter() - start
+
+        times = []
+        recall = []
+        for query_embedding, truth in zip(query_embeddings, ground_truth):
+            start = time.perf_counter()
+            hits = index.search(query_embedding, args.top_k)[0]
+            times.append(time.perf_counter() - start)
+            recall.append(len(truth & {hit['corpus_id'] for hit in hits}) / len(truth))
+
+        label = ",".join(f"{k}={v}" for k, v in params.items()) or "-"
+        print(f"{backend:<8} {label:<18} {build_time:>8.1f} {np.mean(recall):>10.4f} "
+              f"{percentile_ms(times, 50):>8.2f} {percentile_ms(times, 99):>8.2f}")
+
+if __name__ == "__main__":
+    main()
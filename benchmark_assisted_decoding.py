@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Assisted Decoding Benchmark
+Decodes the KB-derived question set with the fine-tuned generator alone and
+with a small draft model proposing tokens for it (assisted decoding), using
+the greedy fast profile, and reports:
+
+  tok/s       generated tokens per second of generation time
+  acceptance  share of draft-proposed tokens the generator accepted
+  tokens/step tokens produced per generator decoder pass (1.0 without a draft)
+  exact       share of answers identical to the generator's own greedy output
+
+Generator and draft decoder passes are counted with forward hooks: every
+generator pass emits one token of its own after the accepted draft tokens,
+so accepted = generated tokens - generator passes, and each draft pass
+proposes one token.
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import torch
+
+from chatbot_core.bot import MedicalChatbot
+from chatbot_core.decoding import generation_params
+
+class ForwardCounter:
+    def __init__(self, model):
+        self.calls = 0
+        self.handle = model.register_forward_hook(self.hook)
+
+    def hook(self, module, inputs, output):
+        self.calls += 1
+
+def decode(chatbot, input_ids, params, target_counter, draft_counter):
+    target_before, draft_before = target_counter.calls, draft_counter.calls
+    inputs = {"input_ids": torch.tensor([input_ids], device=chatbot.device)}
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = chatbot.gen_model.generate(**inputs, **params)
+    elapsed = time.perf_counter() - start
+    new_tokens = output.shape[1] - 1  # minus the decoder start token
+    return output[0].tolist(), new_tokens, elapsed, target_counter.calls - target_before, draft_counter.calls - draft_before
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--draft-model", required=True, help="Small seq2seq model sharing the generator's vocabulary")
+    parser.add_argument("--kb-questions", type=int, default=48)
+    parser.add_argument("--profile", default="fast", help="A single-beam decoding profile")
+    args = parser.parse_args()
+
+    chatbot = MedicalChatbot(
+        generative_model_path=os.path.join(project_root, "outputs/scifive_finetuned_final"),
+        classifier_model_path=os.path.join(project_root, "outputs/intent_classifier_final"),
+        db_path=os.path.join(project_root, "data/knowledge_base_final.csv"),
+        response_cache=False, draft_model_path=args.draft_model
+    )
+
+    kb_sample = [chatbot.kb.db.prompt(row) for row in chatbot.kb.db.sample_rows(args.kb_questions)]
+    inputs = []
+    for i, question in enumerate(kb_sample):
+        plan = chatbot._prepare_response(question, f"bench_assisted_{i}")
+        if plan.generator_input_ids is not None:
+            inputs.append(plan.generator_input_ids)
+    print(f"Questions: {len(inputs)} of {len(kb_sample)} reach generation")
+
+    target_counter = ForwardCounter(chatbot.gen_model)
+    draft_counter = ForwardCounter(chatbot.draft_model)
+    plain_params = generation_params(args.profile)
+    assisted_params = {**plain_params, "assistant_model": chatbot.draft_model}
+
+    # Warmup both paths
+    decode(chatbot, inputs[0], plain_params, target_counter, draft_counter)
+    decode(chatbot, inputs[0], assisted_params, target_counter, draft_counter)
+
+    results = {"generator": [], "assisted": []}
+    matches = 0
+    for input_ids in inputs:
+        torch.manual_seed(0)
+        plain = decode(chatbot, input_ids, plain_params, target_counter, draft_counter)
+        torch.manual_seed(0)
+        assisted = decode(chatbot, input_ids, assisted_params, target_counter, draft_counter)
+        results["generator"].append(plain[1:])
+        results["assisted"].append(assisted[1:])
+        matches += plain[0] == assisted[0]
+
+    print("\nASSISTED DECODING BENCHMARK")
+    print("="*76)
+    print(f"{'decoding':<10} {'p50 s':>7} {'p95 s':>7} {'tok/s':>7} {'acceptance':>11} {'tokens/step':>12} {'exact':>7}")
+    print("-"*76)
+    for name, rows in results.items():
+        tokens, latencies, target_calls, draft_calls = (np.array(column) for column in zip(*rows))
+        accepted = tokens.sum() - target_calls.sum()
+        acceptance = accepted / draft_calls.sum() if draft_calls.sum() else float('nan')
+        exact = matches / len(inputs) if name == "assisted" else 1.0
+        print(f"{name:<10} {np.percentile(latencies, 50):>7.2f} {np.percentile(latencies, 95):>7.2f} "
+              f"{tokens.sum() / latencies.sum():>7.1f} {acceptance:>11.1%} "
+              f"{tokens.sum() / target_calls.sum():>12.2f} {exact:>7.1%}")
+
+    plain_time = sum(row[1] for row in results["generator"])
+    assisted_time = sum(row[1] for row in results["assisted"])
+    print(f"\nSpeed-up: {plain_time / assisted_time:.2f}x")
+    if args.profile == "fast" and matches < len(inputs):
+        print(f"WARNING: {len(inputs) - matches} greedy answers differ from the generator's own output")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Generation Micro-Batching Benchmark
+Measures p50/p99 latency and throughput of medical questions at 1/4/16/64
+concurrent clients, with and without cross-request batching
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from chatbot_core.bot import MedicalChatbot
+from chatbot_core.batching import GenerationBatcher
+
+QUESTIONS = [
+    "What are the symptoms of diabetes?",
+    "How is hypertension treated?",
+    "What causes pneumonia?",
+    "What are the side effects of ibuprofen?",
+    "How to prevent heart disease?",
+    "What is the treatment for asthma?",
+    "How is tuberculosis diagnosed?",
+    "What are the risk factors for osteoporosis?",
+]
+
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+
+def run_clients(chatbot, clients: int, requests_per_client: int):
+    """Runs concurrent clients and returns (per-request latencies, wall time)"""
+
+    def client(client_id):
+        latencies = []
+        for i in range(requests_per_client):
+            question = QUESTIONS[(client_id + i) % len(QUESTIONS)]
+            start = time.perf_counter()
+            chatbot.get_response(question, f"bench_{client_id}_{i}")
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    wall_time = time.perf_counter() - start
+    return [latency for latencies in results for latency in latencies], wall_time
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests-per-client", type=int, default=2)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    chatbot = MedicalChatbot(
+        generative_model_path=os.path.join(project_root, "outputs/scifive_finetuned_final"),
+        classifier_model_path=os.path.join(project_root, "outputs/intent_classifier_final"),
+        db_path=os.path.join(project_root, "data/knowledge_base_final.csv"),
+        # The questions repeat, so with caching most requests would never reach the generator
+        response_cache=False, encoder_cache_mb=0
+    )
+    batcher = GenerationBatcher(chatbot._generate_batch, args.max_batch_size, args.max_wait_ms)
+
+    print("\nGENERATION MICRO-BATCHING BENCHMARK")
+    print("="*72)
+    print(f"{'mode':<10} {'clients':>8} {'requests':>9} {'p50 s':>8} {'p99 s':>8} {'req/s':>8} {'mean batch':>11}")
+    print("-"*72)
+
+    for mode in ("unbatched", "batched"):
+        chatbot.batcher = batcher if mode == "batched" else None
+        for clients in CONCURRENCY_LEVELS:
+            batches_before, requests_before = batcher.batches, batcher.requests
+            latencies, wall_time = run_clients(chatbot, clients, args.requests_per_client)
+            batches = batcher.batches - batches_before
+            mean_batch = (batcher.requests - requests_before) / batches if batches else 1.0
+            print(f"{mode:<10} {clients:>8} {len(latencies):>9} {np.percentile(latencies, 50):>8.2f} "
+                  f"{np.percentile(latencies, 99):>8.2f} {len(latencies) / wall_time:>8.2f} {mean_batch:>11.2f}")
+
+    batcher.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Hybrid Retrieval Benchmark
+Measures BM25 build time, index size and per-query latency, and compares
+how often dense, BM25 and RRF-fused retrieval find the KB row a question
+came from
+
+--min-docs repeats the knowledge base until it has at least that many
+documents, to check lexical latency at 200k+ documents against the 1 ms p99
+target. --max-postings sets the per-query postings budget that bounds it.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import torch
+from sentence_transformers import SentenceTransformer
+
+from chatbot_core.ann_index import VectorIndex
+from chatbot_core.bm25_index import BM25Index, reciprocal_rank_fusion, texts_fingerprint
+from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+
+RETRIEVER_MODEL = 'microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext'
+TARGET_P99_MS = 1.0
+
+def directory_mb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2**20
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db-path", default=os.path.join(project_root, "data/knowledge_base_final.csv"))
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--min-docs", type=int, default=0)
+    parser.add_argument("--max-postings", type=int, default=BM25Index().max_postings)
+    parser.add_argument("--skip-dense", action="store_true", help="only measure the lexical side")
+    args = parser.parse_args()
+
+    print("HYBRID RETRIEVAL BENCHMARK")
+    print("="*60)
+
+    db = pd.read_csv(args.db_path).dropna()
+    texts = (db['prompt'] + "\n" + db['completion']).tolist()
+    copies = max(1, -(-args.min_docs // len(texts)))
+    bm25_texts = texts * copies
+    print(f"Knowledge base: {len(texts):,} rows, BM25 over {len(bm25_texts):,} documents")
+
+    # --- Build and reload memory-mapped, as the chatbot does ---
+    start = time.perf_counter()
+    bm25 = BM25Index(max_postings=args.max_postings).build(bm25_texts)
+    build_s = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "kb.bm25")
+        fingerprint = texts_fingerprint(bm25_texts)
+        bm25.save(path, fingerprint)
+        size_mb = directory_mb(path)
+        bm25 = BM25Index(max_postings=args.max_postings)
+        bm25.load(path, fingerprint, mmap=True)
+        print(f"Build: {build_s:.1f} s, {len(bm25.vocab):,} terms, {len(bm25.doc_ids):,} postings, {size_mb:.1f} MB on disk")
+
+        # Queries are KB questions; the row they came from is the relevant document
+        sample = db.reset_index(drop=True).sample(n=min(args.num_queries, len(db)), random_state=42)
+        queries, targets = sample['prompt'].tolist(), sample.index.tolist()
+
+        latencies = []
+        lexical_hits = []
+        for query in queries:
+            start = time.perf_counter()
+            hits = bm25.search(query, top_k=args.top_k)
+            latencies.append(time.perf_counter() - start)
+            # Copies of a row share its text, so map them back to the original row
+            lexical_hits.append([{**hit, 'corpus_id': hit['corpus_id'] % len(texts)} for hit in hits])
+        p99_ms = np.percentile(latencies, 99) * 1000
+        print(f"BM25 latency: p50 {np.percentile(latencies, 50) * 1000:.3f} ms, p99 {p99_ms:.3f} ms "
+              f"({'meets' if p99_ms <= TARGET_P99_MS else 'misses'} the {TARGET_P99_MS:g} ms p99 target "
+              f"with max_postings={args.max_postings:,})")
+
+    def recall(hit_lists) -> float:
+        return float(np.mean([
+            target in [hit['corpus_id'] for hit in hits[:args.top_k]] for hits, target in zip(hit_lists, targets)
+        ]))
+
+    print(f"\n{'retrieval':<10} {f'recall@{args.top_k}':>10}")
+    print("-"*21)
+    print(f"{'bm25':<10} {recall(lexical_hits):>10.4f}")
+    if args.skip_dense:
+        return
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(RETRIEVER_MODEL, device=device)
+    cache = EmbeddingCache(embedding_store_dir(args.db_path, RETRIEVER_MODEL, "completions"), model, RETRIEVER_MODEL)
+    index = VectorIndex("flat").build(cache.encode(db['completion'].tolist()))
+    dense_hits = [
+        [hit for hit in hits if hit['score'] >= 0.3]  # same threshold as the chatbot
+        for hits in index.search(model.encode(queries, convert_to_tensor=True, device=device), args.top_k)
+    ]
+    fused_hits = [reciprocal_rank_fusion([dense, lexical]) for dense, lexical in zip(dense_hits, lexical_hits)]
+    print(f"{'dense':<10} {recall(dense_hits):>10.4f}")
+    print(f"{'rrf':<10} {recall(fused_hits):>10.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Decoding Profile Benchmark
+Runs a fixed question set (hand-written questions plus KB questions with
+their reference answers) through every decoding profile and reports
+generation latency, throughput and answer quality
+
+Quality columns: ROUGE-L of the cleaned answer against the KB reference
+answer, and distinct-2 (share of unique word bigrams, lower = more repetitive).
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import torch
+from rouge_score import rouge_scorer
+
+from chatbot_core.bot import MedicalChatbot
+from chatbot_core.decoding import DECODING_PROFILES
+
+QUESTIONS = [
+    "What are the symptoms of diabetes?",
+    "How is hypertension treated?",
+    "What causes pneumonia?",
+    "What are the side effects of ibuprofen?",
+    "How to prevent heart disease?",
+    "What is the treatment for asthma?",
+    "How is tuberculosis diagnosed?",
+    "What are the risk factors for osteoporosis?",
+]
+
+def distinct_2(text: str) -> float:
+    words = text.lower().split()
+    bigrams = list(zip(words, words[1:]))
+    return len(set(bigrams)) / len(bigrams) if bigrams else 0.0
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", nargs="+", default=list(DECODING_PROFILES), choices=list(DECODING_PROFILES))
+    parser.add_argument("--kb-questions", type=int, default=24)
+    args = parser.parse_args()
+
+    chatbot = MedicalChatbot(
+        generative_model_path=os.path.join(project_root, "outputs/scifive_finetuned_final"),
+        classifier_model_path=os.path.join(project_root, "outputs/intent_classifier_final"),
+        db_path=os.path.join(project_root, "data/knowledge_base_final.csv"),
+        # Every profile decodes the same inputs; cached encoder states would favour all but the first
+        response_cache=False, encoder_cache_mb=0
+    )
+
+    # Fixed question set: (question, reference answer or None)
+    kb_sample = chatbot.kb.db.sample_rows(args.kb_questions)
+    cases = [(question, None) for question in QUESTIONS] + [(chatbot.kb.db.prompt(row), chatbot.kb.db.completion(row)) for row in kb_sample]
+
+    # Generator inputs are built once, so every profile decodes exactly the same inputs
+    inputs = []
+    for i, (question, reference) in enumerate(cases):
+        plan = chatbot._prepare_response(question, f"bench_decoding_{i}")
+        if plan.generator_input_ids is not None:
+            inputs.append((plan.generator_input_ids, reference))
+    print(f"Questions: {len(inputs)} of {len(cases)} reach generation")
+
+    scorer = rouge_scorer.RougeScorer(['rougeL'], use_stemmer=True)
+    print("\nDECODING PROFILE BENCHMARK")
+    print("="*84)
+    print(f"{'profile':<12} {'p50 s':>7} {'p95 s':>7} {'tokens':>7} {'tok/s':>7} {'ROUGE-L':>8} {'distinct-2':>11} {'words':>6}")
+    print("-"*84)
+    for profile in args.profiles:
+        torch.manual_seed(0)
+        chatbot._generate_batch([inputs[0][0]], profile)  # warmup
+
+        latencies, token_counts, rouge, diversity, lengths = [], [], [], [], []
+        for input_ids, reference in inputs:
+            start = time.perf_counter()
+            raw_response = chatbot._generate_batch([input_ids], profile)[0]
+            latencies.append(time.perf_counter() - start)
+            token_counts.append(len(chatbot.gen_tokenizer(raw_response, add_special_tokens=False)["input_ids"]))
+
+            answer = chatbot._clean_response(raw_response)
+            diversity.append(distinct_2(answer))
+            lengths.append(len(answer.split()))
+            if reference is not None:
+                rouge.append(scorer.score(reference, answer)['rougeL'].fmeasure)
+
+        print(f"{profile:<12} {np.percentile(latencies, 50):>7.2f} {np.percentile(latencies, 95):>7.2f} "
+              f"{np.mean(token_counts):>7.1f} {sum(token_counts) / sum(latencies):>7.1f} "
+              f"{np.mean(rouge) if rouge else float('nan'):>8.4f} {np.mean(diversity):>11.4f} {np.mean(lengths):>6.1f}")
+
+if __name__ == "__main__":
+    main()
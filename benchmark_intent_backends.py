@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Intent Backend Benchmark
+Compares the BioBERT intent classifier with the linear head on the shared
+PubMedBERT query embedding: pre-generation latency, end-to-end latency,
+intent accuracy and memory
+
+Each backend runs in its own subprocess so memory numbers are not polluted by
+the previously loaded models.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+import torch
+from datasets import Dataset
+
+from chatbot_core.bot import INTENT_BACKENDS, MedicalChatbot
+
+QUESTIONS = [
+    "What are the symptoms of diabetes?",
+    "How is hypertension treated?",
+    "What causes pneumonia?",
+    "What are the side effects of ibuprofen?",
+    "How to prevent heart disease?",
+    "What is the treatment for asthma?",
+    "How is tuberculosis diagnosed?",
+    "What are the risk factors for osteoporosis?",
+]
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def run_backend(backend: str, args) -> dict:
+    """Builds the chatbot with one intent backend and measures it."""
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    torch.manual_seed(0)
+
+    baseline_rss = rss_mb()
+    chatbot = MedicalChatbot(
+        generative_model_path=os.path.join(project_root, "outputs/scifive_finetuned_final"),
+        classifier_model_path=os.path.join(project_root, "outputs/intent_classifier_final"),
+        db_path=os.path.join(project_root, "data/knowledge_base_final.csv"),
+        response_cache=False,  # every request must do the full work
+        intent_backend=backend
+    )
+    chatbot.fast_intent = None  # measure the backend itself, not the TF-IDF fast path
+    result = {"backend": backend, "rss_mb": rss_mb() - baseline_rss}
+
+    # --- Intent accuracy on the held-out split ---
+    df = pd.read_csv(os.path.join(project_root, "data/intent_training_dataset_v3_final.csv")).dropna()
+    split = Dataset.from_pandas(df[['text', 'intent']], preserve_index=False).train_test_split(test_size=0.1, seed=42)
+    eval_df = split["test"].to_pandas().head(args.intent_samples)
+    predictions = [chatbot._enhanced_intent_classification(text)[0] for text in eval_df['text']]
+    result["intent_accuracy"] = float(np.mean([p == label for p, label in zip(predictions, eval_df['intent'])]))
+
+    # --- Everything before generation: emergency check, intent, cache and retrieval ---
+    prompts = eval_df['text'].tolist()[:args.prepare_samples] + QUESTIONS
+    latencies = []
+    for i, prompt in enumerate(prompts):
+        start = time.perf_counter()
+        chatbot._prepare_response(prompt, f"bench_prepare_{i}")
+        latencies.append(time.perf_counter() - start)
+    result["prepare_p50_ms"] = float(np.percentile(latencies, 50)) * 1000
+    result["prepare_p95_ms"] = float(np.percentile(latencies, 95)) * 1000
+
+    # --- End to end, including generation ---
+    latencies = []
+    for i in range(args.rounds):
+        for j, question in enumerate(QUESTIONS):
+            start = time.perf_counter()
+            chatbot.get_response(question, f"bench_{i}_{j}")
+            latencies.append(time.perf_counter() - start)
+    result["e2e_p50_s"] = float(np.percentile(latencies, 50))
+    result["e2e_p95_s"] = float(np.percentile(latencies, 95))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=list(INTENT_BACKENDS), choices=INTENT_BACKENDS)
+    parser.add_argument("--intent-samples", type=int, default=500)
+    parser.add_argument("--prepare-samples", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--child", choices=INTENT_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, args)))
+        return
+
+    results = {}
+    for backend in args.backends:
+        print(f"Benchmarking {backend}...")
+        child_args = [sys.executable, __file__, "--child", backend,
+                      "--intent-samples", str(args.intent_samples), "--prepare-samples", str(args.prepare_samples),
+                      "--rounds", str(args.rounds)]
+        completed = subprocess.run(child_args, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"  FAILED: {completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'unknown error'}")
+            continue
+        results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print("\nINTENT BACKEND BENCHMARK")
+    print("="*86)
+    print(f"{'backend':<10} {'RSS MB':>8} {'intent acc':>11} {'prep p50 ms':>12} {'prep p95 ms':>12} "
+          f"{'e2e p50 s':>10} {'e2e p95 s':>10}")
+    print("-"*86)
+    for backend, result in results.items():
+        print(f"{backend:<10} {result['rss_mb']:>8.0f} {result['intent_accuracy']:>11.4f} "
+              f"{result['prepare_p50_ms']:>12.1f} {result['prepare_p95_ms']:>12.1f} "
+              f"{result['e2e_p50_s']:>10.2f} {result['e2e_p95_s']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Passage Retrieval Benchmark
+Compares recall@k of dense retrieval over whole completions (the old index)
+with retrieval over answer passages, and over questions plus passages
+
+Queries are KB questions and the relevant document is the row they came
+from. When questions are indexed, the query's own question entry is removed
+from the results, so the number is not inflated by a verbatim match.
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import torch
+from sentence_transformers import SentenceTransformer
+
+from chatbot_core.ann_index import VectorIndex
+from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+from chatbot_core.passages import KBPassages
+
+RETRIEVER_MODEL = 'microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext'
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db-path", default=os.path.join(project_root, "data/knowledge_base_final.csv"))
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--max-words", type=int, default=180)
+    parser.add_argument("--overlap-words", type=int, default=40)
+    args = parser.parse_args()
+
+    print("PASSAGE RETRIEVAL BENCHMARK")
+    print("="*60)
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(RETRIEVER_MODEL, device=device)
+    db = pd.read_csv(args.db_path).dropna().reset_index(drop=True)
+
+    sample = db.sample(n=min(args.num_queries, len(db)), random_state=42)
+    targets = sample.index.tolist()
+    query_embeddings = model.encode(sample['prompt'].tolist(), convert_to_tensor=True, device=device)
+
+    completions = db['completion'].tolist()
+    layouts = [
+        ("completions", KBPassages.build(completions, max_words=10**9)),
+        ("passages", KBPassages.build(completions, None, args.max_words, args.overlap_words)),
+        ("q+passages", KBPassages.build(completions, db['prompt'].tolist(), args.max_words, args.overlap_words)),
+    ]
+
+    print(f"\n{'index':<12} {'units':>9} {f'recall@{args.top_k}':>10} {'mean rank':>10}")
+    print("-"*44)
+    for name, (passages, texts) in layouts:
+        # One store per layout, so the layouts (and the chatbot's own store) do not evict each other
+        cache = EmbeddingCache(embedding_store_dir(args.db_path, RETRIEVER_MODEL, f"benchmark-{name}"), model, RETRIEVER_MODEL)
+        index = VectorIndex("flat").build(cache.encode(texts))
+        found = []
+        ranks = []
+        for target, hits in zip(targets, index.search(query_embeddings, top_k=args.top_k * 10)):
+            own_question = passages.row_offsets[target] if name == "q+passages" else None
+            hits = [hit for hit in hits if hit['corpus_id'] != own_question]
+            rows = [hit['corpus_id'] for hit in passages.collapse(hits)]
+            found.append(target in rows[:args.top_k])
+            if target in rows:
+                ranks.append(rows.index(target) + 1)
+        mean_rank = f"{np.mean(ranks):.2f}" if ranks else "-"
+        print(f"{name:<12} {len(passages):>9,} {np.mean(found):>10.4f} {mean_rank:>10}")
+
+if __name__ == "__main__":
+    main()
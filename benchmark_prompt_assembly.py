@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Prompt Assembly Micro-Benchmark
+Times building the generator input for a medical question from three
+retrieved KB answers:
+
+  string       the old augmented_prompt string, tokenized with max_length=1024
+  tokenize     ContextPacker re-tokenizing the retrieved answers every time
+  token store  ContextPacker slicing pre-tokenized answers from the mmap store
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from transformers import AutoTokenizer
+
+from chatbot_core.bm25_index import texts_fingerprint
+from chatbot_core.context_packer import INSTRUCTION, ContextPacker
+from chatbot_core.token_store import load_or_build_token_store
+
+HISTORY = ["User: I have had a headache for two days", "Bot: Headaches lasting several days can have many causes..."]
+
+def old_prompt_ids(tokenizer, question: str, contexts: list) -> list:
+    """The string-building path used before ContextPacker."""
+    conversation_history = "\n".join(HISTORY)
+    retrieved_context = "\n\n---\n\n".join(contexts)
+    augmented_prompt = (
+        f"{INSTRUCTION}\n\n"
+        f"Previous Conversation:\n{conversation_history}\n\n"
+        f"Medical Information:\n{retrieved_context}\n\n"
+        f"Current Question: {question}\n\n"
+        f"Response:"
+    )
+    return tokenizer(augmented_prompt, max_length=1024, truncation=True)["input_ids"]
+
+def time_us(fn, cases) -> list:
+    latencies = []
+    for case in cases:
+        start = time.perf_counter()
+        fn(*case)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db-path", default=os.path.join(project_root, "data/knowledge_base_final.csv"))
+    parser.add_argument("--generator-path", default=os.path.join(project_root, "outputs/scifive_finetuned_final"))
+    parser.add_argument("--num-prompts", type=int, default=1000)
+    parser.add_argument("--max-tokens", type=int, default=384)
+    args = parser.parse_args()
+
+    print("PROMPT ASSEMBLY MICRO-BENCHMARK")
+    print("="*60)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.generator_path, local_files_only=True)
+    db = pd.read_csv(args.db_path).dropna().reset_index(drop=True)
+    completions = db['completion'].tolist()
+
+    random.seed(42)
+    cases = []
+    for _ in range(args.num_prompts):
+        rows = random.sample(range(len(db)), 3)
+        cases.append((db['prompt'].iloc[rows[0]], rows))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        store = load_or_build_token_store(os.path.join(tmp_dir, "kb.tokens"), texts_fingerprint(completions),
+                                          lambda: completions, tokenizer)
+        print(f"Token store: {len(store.tokens):,} tokens ({store.tokens.nbytes / 2**20:.1f} MB), "
+              f"built in {time.perf_counter() - start:.1f} s")
+
+        tokenizing = ContextPacker(tokenizer, args.max_tokens, passage_cache_size=0)
+        stored = ContextPacker(tokenizer, args.max_tokens)
+
+        def pack(packer, token_store=None):
+            return lambda question, rows: packer.pack(question, HISTORY, [(row, completions[row]) for row in rows],
+                                                      token_store=token_store)
+
+        results = {
+            "string": time_us(lambda question, rows: old_prompt_ids(tokenizer, question, [completions[r] for r in rows]), cases),
+            "tokenize": time_us(pack(tokenizing), cases),
+            "token store": time_us(pack(stored, store), cases),
+        }
+
+        print(f"\n{'assembly':<12} {'p50 us':>9} {'p99 us':>9} {'mean us':>9} {'speedup':>8}")
+        print("-"*50)
+        baseline = np.mean(results["string"])
+        for name, latencies in results.items():
+            print(f"{name:<12} {np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 99):>9.1f} "
+                  f"{np.mean(latencies):>9.1f} {baseline / np.mean(latencies):>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import warnings
+import numpy as np
+from chatbot_core.lazy_imports import faiss, torch
+from chatbot_core.lazy_imports import sentence_transformers_util as util
+
+# "exact" is the original brute-force util.semantic_search; the rest are FAISS indexes
+INDEX_BACKENDS = ("exact", "flat", "ivf", "hnsw", "ivfpq")
+# FAISS memory-maps only the inverted lists of IVF indexes; flat and hnsw are read into each process
+MMAP_BACKENDS = ("ivf", "ivfpq")
+
+class VectorIndex:
+    """Nearest-neighbour search over KB embeddings with a pluggable backend.
+
+    Vectors are L2-normalized so inner product equals cosine similarity, which
+    keeps scores comparable with util.semantic_search for every backend.
+    """
+
+    def __init__(self, backend: str = "flat", nlist: int = None, nprobe: int = 16,
+                 hnsw_m: int = 32, ef_construction: int = 200, ef_search: int = 64, pq_m: int = 96):
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend '{backend}', expected one of {INDEX_BACKENDS}")
+        self.backend = backend
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.index = None
+        self.embeddings = None  # only kept by the exact backend
+
+    def params(self) -> dict:
+        return {
+            "backend": self.backend, "nlist": self.nlist, "hnsw_m": self.hnsw_m,
+            "ef_construction": self.ef_construction, "pq_m": self.pq_m
+        }
+
+    @staticmethod
+    def _normalized(embeddings) -> np.ndarray:
+        if isinstance(embeddings, torch.Tensor):
+            embeddings = embeddings.detach().cpu().numpy()
+        vectors = np.array(embeddings, dtype=np.float32, ndmin=2)  # always a private copy
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def build(self, embeddings):
+        """Builds the index from an (N, d) embedding matrix."""
+        if self.backend == "exact":
+            self.embeddings = embeddings
+            return self
+
+        vectors = self._normalized(embeddings)
+        n, dim = vectors.shape
+        if self.nlist is None:
+            # ~4*sqrt(N) lists, with at least 39 training points per centroid
+            self.nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+        if self.backend == "flat":
+            index = faiss.IndexFlatIP(dim)
+        elif self.backend == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+        elif self.backend == "ivf":
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, self.nlist, faiss.METRIC_INNER_PRODUCT)
+        else:  # ivfpq
+            if dim % self.pq_m != 0:
+                raise ValueError(f"pq_m={self.pq_m} must divide the embedding dimension {dim}")
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, self.nlist, self.pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+
+        if not index.is_trained:
+            print(f"Training {self.backend} index with {self.nlist} lists...")
+            index.train(vectors)
+        index.add(vectors)
+        self.index = index
+        self._apply_search_params()
+        return self
+
+    def _apply_search_params(self):
+        if self.backend in ("ivf", "ivfpq"):
+            self.index.nprobe = self.nprobe
+        elif self.backend == "hnsw":
+            self.index.hnsw.efSearch = self.ef_search
+
+    def search(self, query_embeddings, top_k: int) -> list:
+        """Returns util.semantic_search-style hits: one list of {'corpus_id', 'score'} per query."""
+        if self.backend == "exact":
+            return util.semantic_search(query_embeddings, self.embeddings, top_k=top_k)
+
+        scores, ids = self.index.search(self._normalized(query_embeddings), top_k)
+        return [
+            [{'corpus_id': int(i), 'score': float(s)} for i, s in zip(row_ids, row_scores) if i >= 0]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+
+    def save(self, path: str, fingerprint: str):
+        """Writes the index and a metadata file recording which embeddings it was built from."""
+        if self.backend == "exact":
+            return
+        faiss.write_index(self.index, path)
+        with open(path + ".json", "w") as f:
+            json.dump({"fingerprint": fingerprint, "size": self.index.ntotal, "params": self.params()}, f)
+
+    def load(self, path: str, fingerprint: str, mmap: bool = False) -> bool:
+        """Loads a saved index if it matches the current embeddings and parameters.
+
+        With mmap=True the index data of the MMAP_BACKENDS is mapped from the file,
+        so processes serving the same index share its pages. Other backends are
+        read into memory with a warning: every process then holds its own copy.
+        """
+        meta_path = path + ".json"
+        if not (os.path.exists(path) and os.path.exists(meta_path)):
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != fingerprint:
+            print("Saved index was built from different embeddings, rebuilding...")
+            return False
+        saved_params = meta.get("params", {})
+        if any(saved_params.get(k) != v for k, v in self.params().items() if v is not None):
+            print("Saved index parameters differ, rebuilding...")
+            return False
+        self.index = None
+        if mmap and self.backend not in MMAP_BACKENDS:
+            warnings.warn(f"The {self.backend} index cannot be memory-mapped, so every process loads its own "
+                          f"copy; use one of {MMAP_BACKENDS} to share it", RuntimeWarning)
+        elif mmap:
+            try:
+                self.index = faiss.read_index(path, faiss.IO_FLAG_MMAP)
+            except RuntimeError as e:
+                warnings.warn(f"Memory-mapping {path} failed, so every process loads its own copy: {e}",
+                              RuntimeWarning)
+        if self.index is None:
+            self.index = faiss.read_index(path)
+        self.nlist = saved_params.get("nlist")
+        self._apply_search_params()
+        return True
+
+def load_or_build_index(index_path: str, embeddings, fingerprint: str, backend: str = "flat",
+                        mmap: bool = False, **params) -> VectorIndex:
+    """Loads the index saved at index_path, or builds and saves it if it is missing or stale."""
+    index = VectorIndex(backend, **params)
+    if backend == "exact":
+        return index.build(embeddings)
+    if index.load(index_path, fingerprint, mmap=mmap):
+        print(f"Loaded {backend} index ({index.index.ntotal:,} vectors) from {index_path}")
+        return index
+    print(f"Building {backend} index over {len(embeddings):,} vectors...")
+    index.build(embeddings)
+    index.save(index_path, fingerprint)
+    return index
@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class GenerationBatcher:
+    """Cross-request micro-batching in front of the generator.
+
+    Callers submit prompts from their own threads. A single worker thread
+    gathers the prompts that arrive within max_wait_ms of the first one (up to
+    max_batch_size) and runs them through generate_batch(prompts, key) as one
+    padded call per distinct key (e.g. decoding profile), then hands each
+    result back through a Future.
+    """
+
+    def __init__(self, generate_batch, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="generation-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt, key=None) -> Future:
+        """Queues prompt; only prompts with equal keys share a generate_batch call."""
+        future = Future()
+        self._queue.put((prompt, key, future))
+        return future
+
+    def generate(self, prompt, key=None, timeout: float = None) -> str:
+        """Blocks the calling thread until the batch containing prompt has been generated."""
+        return self.submit(prompt, key).result(timeout=timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0
+        }
+
+    def _collect(self, first) -> tuple:
+        """Returns (batch, stop) where batch holds first plus anything arriving before the deadline."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+
+            # Skip requests whose callers already gave up
+            groups = {}
+            for prompt, key, future in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(key, []).append((prompt, future))
+
+            for key, group in groups.items():
+                try:
+                    results = self.generate_batch([prompt for prompt, _ in group], key)
+                except Exception as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                else:
+                    for (_, future), result in zip(group, results):
+                        future.set_result(result)
+                self.batches += 1
+                self.requests += len(group)
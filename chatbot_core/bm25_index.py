@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+from array import array
+from collections import Counter
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Common English words carry almost no BM25 weight but have the longest postings lists
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before being but by can could did do does doing
+for from had has have having he her here hers him his how i if in into is it its itself just me more most
+my no nor not of off on once only or other our ours out over own same she should so some such than that
+the their theirs them then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours
+""".split())
+
+def tokenize(text: str) -> list:
+    """Lowercased alphanumeric tokens without stopwords; drug names and gene symbols stay whole (BRCA1 -> brca1)"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def texts_fingerprint(texts: list) -> str:
+    digest = hashlib.sha1()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class BM25Index:
+    """Okapi BM25 over an inverted index stored as flat numpy arrays.
+
+    Postings of term t are doc_ids[offsets[t]:offsets[t + 1]] with their
+    precomputed BM25 contributions in impacts, sorted by decreasing impact.
+    A query therefore only gathers and adds arrays. It reads at most
+    max_postings entries over all its terms, which keeps latency bounded
+    however large the knowledge base gets: rarer terms are read first and
+    completely when they fit, and the very common ones share what is left of
+    the budget, each truncated to its strongest postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_postings: int = 30000):
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.vocab = {}
+        self.offsets = None  # int64, len(vocab) + 1
+        self.doc_ids = None  # int32, one per posting
+        self.impacts = None  # float32, one per posting
+        self.num_docs = 0
+
+    def build(self, texts: list):
+        """Builds the index, one document per text."""
+        vocab = {}
+        term_ids, doc_ids, term_freqs = array('i'), array('i'), array('i')
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                term_freqs.append(tf)
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        doc_ids = np.frombuffer(doc_ids, dtype=np.int32)
+        term_freqs = np.frombuffer(term_freqs, dtype=np.int32).astype(np.float32)
+
+        num_docs = len(texts)
+        doc_freqs = np.bincount(term_ids, minlength=len(vocab))
+        idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        length_norm = self.k1 * (1 - self.b + self.b * lengths / max(float(lengths.mean()), 1.0))
+        impacts = idf[term_ids] * term_freqs * (self.k1 + 1) / (term_freqs + length_norm[doc_ids])
+
+        order = np.lexsort((-impacts, term_ids))  # by term, strongest postings first
+        self.vocab = vocab
+        self.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=self.offsets[1:])
+        self.doc_ids = doc_ids[order]
+        self.impacts = impacts[order].astype(np.float32)
+        self.num_docs = num_docs
+        return self
+
+    def search(self, query: str, top_k: int) -> list:
+        """Returns up to top_k {'corpus_id', 'score'} hits, best first."""
+        term_ids = {self.vocab[token] for token in tokenize(query) if token in self.vocab}
+        if not term_ids:
+            return []
+
+        # Shortest postings lists first, so every term gets an equal share of what the rarer ones leave
+        spans = sorted(((self.offsets[term_id], self.offsets[term_id + 1]) for term_id in term_ids),
+                       key=lambda span: span[1] - span[0])
+        budget = self.max_postings
+        ids, impacts = [], []
+        for i, (start, end) in enumerate(spans):
+            end = min(end, start + budget // (len(spans) - i))
+            budget -= end - start
+            ids.append(self.doc_ids[start:end])
+            impacts.append(self.impacts[start:end])
+        touched = np.concatenate(ids)
+        if not len(touched):
+            return []
+        scores = np.bincount(touched, weights=np.concatenate(impacts), minlength=self.num_docs)
+
+        # A document appears at most once per term, so the top k * len(term_ids) touched
+        # entries contain every document of the top k
+        touched_scores = scores[touched]
+        limit = min(top_k * len(term_ids), len(touched))
+        candidates = touched[np.argpartition(-touched_scores, limit - 1)[:limit]]
+        candidates = np.unique(candidates)
+        best = candidates[np.argsort(-scores[candidates], kind="stable")[:top_k]]
+        return [{'corpus_id': int(i), 'score': float(scores[i])} for i in best]
+
+    def save(self, path: str, fingerprint: str):
+        """Writes the index arrays and vocabulary to the directory path."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "offsets.npy"), self.offsets)
+        np.save(os.path.join(path, "doc_ids.npy"), self.doc_ids)
+        np.save(os.path.join(path, "impacts.npy"), self.impacts)
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(path, "vocab.json"), "w") as f:
+            json.dump(terms, f)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"fingerprint": fingerprint, "num_docs": self.num_docs, "k1": self.k1, "b": self.b}, f)
+
+    def load(self, path: str, fingerprint: str, mmap: bool = False) -> bool:
+        """Loads a saved index if it was built from the same texts and BM25 parameters."""
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != fingerprint or (meta.get("k1"), meta.get("b")) != (self.k1, self.b):
+            print("Saved BM25 index is stale, rebuilding...")
+            return False
+        mmap_mode = 'r' if mmap else None
+        try:
+            self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode=mmap_mode)
+            self.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode=mmap_mode)
+            self.impacts = np.load(os.path.join(path, "impacts.npy"), mmap_mode=mmap_mode)
+            with open(os.path.join(path, "vocab.json")) as f:
+                self.vocab = {term: i for i, term in enumerate(json.load(f))}
+        except (ValueError, OSError) as e:
+            print(f"Saved BM25 index unreadable, rebuilding: {e}")
+            return False
+        self.num_docs = meta["num_docs"]
+        return True
+
+def load_or_build_bm25(index_path: str, fingerprint: str, get_texts, mmap: bool = False, **params) -> BM25Index:
+    """Loads the BM25 index saved at index_path, or builds and saves it if it is missing or stale.
+
+    fingerprint identifies the documents (e.g. KnowledgeBase.fingerprint, or
+    texts_fingerprint() of a list); get_texts() returns them and is only called
+    to build, so a fresh index is loaded without reading any text.
+    """
+    index = BM25Index(**params)
+    if index.load(index_path, fingerprint, mmap=mmap):
+        print(f"Loaded BM25 index ({index.num_docs:,} documents, {len(index.vocab):,} terms) from {index_path}")
+        return index
+    texts = get_texts()
+    print(f"Building BM25 index over {len(texts):,} documents...")
+    index.build(texts)
+    index.save(index_path, fingerprint)
+    return index
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """Fuses ranked hit lists: each document scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Ranks rather than raw scores are combined, so cosine similarities and BM25
+    scores need no calibration against each other. Returns {'corpus_id', 'score'}
+    hits, best first.
+    """
+    fused = {}
+    for hits in rankings:
+        for rank, hit in enumerate(hits):
+            fused[hit['corpus_id']] = fused.get(hit['corpus_id'], 0.0) + 1.0 / (k + rank + 1)
+    return [{'corpus_id': corpus_id, 'score': score}
+            for corpus_id, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)]
@@ -1,136 +1,573 @@
-import torch
-import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, AutoModelForSeq2SeqLM
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
 import os
 import re
-from collections import defaultdict, deque
+import threading
+import time
+from collections import namedtuple
+# torch and transformers are imported on first use, so importing the bot is cheap
+from chatbot_core.lazy_imports import modeling_outputs, torch, transformers
+from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+from chatbot_core.ann_index import load_or_build_index
+from chatbot_core.bm25_index import load_or_build_bm25, reciprocal_rank_fusion
+from chatbot_core.knowledge_base import load_or_build_knowledge_base
+from chatbot_core.passages import KBPassages, load_or_build_passages
+from chatbot_core.context_packer import ContextPacker
+from chatbot_core.decoding import (
+    DECODING_PROFILES, DEFAULT_DECODING_PROFILE, check_decoding_profile, decoding_key, generation_params,
+    streaming_params, supports_assisted_decoding
+)
+from chatbot_core.token_store import load_or_build_token_store
+from chatbot_core.encoder_cache import EncoderCache
+from chatbot_core.diversity import load_or_build_clusters, mmr_select, near_duplicate_clusters
+from chatbot_core.batching import GenerationBatcher
+from chatbot_core.streaming import IncrementalCleaner, cancellation_criteria
+from chatbot_core.response_cache import ResponseCache
+from chatbot_core.session_store import MemorySessionStore, SQLiteSessionStore
+from chatbot_core.keyword_matcher import KeywordMatcher
+from chatbot_core.features import RequestFeatures
+from chatbot_core.loading import LoadProgress, ModelsNotReady
+from chatbot_core.intent_classifier import (
+    EMBEDDING_INTENT_FILE, FAST_INTENT_FILE, EmbeddingIntentHead, FastIntentClassifier, IntentClassifier,
+    load_temperature
+)
+from chatbot_core.model_loading import (
+    GENERATOR_LENGTH_BUCKETS, INTENT_LENGTH_BUCKETS, bucket_length, check_draft_model, check_inference_mode,
+    embedding_model_key, load_generator, load_intent_model, load_retriever
+)
+
+# Any whole-word match (inflections included, see keyword_matcher.py) short-circuits to the emergency response
+EMERGENCY_KEYWORDS = [
+    "severe chest pain", "chest pain", "heart attack", "crushing chest pain",
+    "can't breathe", "trouble breathing", "difficulty breathing", "choking",
+    "suicidal", "kill myself", "end my life", "suicide",
+    "unconscious", "passed out", "unresponsive",
+    "stroke", "slurred speech", "facial drooping", "sudden weakness",
+    "seizure", "convulsions", "shaking uncontrollably",
+    "uncontrollable bleeding", "bleeding heavily", "blood everywhere",
+    "numbness on one side", "can't move one side", "paralyzed",
+    "severe abdominal pain", "excruciating pain", "worst pain ever",
+    "high fever", "fever over 103", "temperature over 103"
+]
+
+# Very short prompts mentioning one of these are treated as medical questions
+SHORT_MEDICAL_TERMS = [
+    'fever', 'cold', 'cough', 'pain', 'headache', 'nausea', 'dizzy', 'tired',
+    'sick', 'hurt', 'ache', 'sore', 'swelling', 'rash', 'infection', 'symptoms',
+    'diabetes', 'asthma', 'flu', 'migraine', 'arthritis', 'allergy'
+]
+
+# Boilerplate the generator picked up from ChatDoctor training data
+PROBLEMATIC_PHRASES = [
+    "Thanks for your question on Chat Doctor",
+    "Chat Doctor",
+    "Hope I have solved your query",
+    "I will be happy to help you further",
+    "Wish you good health",
+    "For an accurate diagnosis, please consult a healthcare professional"
+]
+
+CLARIFYING_RESPONSE = ("I'm not sure I understood your question. Could you describe your symptoms "
+                       "or what you would like to know in a bit more detail?")
+
+DISCLAIMER = "\n\nDisclaimer: This is an AI-generated response and does not constitute medical advice."
+
+# biobert: the fine-tuned BioBERT classifier (train_intent_classifier.py)
+# embedding: a linear head on the PubMedBERT query embedding that retrieval needs anyway
+INTENT_BACKENDS = ("biobert", "embedding")
+
+# Everything retrieval reads, built by _load_knowledge_base and swapped in with a single assignment.
+# Requests read self.kb once, so row ids of one request always index the same KB build.
+KBState = namedtuple("KBState", [
+    "path", "db", "embedding_cache", "embeddings", "index", "passages", "duplicate_clusters", "bm25_index", "token_store"
+])
+
+class ResponsePlan:
+    """Outcome of MedicalChatbot._prepare_response.
+
+    Either final_response is set (no generation needed) or generator_input_ids
+    is set and the answer still has to be generated from it.
+    """
+
+    def __init__(self, intent: str, confidence: float, final_response: str = None, generator_input_ids: list = None,
+                 cacheable: bool = False, query_embedding=None, cache_variant: str = ""):
+        self.intent = intent
+        self.confidence = confidence
+        self.final_response = final_response
+        self.generator_input_ids = generator_input_ids
+        self.cacheable = cacheable
+        self.query_embedding = query_embedding
+        self.cache_variant = cache_variant
 
 class MedicalChatbot:
-    def __init__(self, generative_model_path: str, classifier_model_path: str, db_path: str):
+    def __init__(self, generative_model_path: str, classifier_model_path: str, db_path: str,
+                 embedding_cache_dir: str = None, index_backend: str = "flat", index_params: dict = None,
+                 batching: bool = False, max_batch_size: int = 8, max_batch_wait_ms: float = 5.0,
+                 shared_weights_dir: str = None, inference_mode: str = "fp32",
+                 response_cache: bool = True, response_cache_params: dict = None,
+                 max_sessions: int = 10000, session_ttl_seconds: float = 3600, session_db_path: str = None,
+                 fast_intent_threshold: float = 0.95, intent_abstain_threshold: float = 0.5,
+                 intent_backend: str = "biobert", hybrid_retrieval: bool = True,
+                 index_questions: bool = True, passage_max_words: int = 180, passage_overlap_words: int = 40,
+                 duplicate_threshold: float = 0.95, mmr_lambda: float = 0.7,
+                 max_input_tokens: int = 384, history_tokens: int = 96,
+                 decoding_profile: str = DEFAULT_DECODING_PROFILE, draft_model_path: str = None,
+                 encoder_cache_mb: float = 0, warmup: bool = None, background_loading: bool = False,
+                 max_concurrent_streams: int = None):
         print("Initializing Enhanced RAG chatbot system for Web App...")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         
         # --- Enhanced Emergency Detection ---
-        self.emergency_keywords = [
-            "severe chest pain", "chest pain", "heart attack", "crushing chest pain",
-            "can't breathe", "trouble breathing", "difficulty breathing", "choking",
-            "suicidal", "kill myself", "end my life", "suicide",
-            "unconscious", "passed out", "unresponsive",
-            "stroke", "slurred speech", "facial drooping", "sudden weakness",
-            "seizure", "convulsions", "shaking uncontrollably",
-            "uncontrollable bleeding", "bleeding heavily", "blood everywhere",
-            "numbness on one side", "can't move one side", "paralyzed",
-            "severe abdominal pain", "excruciating pain", "worst pain ever",
-            "high fever", "fever over 103", "temperature over 103"
-        ]
+        self.emergency_keywords = list(EMERGENCY_KEYWORDS)
+        self.short_medical_terms = list(SHORT_MEDICAL_TERMS)
+
+        # Both keyword lists compiled into one automaton: a single whole-word pass per prompt
+        self.keyword_matcher = KeywordMatcher({
+            "emergency": self.emergency_keywords,
+            "short_medical": self.short_medical_terms
+        })
 
         # --- Load all models ---
-        print("Loading intent classifier...")
-        self.intent_tokenizer = AutoTokenizer.from_pretrained(classifier_model_path, local_files_only=True)
-        self.intent_model = AutoModelForSequenceClassification.from_pretrained(classifier_model_path, local_files_only=True).to(self.device)
-        
-        print("Loading generative model...")
-        self.gen_tokenizer = AutoTokenizer.from_pretrained(generative_model_path, local_files_only=True)
-        self.gen_model = AutoModelForSeq2SeqLM.from_pretrained(generative_model_path, local_files_only=True).to(self.device)
-        
-        print("Loading medical text retriever...")
-        self.retriever_model = SentenceTransformer('microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext', device=self.device)
+        # inference_mode selects fp32, dynamic int8, ONNX Runtime or torch.compile'd models (see model_loading.py).
+        # With shared_weights_dir set, weights are memory-mapped from exported files so that
+        # several server processes share one copy of them in the page cache
+        check_inference_mode(inference_mode, self.device, shared_weights_dir)
+        self.inference_mode = inference_mode
+
+        if intent_backend not in INTENT_BACKENDS:
+            raise ValueError(f"Unknown intent backend '{intent_backend}', expected one of {INTENT_BACKENDS}")
+        self.intent_backend = intent_backend
+        self.intent_classifier = None
+        self.embedding_intent = None
+        if intent_backend == "embedding":
+            # Trained by chatbot_core/train_embedding_intent_head.py; BioBERT is not loaded at all
+            print("Loading embedding intent head...")
+            self.embedding_intent = EmbeddingIntentHead.load(os.path.join(classifier_model_path, EMBEDDING_INTENT_FILE))
+        # Below this calibrated confidence the bot asks the user to clarify instead of generating
+        self.intent_abstain_threshold = intent_abstain_threshold
+
+        # TF-IDF fast path (chatbot_core/train_fast_intent_classifier.py) settles confident prompts without BioBERT
+        fast_intent_path = os.path.join(classifier_model_path, FAST_INTENT_FILE)
+        self.fast_intent = FastIntentClassifier.load(fast_intent_path) if os.path.exists(fast_intent_path) else None
+        self.fast_intent_threshold = fast_intent_threshold
+        self.intent_counts = {"keyword": 0, "fast_path": 0, "transformer": 0, "abstained": 0}
+        if self.fast_intent is None:
+            print(f"No fast-path intent classifier found, every prompt goes to the {intent_backend} classifier")
+
+        # Deployment-wide generate() settings (decoding.py); requests may pick another profile
+        check_decoding_profile(decoding_profile)
+        self.decoding_profile = decoding_profile
+        self.gen_tokenizer = transformers.AutoTokenizer.from_pretrained(generative_model_path, local_files_only=True)
+        self.gen_model = None
+        self.draft_model = None
+        self.generation_counts = {"batched": 0, "assisted": 0}
+        # Encoder states of recent generator inputs, reused when the exact same input is generated again
+        # (encoder_cache.py explains why prefixes cannot be reused); not available for ONNX graphs.
+        # Off by default: multi-turn inputs change with the history every turn, and history-free
+        # repeats are answered by the response cache before reaching the generator
+        self.encoder_cache = None
+        if encoder_cache_mb and inference_mode != "onnx":
+            self.encoder_cache = EncoderCache(int(encoder_cache_mb * 2**20))
+        # Generator input is packed to max_input_tokens from pieces tokenized once, never cutting the question
+        self.context_packer = ContextPacker(self.gen_tokenizer, max_input_tokens, history_tokens)
+        # Compiled generator inputs are padded to these lengths, and batches to these sizes
+        self.generator_length_buckets = None
+        self.generator_batch_buckets = None
+        if inference_mode == "compiled":
+            self.generator_length_buckets = tuple(b for b in GENERATOR_LENGTH_BUCKETS if b < max_input_tokens) + (max_input_tokens,)
+            self.generator_batch_buckets = (1,)
+            if batching:
+                self.generator_batch_buckets = tuple(size for size in (1, 2, 4) if size < max_batch_size) + (max_batch_size,)
+
+        self.retriever_model_name = 'microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext'
+        self.retriever_model = None
+
+        # --- Knowledge base settings ---
+        self.embedding_cache_dir = embedding_cache_dir
+        self.index_backend = index_backend
+        self.index_params = index_params or {}
+        self.mmap_index = bool(shared_weights_dir)
+        self.hybrid_retrieval = hybrid_retrieval  # BM25 hits fused with the dense ones
+        # Dense retrieval runs over KB questions and overlapping answer passages, not whole truncated answers
+        self.index_questions = index_questions
+        self.passage_max_words = passage_max_words
+        self.passage_overlap_words = passage_overlap_words
+        # Retrieved answers at or above this cosine similarity to each other count as duplicates
+        self.duplicate_threshold = duplicate_threshold
+        self.mmr_lambda = mmr_lambda
+        self.kb = None  # KBState, set once the knowledge base is loaded
+        self.kb_listeners = []  # called after the knowledge base is reloaded
+        self.on_kb_change(self.context_packer.clear)  # cached passage ids are keyed by KB row
         
-        # --- Load and index knowledge base ---
+        # Store last 3 exchanges per session; idle and least recently used sessions are evicted.
+        # With session_db_path set, histories live in SQLite and are shared between processes
+        if session_db_path:
+            self.sessions = SQLiteSessionStore(session_db_path, max_sessions, session_ttl_seconds, max_entries=6)
+        else:
+            self.sessions = MemorySessionStore(max_sessions, session_ttl_seconds, max_entries=6)
+
+        # Answers to history-free medical questions, reused for exact and near-duplicate repeats
+        self.response_cache = ResponseCache(**(response_cache_params or {})) if response_cache else None
+        if self.response_cache is not None:
+            self.on_kb_change(self.response_cache.invalidate)
+
+        # Concurrent requests share padded generate calls through a single batching worker
+        self.batcher = GenerationBatcher(self._generate_batch, max_batch_size, max_batch_wait_ms) if batching else None
+        # Streamed answers generate outside the batcher, one generate call each; this caps how many run
+        # at once (unbounded when None), so they stay within the threads torch was sized for
+        self.stream_slots = threading.BoundedSemaphore(max_concurrent_streams) if max_concurrent_streams else None
+
+        # --- Model loading stages ---
+        # The intent classifier, the generator and the retriever (followed by the KB index) load
+        # concurrently. Requests that need a stage before it is ready raise ModelsNotReady, so with
+        # background_loading the bot answers emergency keywords and fast-path greetings at once
+        self.intent_stage = "intent_classifier" if intent_backend == "biobert" else "retriever"
+        self.run_warmup = warmup if warmup is not None else inference_mode == "compiled"
+        # Compiled graphs are built on first use of each shape, so generation also waits for the warmup
+        self.generation_stages = ("generator", "knowledge_base") + (("warmup",) if self.run_warmup else ())
+        stages = (["intent_classifier"] if intent_backend == "biobert" else []) + ["generator", "retriever", "knowledge_base"]
+        self.loading = LoadProgress(stages + (["warmup"] if self.run_warmup else []))
+        self.warmup_report = None
+        load_args = (generative_model_path, classifier_model_path, db_path, draft_model_path, shared_weights_dir)
+        if background_loading:
+            threading.Thread(target=self._load_models, args=load_args, name="chatbot-loader", daemon=True).start()
+            print("Enhanced Chatbot started, models are loading in the background.")
+        else:
+            self._load_models(*load_args)
+            if self.loading.failed:
+                raise next(iter(self.loading.failures.values()))
+            print("Enhanced Chatbot initialized successfully.")
+
+    def _load_models(self, generative_model_path: str, classifier_model_path: str, db_path: str,
+                     draft_model_path: str, shared_weights_dir: str):
+        """Runs the loading stages, independent ones on parallel threads"""
+        def load_retrieval():
+            if self.loading.run("retriever", lambda: self._load_retriever(shared_weights_dir)):
+                self.loading.run("knowledge_base", lambda: self._load_knowledge_base(db_path))
+
+        threads = [
+            threading.Thread(target=self.loading.run, name="load-generator", args=(
+                "generator", lambda: self._load_generator(generative_model_path, draft_model_path, shared_weights_dir)
+            )),
+            threading.Thread(target=load_retrieval, name="load-retrieval")
+        ]
+        if self.intent_backend == "biobert":
+            threads.append(threading.Thread(target=self.loading.run, name="load-intent", args=(
+                "intent_classifier", lambda: self._load_intent_classifier(classifier_model_path, shared_weights_dir)
+            )))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.run_warmup and not self.loading.failed:
+            self.loading.run("warmup", self._run_warmup)
+        stages = self.loading.snapshot()["stages"]
+        print(f"Model loading finished after {time.time() - self.loading.started_at:.1f}s: " + ", ".join(
+            f"{stage} {info['seconds']}s" if info["status"] == "ready" else f"{stage} {info['status']}"
+            for stage, info in stages.items()
+        ))
+
+    def _load_intent_classifier(self, classifier_model_path: str, shared_weights_dir: str):
+        print(f"Loading intent classifier ({self.inference_mode})...")
+        self.intent_tokenizer = transformers.AutoTokenizer.from_pretrained(classifier_model_path, local_files_only=True)
+        self.intent_model = load_intent_model(classifier_model_path, self.device, self.inference_mode, shared_weights_dir)
+        # Temperature fitted on the held-out split (train_intent_classifier.py / calibrate_intent_classifier.py)
+        self.intent_classifier = IntentClassifier(
+            self.intent_tokenizer, self.intent_model, self.device, temperature=load_temperature(classifier_model_path),
+            length_buckets=INTENT_LENGTH_BUCKETS if self.inference_mode == "compiled" else None
+        )
+
+    def _load_generator(self, generative_model_path: str, draft_model_path: str, shared_weights_dir: str):
+        print(f"Loading generative model ({self.inference_mode})...")
+        gen_model = load_generator(generative_model_path, self.device, self.inference_mode, shared_weights_dir)
+        # Optional small draft model with the generator's vocabulary: single-beam profiles decode with it
+        # proposing tokens that the generator verifies, so greedy output is exactly the generator's own
+        if draft_model_path:
+            print(f"Loading draft model for assisted decoding ({self.inference_mode})...")
+            draft_tokenizer = transformers.AutoTokenizer.from_pretrained(draft_model_path, local_files_only=True)
+            check_draft_model(draft_tokenizer, self.gen_tokenizer, self.inference_mode)
+            self.draft_model = load_generator(draft_model_path, self.device, self.inference_mode, shared_weights_dir, name="draft")
+        self.gen_model = gen_model
+
+    def _load_retriever(self, shared_weights_dir: str):
+        print(f"Loading medical text retriever ({self.inference_mode})...")
+        self.retriever_model = load_retriever(self.retriever_model_name, self.device, self.inference_mode, shared_weights_dir)
+
+    def _run_warmup(self):
+        self.warmup_report = self._warmup()
+
+    def _load_knowledge_base(self, db_path: str):
+        """Loads the KB, its cached embeddings and the retrieval indexes, then swaps them in as one KBState"""
         print("Loading and indexing medical knowledge base...")
-        self.db = pd.read_csv(db_path).dropna()
-        
-        print("Computing medical text embeddings...")
-        self.db_embeddings = self.retriever_model.encode(
-            self.db['completion'].tolist(), 
-            convert_to_tensor=True, 
-            device=self.device,
-            show_progress_bar=True,
-            batch_size=32
+        # Memory-mapped Arrow artifact, compiled from the CSV on first start and whenever the CSV changes
+        db = load_or_build_knowledge_base(db_path)
+        kb_base = os.path.splitext(db_path)[0]
+        # Everything derived from the KB text is keyed on the artifact's fingerprint, so a warm start
+        # reads no KB text at all: no column is turned into Python strings and nothing is hashed
+        kb_fingerprint = db.fingerprint
+
+        # Questions and long answers split into passages, so answer tails fit the encoder's sequence length
+        def build_passages():
+            return KBPassages.build(
+                db.completions(), db.prompts() if self.index_questions else None,
+                self.passage_max_words, self.passage_overlap_words
+            )
+
+        passages_fingerprint = f"{kb_fingerprint}:{self.index_questions}:{self.passage_max_words}:{self.passage_overlap_words}"
+        passages, passage_texts = load_or_build_passages(kb_base + ".passages", passages_fingerprint, build_passages)
+        print(f"Knowledge base: {len(db):,} rows, {len(passages):,} retrieval passages")
+
+        # Embeddings are cached on disk by (model, text) hash; only new or changed passages are encoded
+        print("Loading medical text embeddings...")
+        model_key = embedding_model_key(self.retriever_model_name, self.inference_mode)
+        cache_dir = self.embedding_cache_dir or embedding_store_dir(db_path, model_key, "passages")
+        embedding_cache = EmbeddingCache(cache_dir, self.retriever_model, model_key)
+        db_embeddings = embedding_cache.load_encoded(passages_fingerprint)
+        if db_embeddings is None:
+            if passage_texts is None:
+                _, passage_texts = build_passages()
+            db_embeddings = embedding_cache.encode(passage_texts, batch_size=32, source=passages_fingerprint)
+        db_embeddings = db_embeddings.to(self.device)
+        del passage_texts  # not kept in the KBState: retrieval works on ids, answers are read from the mapped KB
+
+        # Nearest-neighbour index over passages, saved next to the KB and rebuilt only when the embeddings change
+        print(f"Loading {self.index_backend} retrieval index...")
+        index_path = kb_base + f".{self.index_backend}.faiss"
+        index = load_or_build_index(
+            index_path, db_embeddings, embedding_cache.fingerprint,
+            backend=self.index_backend, mmap=self.mmap_index, **self.index_params
         )
-        
-        self.histories = defaultdict(lambda: deque(maxlen=6))  # Store last 3 exchanges
-        print("Enhanced Chatbot initialized successfully.")
-        
-    def _keyword_emergency_check(self, prompt: str) -> bool:
-        """Enhanced emergency detection with more comprehensive keywords"""
-        prompt_lower = prompt.lower()
-        return any(keyword in prompt_lower for keyword in self.emergency_keywords)
 
-    def _enhanced_intent_classification(self, prompt: str) -> str:
-        """Enhanced intent classification with better handling of short prompts"""
-        
-        # Handle very short medical symptoms
-        short_medical_terms = [
-            'fever', 'cold', 'cough', 'pain', 'headache', 'nausea', 'dizzy', 'tired',
-            'sick', 'hurt', 'ache', 'sore', 'swelling', 'rash', 'infection', 'symptoms',
-            'diabetes', 'asthma', 'flu', 'migraine', 'arthritis', 'allergy'
+        # Near-duplicate answers grouped once per KB build, so retrieval only compares cluster ids
+        print("Loading near-duplicate clusters...")
+        def build_clusters():
+            # Gathering one embedding per row copies them, so only when the saved clusters are stale
+            representatives = torch.from_numpy(np.array(passages.representatives))  # a writable copy of the mapped ids
+            representative_embeddings = db_embeddings[representatives.to(db_embeddings.device)]
+            return near_duplicate_clusters(representative_embeddings, index, passages.passage_rows, self.duplicate_threshold)
+
+        duplicate_clusters = load_or_build_clusters(
+            kb_base + ".dedup.npy", embedding_cache.fingerprint, build_clusters,
+            self.duplicate_threshold
+        )
+        print(f"{len(db):,} rows in {len(np.unique(duplicate_clusters)):,} near-duplicate clusters")
+
+        # Lexical index over question and answer, for drug names, gene symbols and abbreviations
+        bm25_index = None
+        if self.hybrid_retrieval:
+            print("Loading BM25 index...")
+            bm25_index = load_or_build_bm25(kb_base + ".bm25", kb_fingerprint, db.documents, mmap=self.mmap_index)
+
+        # Generator token ids of every answer, so prompts are assembled without re-tokenizing KB text
+        print("Loading KB token store...")
+        token_store = load_or_build_token_store(kb_base + ".tokens", kb_fingerprint, db.completions, self.gen_tokenizer)
+
+        self.kb = KBState(db_path, db, embedding_cache, db_embeddings, index, passages, duplicate_clusters,
+                          bm25_index, token_store)
+
+    def on_kb_change(self, callback):
+        """Registers callback() to run whenever the knowledge base is reloaded"""
+        self.kb_listeners.append(callback)
+
+    def reload_knowledge_base(self, db_path: str = None):
+        """Reloads the (rebuilt) knowledge base without restarting, then notifies listeners"""
+        self._load_knowledge_base(db_path or self.kb.path)
+        for callback in self.kb_listeners:
+            callback()
+
+    def stats(self) -> dict:
+        """Runtime counters for monitoring"""
+        return {
+            "loading": self.loading.snapshot(),
+            "sessions": self.sessions.stats(),
+            "intent": dict(self.intent_counts),
+            "generation": dict(self.generation_counts),
+            "encoder_cache": self.encoder_cache.stats() if self.encoder_cache is not None else None,
+            "warmup": self.warmup_report,
+            "response_cache": self.response_cache.stats() if self.response_cache is not None else None,
+            "batching": self.batcher.stats() if self.batcher is not None else None
+        }
+
+    def _warmup(self, sample_size: int = 64) -> list:
+        """Runs KB prompts through every input shape the models will see, timing the first (cold) and second (warm) run"""
+        print("Warming up models on knowledge base prompts...")
+        warmup_start = time.perf_counter()
+        report = []
+
+        def record(model: str, length: int, batch: int, num_beams: int, run):
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            report.append({"model": model, "length": length, "batch": batch, "num_beams": num_beams,
+                           "cold_s": round(timings[0], 3), "warm_s": round(timings[1], 3)})
+            print(f"  {model:<10} length {length:>4} batch {batch} beams {num_beams}: "
+                  f"cold {timings[0]:.2f}s, warm {timings[1]:.3f}s")
+
+        kb = self.kb
+        rows = np.array(kb.db.sample_rows(sample_size, seed=0))
+        questions = [kb.db.prompt(row) for row in rows]
+
+        if self.intent_classifier is not None:
+            lengths = [len(ids) for ids in self.intent_tokenizer(questions, truncation=True, max_length=self.intent_classifier.max_length)["input_ids"]]
+            buckets = self.intent_classifier.length_buckets or (max(lengths),)
+            seen = set()
+            for question, length in zip(questions, lengths):
+                bucket = bucket_length(length, buckets)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    record("intent", bucket, 1, 1, lambda: self.intent_classifier.classify_batch([question]))
+
+        # Generator inputs packed like real requests: a KB question with three KB answers as context
+        inputs = [
+            self.context_packer.pack(question, [], [(row, kb.db.completion(row)) for row in np.roll(rows, -i)[:3]],
+                                     token_store=kb.token_store)
+            for i, question in enumerate(questions)
         ]
-        
-        prompt_lower = prompt.lower().strip()
+        length_buckets = self.generator_length_buckets or (max(len(ids) for ids in inputs),)
+        # One profile per beam count (sampling settings do not change shapes); streaming always uses one beam
+        beam_profiles = {}
+        for profile in [self.decoding_profile] + list(DECODING_PROFILES):
+            beam_profiles.setdefault(DECODING_PROFILES[profile]["num_beams"], profile)
+
+        encoder_cache, self.encoder_cache = self.encoder_cache, None  # every run must encode
+        try:
+            lower = 0
+            for length in length_buckets:
+                fitting = [ids for ids in inputs if lower < len(ids) <= length]
+                input_ids = fitting[0] if fitting else max(inputs, key=len)[:length]
+                lower = length
+                for batch in self.generator_batch_buckets or (1,):
+                    for num_beams, profile in beam_profiles.items():
+                        record("generator", length, batch, num_beams,
+                               lambda: self._generate_batch([input_ids] * batch, profile))
+        finally:
+            self.encoder_cache = encoder_cache
+        self.generation_counts = {key: 0 for key in self.generation_counts}
+        print(f"Warmup finished in {time.perf_counter() - warmup_start:.1f}s")
+        return report
+
+    def _features(self, prompt: str) -> RequestFeatures:
+        """Per-request feature context shared by every stage of _prepare_response"""
+        # The retriever is looked up when the embedding is needed, not now: it may still be loading
+        return RequestFeatures(prompt, self.keyword_matcher, lambda: self.retriever_model, self.device)
+
+    def _keyword_emergency_check(self, prompt: str, features: RequestFeatures = None) -> bool:
+        """Enhanced emergency detection with more comprehensive keywords"""
+        features = features or self._features(prompt)
+        triggers = [match for match in features.keyword_matches if match.group == "emergency"]
+        if triggers:
+            print(f"Emergency keywords matched: {', '.join(f'{m.pattern!r}@{m.start}' for m in triggers)}")
+        return bool(triggers)
+
+    def _enhanced_intent_classification(self, prompt: str, features: RequestFeatures = None) -> tuple:
+        """Enhanced intent classification with better handling of short prompts.
+
+        Returns (intent, confidence). The intent is 'unclear' when the classifier's
+        calibrated confidence is below intent_abstain_threshold.
+        """
+        features = features or self._features(prompt)
         words = prompt.split()
         
         # If it's a short prompt with medical terms, classify as medical
-        if len(words) <= 3 and any(term in prompt_lower for term in short_medical_terms):
-            return 'medical_question'
+        if len(words) <= 3 and any(match.group == "short_medical" for match in features.keyword_matches):
+            self.intent_counts["keyword"] += 1
+            return 'medical_question', 1.0
         
-        # Use the trained classifier for longer prompts
         try:
-            inputs = self.intent_tokenizer(prompt, return_tensors="pt", truncation=True, max_length=128).to(self.device)
-            with torch.no_grad():
-                logits = self.intent_model(**inputs).logits
-            predicted_class_id = torch.argmax(logits, dim=1).item()
-            return self.intent_model.config.id2label[predicted_class_id]
+            # Cheap first stage for high-confidence cases
+            if self.fast_intent is not None:
+                label, probability = self.fast_intent.classify(prompt)
+                if probability >= self.fast_intent_threshold:
+                    self.intent_counts["fast_path"] += 1
+                    return label, probability
+
+            # Use the trained classifier for everything else
+            self.loading.require(self.intent_stage)
+            self.intent_counts["transformer"] += 1
+            if self.embedding_intent is not None:
+                label, confidence = self.embedding_intent.classify(features.query_embedding)
+            else:
+                label, confidence = self.intent_classifier.classify_batch([prompt])[0]
+
+            # A possible emergency is never downgraded to a clarifying question
+            if confidence < self.intent_abstain_threshold and label != 'emergency':
+                self.intent_counts["abstained"] += 1
+                return 'unclear', confidence
+            return label, confidence
+        except ModelsNotReady:
+            raise
         except Exception as e:
             print(f"Intent classification error: {e}")
-            return 'medical_question'  # Default to medical if error
+            return 'medical_question', 0.0  # Default to medical if error
     
-    def _retrieve_context(self, query: str, top_k: int = 3) -> str:
-        """Enhanced context retrieval with deduplication and relevance filtering"""
+    def _retrieve_context(self, query: str, top_k: int = 3, query_embedding=None) -> str:
+        """Retrieved KB answers joined into one context string"""
+        kb = self.kb
+        rows = self._retrieve_rows(query, top_k, query_embedding, kb)
+        if rows is None:
+            return "Unable to retrieve medical information."
+        if not rows:
+            return "No relevant medical information found."
+        return "\n\n---\n\n".join(kb.db.completion(row) for row in rows)
+
+    def _retrieve_rows(self, query: str, top_k: int = 3, query_embedding=None, kb: KBState = None) -> list:
+        """Enhanced context retrieval with deduplication and relevance filtering.
+
+        Returns up to top_k row ids of kb (the current KB by default), best first, or None if retrieval failed.
+        """
+        hits = self._retrieve_hits(query, top_k, query_embedding, kb)
+        return None if hits is None else [hit['corpus_id'] for hit in hits]
+
+    def _retrieve_hits(self, query: str, top_k: int = 3, query_embedding=None, kb: KBState = None) -> list:
+        """_retrieve_rows() as row hits: 'corpus_id' is the row and 'passage_id' the passage dense
+        retrieval matched in it (None for rows only BM25 found)."""
+        kb = kb or self.kb
         try:
-            query_embedding = self.retriever_model.encode(query, convert_to_tensor=True, device=self.device)
-            hits = util.semantic_search(query_embedding, self.db_embeddings, top_k=top_k*2)  # Get more for filtering
-            
-            # Filter and deduplicate contexts
-            contexts = []
-            seen_contexts = set()
-            
-            for hit in hits[0]:
-                if hit['score'] < 0.3:  # Skip low-relevance results
-                    continue
-                    
-                context = self.db['completion'].iloc[hit['corpus_id']]
-                context_snippet = context[:100].lower()  # First 100 chars for dedup
-                
-                if context_snippet not in seen_contexts and len(context) > 50:
-                    contexts.append(context)
-                    seen_contexts.add(context_snippet)
-                    
-                if len(contexts) >= top_k:
-                    break
+            if query_embedding is None:
+                query_embedding = self.retriever_model.encode(query, convert_to_tensor=True, device=self.device)
+            # Several passages of one row can match, so search deeper and collapse hits to rows
+            passage_hits = kb.index.search(query_embedding, top_k=top_k*2*3)[0]
+            hits = kb.passages.collapse(passage_hits)[:top_k*2]  # Get more for filtering
+            hits = [hit for hit in hits if hit['score'] >= 0.3]  # Skip low-relevance results
+
+            # Exact term matches PubMedBERT embeds poorly; ranks of both lists are fused
+            if kb.bm25_index is not None:
+                passage_ids = {hit['corpus_id']: hit['passage_id'] for hit in hits}
+                hits = reciprocal_rank_fusion([hits, kb.bm25_index.search(query, top_k=top_k*2)])
+                for hit in hits:
+                    hit['passage_id'] = passage_ids.get(hit['corpus_id'])
             
-            return "\n\n---\n\n".join(contexts) if contexts else "No relevant medical information found."
+            # Keep the best-ranked row of each offline near-duplicate cluster, skipping stub answers
+            candidates = []
+            seen_clusters = set()
+            for hit in hits:
+                cluster = int(kb.duplicate_clusters[hit['corpus_id']])
+                if cluster not in seen_clusters and len(kb.db.completion(hit['corpus_id'])) > 50:
+                    candidates.append(hit)
+                    seen_clusters.add(cluster)
+            if not candidates:
+                return []
+
+            # MMR over the remaining candidates drops paraphrases the clusters did not catch
+            rows = np.array([hit['corpus_id'] for hit in candidates])
+            scores = torch.tensor([hit['score'] for hit in candidates])
+            candidate_embeddings = kb.embeddings[torch.from_numpy(kb.passages.representatives[rows]).to(kb.embeddings.device)]
+            picked = mmr_select(candidate_embeddings, scores / scores.max(), top_k, self.mmr_lambda, self.duplicate_threshold)
+
+            return [candidates[i] for i in picked]
             
         except Exception as e:
             print(f"Retrieval error: {e}")
-            return "Unable to retrieve medical information."
+            return None
     
     def _clean_response(self, response: str) -> str:
         """Enhanced response cleaning to remove repetition and improve formatting"""
         
         # Remove common problematic phrases
-        problematic_phrases = [
-            "Thanks for your question on Chat Doctor",
-            "Chat Doctor",
-            "Hope I have solved your query",
-            "I will be happy to help you further",
-            "Wish you good health",
-            "For an accurate diagnosis, please consult a healthcare professional"
-        ]
-        
         cleaned = response
-        for phrase in problematic_phrases:
+        for phrase in PROBLEMATIC_PHRASES:
             cleaned = re.sub(re.escape(phrase) + r'\.?\s*', '', cleaned, flags=re.IGNORECASE)
         
         # Split into sentences and remove duplicates
@@ -167,83 +604,259 @@ class MedicalChatbot:
         
         return cleaned_response
             
-    def get_response(self, prompt: str, session_id: str) -> dict:
-        """Enhanced response generation with proper context handling and Flask compatibility"""
-        
+    def _generator_inputs(self, input_ids_batch: list) -> dict:
+        """Padded generate() inputs; with the encoder cache on, also their encoder states, encoding only new inputs"""
+        padding = {"padding": True}
+        if self.generator_length_buckets:
+            longest = max(len(input_ids) for input_ids in input_ids_batch)
+            padding = {"padding": "max_length", "max_length": bucket_length(longest, self.generator_length_buckets)}
+        inputs = dict(self.gen_tokenizer.pad(
+            [{"input_ids": input_ids} for input_ids in input_ids_batch], return_tensors="pt", **padding
+        ).to(self.device))
+        if self.encoder_cache is None:
+            return inputs
+
+        cached = [self.encoder_cache.get(input_ids) for input_ids in input_ids_batch]
+        missing = [i for i, states in enumerate(cached) if states is None]
+        if missing:
+            rows = missing
+            if self.generator_batch_buckets:
+                # Encoded at a warmed-up batch size, like generate() would, so compiled graphs are reused
+                rows = missing + [missing[0]] * (bucket_length(len(missing), self.generator_batch_buckets) - len(missing))
+            with torch.no_grad():
+                encoded = self.gen_model.get_encoder()(
+                    input_ids=inputs["input_ids"][rows], attention_mask=inputs["attention_mask"][rows]
+                ).last_hidden_state
+            for states, i in zip(encoded, missing):
+                cached[i] = states[inputs["attention_mask"][i].bool()].clone()
+                self.encoder_cache.put(input_ids_batch[i], cached[i])
+
+        # Unpadded cached states placed back at their token positions of the padded batch
+        mask = inputs["attention_mask"].bool()
+        hidden_states = cached[0].new_zeros(mask.shape + (cached[0].shape[-1],))
+        for i, states in enumerate(cached):
+            hidden_states[i, mask[i]] = states
+        inputs["encoder_outputs"] = modeling_outputs.BaseModelOutput(last_hidden_state=hidden_states)
+        return inputs
+
+    def _generate_batch(self, input_ids_batch: list, decoding_profile: str = None) -> list:
+        """Runs one padded generate call over several packed inputs and returns the decoded outputs"""
+        count = len(input_ids_batch)
+        if self.generator_batch_buckets:
+            # Compiled graphs exist for a few batch sizes only; filler rows repeat the first input
+            input_ids_batch = input_ids_batch + [input_ids_batch[0]] * (bucket_length(count, self.generator_batch_buckets) - count)
+        inputs = self._generator_inputs(input_ids_batch)
+        params = self._generation_params(generation_params(decoding_profile or self.decoding_profile))
+
+        # Assisted decoding verifies one sequence at a time: it serves single requests, while
+        # concurrent ones keep sharing a plain batched call
+        if self.draft_model is not None and len(input_ids_batch) == 1 and supports_assisted_decoding(params):
+            params["assistant_model"] = self.draft_model
+            self.generation_counts["assisted"] += 1
+        else:
+            self.generation_counts["batched"] += 1
+
+        with torch.no_grad():
+            output = self.gen_model.generate(**inputs, **params)
+
+        return self.gen_tokenizer.batch_decode(output[:count], skip_special_tokens=True)
+
+    def _generation_params(self, params: dict) -> dict:
+        if self.inference_mode == "compiled":
+            # A fixed-size KV cache keeps every decoder step at the same, already compiled shape
+            params["cache_implementation"] = "static"
+        return params
+
+    def _generate(self, input_ids: list, decoding_profile: str = None) -> str:
+        """Generates a raw response, sharing a batch with concurrent requests when batching is enabled"""
+        decoding_profile = decoding_profile or self.decoding_profile
+        if self.batcher is not None:
+            return self.batcher.generate(input_ids, key=decoding_profile)  # batches never mix profiles
+        return self._generate_batch([input_ids], decoding_profile)[0]
+
+    def _generate_stream(self, input_ids: list, decoding_profile: str = None):
+        """Yields decoded text pieces as the generator produces them (beam profiles stream without beams).
+
+        Closing the generator early (the client went away) stops generation at the next token.
+        """
+        params = self._generation_params(streaming_params(decoding_profile or self.decoding_profile))
+        if self.draft_model is not None:
+            params["assistant_model"] = self.draft_model
+        cancelled = threading.Event()
+        params["stopping_criteria"] = cancellation_criteria(cancelled)
+        inputs = self._generator_inputs([input_ids])
+        streamer = transformers.TextIteratorStreamer(self.gen_tokenizer, skip_prompt=True, skip_special_tokens=True)
+        slots = self.stream_slots
+
+        def run():
+            try:
+                self.gen_model.generate(**inputs, streamer=streamer, **params)
+            except Exception as e:
+                print(f"Streaming generation error: {e}")
+                streamer.end()
+            finally:
+                if slots is not None:
+                    slots.release()
+
+        # Held by the generate thread until it finishes, even if the caller stops reading earlier
+        if slots is not None:
+            slots.acquire()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
         try:
-            # --- Enhanced Emergency Detection ---
-            if self._keyword_emergency_check(prompt):
-                intent = "emergency_keyword"
-                final_response = "Based on your description, this may be a medical emergency. Please seek immediate medical attention or call your local emergency services."
-                confidence = 1.0
-            else:
-                # --- Enhanced Intent Classification ---
-                intent = self._enhanced_intent_classification(prompt)
-                confidence = 1.0
-
-                if intent == 'emergency':
-                    final_response = "This may be a medical emergency. Please seek immediate medical attention or call your local emergency services."
-                elif intent == 'greeting':
-                    final_response = "Hello! I am a medical AI assistant. How can I help you with your health questions today?"
-                elif intent == 'medical_question':
-                    print("Processing medical question with enhanced RAG...")
-                    
-                    # --- ENHANCED CONTEXT HANDLING ---
-                    # 1. Retrieve context using ONLY the current prompt (clean query)
-                    retrieved_context = self._retrieve_context(prompt)
-                    
-                    # 2. Get conversation history separately
-                    conversation_history = "\n".join(list(self.histories[session_id])[-4:])  # Last 4 entries
-                    
-                    # 3. Create structured prompt for the generator
-                    augmented_prompt = (
-                        "You are a knowledgeable medical assistant. Based on the conversation context and medical information provided, "
-                        "give a clear, helpful, and concise answer to the user's question. Avoid repetition.\n\n"
-                        f"Previous Conversation:\n{conversation_history}\n\n"
-                        f"Medical Information:\n{retrieved_context}\n\n"
-                        f"Current Question: {prompt}\n\n"
-                        f"Response:"
-                    )
-                    
-                    print("Generating enhanced medical response...")
-                    inputs = self.gen_tokenizer(augmented_prompt, return_tensors="pt", max_length=1024, truncation=True).to(self.device)
-                    
-                    with torch.no_grad():
-                        output = self.gen_model.generate(
-                            **inputs,
-                            max_length=200,           # Shorter to reduce repetition
-                            num_beams=4,              # Fewer beams for efficiency
-                            early_stopping=True,
-                            repetition_penalty=1.3,   # Higher penalty
-                            no_repeat_ngram_size=3,   # Prevent 3-word repetitions
-                            temperature=0.8,          # Slight randomness
-                            do_sample=True            # Enable sampling
-                        )
-                    
-                    raw_response = self.gen_tokenizer.decode(output[0], skip_special_tokens=True)
-                    final_response = self._clean_response(raw_response)
-                    
-                    print(f"Generated response length: {len(final_response)} characters")
-                    
-                else:
-                    final_response = "I'm not sure how to respond to that. Could you please rephrase your question?"
-            
-            # --- Update History with Clean Entries ---
-            self.histories[session_id].append(f"User: {prompt}")
-            self.histories[session_id].append(f"Bot: {final_response[:100]}...")  # Store truncated response
-            
-            disclaimer = "\n\nDisclaimer: This is an AI-generated response and does not constitute medical advice."
-            
-            return {
-                "responseText": final_response + disclaimer,
-                "intent": intent, 
-                "confidence": confidence
-            }
-            
+            yield from streamer
+        finally:
+            cancelled.set()
+        thread.join()
+
+    def _prepare_response(self, prompt: str, session_id: str, cache_variant: str = "") -> ResponsePlan:
+        """Runs everything before generation: emergency check, cache, intent and retrieval.
+
+        cache_variant is the decoding_key of the generation settings the answer would be generated
+        with; only cached answers generated with the same settings are returned.
+        """
+        # --- Enhanced Emergency Detection ---
+        features = self._features(prompt)
+        if self._keyword_emergency_check(prompt, features):
+            final_response = "Based on your description, this may be a medical emergency. Please seek immediate medical attention or call your local emergency services."
+            return ResponsePlan("emergency_keyword", 1.0, final_response=final_response)
+
+        # Answers that depended on earlier turns are never cached, so only history-free turns use the cache
+        history = self.sessions.history(session_id)
+        cacheable = self.response_cache is not None and not history
+        if cacheable:
+            cached_response = self.response_cache.get_exact(prompt, cache_variant)
+            if cached_response is not None:
+                return ResponsePlan('medical_question', 1.0, final_response=cached_response)
+
+        # --- Enhanced Intent Classification ---
+        intent, confidence = self._enhanced_intent_classification(prompt, features)
+
+        if intent == 'emergency':
+            final_response = "This may be a medical emergency. Please seek immediate medical attention or call your local emergency services."
+            return ResponsePlan(intent, confidence, final_response=final_response)
+        if intent == 'greeting':
+            final_response = "Hello! I am a medical AI assistant. How can I help you with your health questions today?"
+            return ResponsePlan(intent, confidence, final_response=final_response)
+        if intent == 'unclear':
+            return ResponsePlan(intent, confidence, final_response=CLARIFYING_RESPONSE)
+        if intent != 'medical_question':
+            final_response = "I'm not sure how to respond to that. Could you please rephrase your question?"
+            return ResponsePlan(intent, confidence, final_response=final_response)
+
+        # Retrieval and generation need every remaining stage
+        self.loading.require(*self.generation_stages)
+        print("Processing medical question with enhanced RAG...")
+        # Encoded once per request: already computed here when the embedding intent head classified it
+        query_embedding = features.query_embedding
+
+        if cacheable:
+            cached_response = self.response_cache.get_similar(query_embedding, cache_variant)
+            if cached_response is not None:
+                return ResponsePlan(intent, confidence, final_response=cached_response)
+
+        # --- ENHANCED CONTEXT HANDLING ---
+        # 1. Retrieve context using ONLY the current prompt (clean query), from one KB build even if it is reloaded
+        kb = self.kb
+        hits = self._retrieve_hits(prompt, query_embedding=query_embedding, kb=kb) or []
+
+        # 2. Pack instruction, last 4 history entries, answers (each from its matched passage) and question
+        #    into the token budget
+        passages = [
+            (hit['corpus_id'], kb.db.completion(hit['corpus_id']),
+             0 if hit['passage_id'] is None else int(kb.passages.first_sentences[hit['passage_id']]))
+            for hit in hits
+        ]
+        generator_input_ids = self.context_packer.pack(prompt, history[-4:], passages, token_store=kb.token_store)
+        return ResponsePlan(intent, confidence, generator_input_ids=generator_input_ids,
+                            cacheable=cacheable, query_embedding=query_embedding, cache_variant=cache_variant)
+
+    def _finish_response(self, prompt: str, session_id: str, plan: ResponsePlan, final_response: str) -> dict:
+        """Caches fresh answers, records the exchange in the session history and builds the response payload"""
+        if plan.cacheable:
+            self.response_cache.put(prompt, plan.query_embedding, final_response, plan.cache_variant)
+
+        # --- Update History with Clean Entries ---
+        self.sessions.append(session_id, f"User: {prompt}", f"Bot: {final_response[:100]}...")  # Store truncated response
+
+        return {
+            "responseText": final_response + DISCLAIMER,
+            "intent": plan.intent,
+            "confidence": plan.confidence
+        }
+
+    def _error_response(self) -> dict:
+        return {
+            "responseText": "I apologize, but I encountered an error processing your request. Please try rephrasing your question.",
+            "intent": "error",
+            "confidence": 0.0
+        }
+
+    def get_response(self, prompt: str, session_id: str, decoding_profile: str = None) -> dict:
+        """Enhanced response generation with proper context handling and Flask compatibility.
+
+        decoding_profile overrides the deployment's profile for this request (see decoding.py).
+        Raises ModelsNotReady while models this request needs are still loading.
+        """
+
+        try:
+            cache_variant = decoding_key(generation_params(decoding_profile or self.decoding_profile))
+            plan = self._prepare_response(prompt, session_id, cache_variant)
+            final_response = plan.final_response
+
+            if plan.generator_input_ids is not None:
+                print("Generating enhanced medical response...")
+                raw_response = self._generate(plan.generator_input_ids, decoding_profile)
+                final_response = self._clean_response(raw_response)
+
+                print(f"Generated response length: {len(final_response)} characters")
+
+            return self._finish_response(prompt, session_id, plan, final_response)
+
+        except ModelsNotReady:
+            raise  # the server answers 503 with the loading progress
         except Exception as e:
             print(f"Error in get_response: {e}")
-            return {
-                "responseText": "I apologize, but I encountered an error processing your request. Please try rephrasing your question.",
-                "intent": "error",
-                "confidence": 0.0
-            }
+            return self._error_response()
+
+    def stream_response(self, prompt: str, session_id: str, decoding_profile: str = None):
+        """Streaming variant of get_response.
+
+        Yields {"type": "token", "text": ...} events while the answer is generated,
+        then one {"type": "done", ...} event with the same fields as get_response.
+        The streamed text is cleaned incrementally; the done event carries the
+        fully cleaned answer, which clients should display in its place.
+        ModelsNotReady is raised before the first event, like in get_response.
+        Closing the generator early (the client disconnected) stops generation.
+        """
+        try:
+            # Streaming drops beam search, so its answers are cached apart from the profile's non-streamed ones
+            cache_variant = decoding_key(streaming_params(decoding_profile or self.decoding_profile))
+            plan = self._prepare_response(prompt, session_id, cache_variant)
+            final_response = plan.final_response
+
+            if plan.generator_input_ids is not None:
+                print("Streaming enhanced medical response...")
+                cleaner = IncrementalCleaner(PROBLEMATIC_PHRASES)
+                raw_parts = []
+                pieces = self._generate_stream(plan.generator_input_ids, decoding_profile)
+                try:
+                    for text in pieces:
+                        raw_parts.append(text)
+                        cleaned = cleaner.feed(text)
+                        if cleaned:
+                            yield {"type": "token", "text": cleaned}
+                finally:
+                    pieces.close()  # when this generator is closed early, stop generating too
+                tail = cleaner.flush()
+                if tail:
+                    yield {"type": "token", "text": tail}
+                final_response = self._clean_response("".join(raw_parts))
+
+            result = self._finish_response(prompt, session_id, plan, final_response)
+        except ModelsNotReady:
+            raise
+        except Exception as e:
+            print(f"Error in stream_response: {e}")
+            result = self._error_response()
+        yield {"type": "done", **result}
@@ -0,0 +1,40 @@
+import pandas as pd
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from datasets import Dataset
+from intent_classifier import IntentClassifier, calibration_report, fit_temperature, save_temperature
+
+def main():
+    # Fits temperature scaling for an already trained classifier, without retraining it
+    model_path = "../outputs/intent_classifier_final"
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    # 1. Rebuild the held-out split used by train_intent_classifier.py
+    print("Loading intent dataset...")
+    df = pd.read_csv('../data/intent_training_dataset_v3_final.csv').dropna()
+    split = Dataset.from_pandas(df[['text', 'intent']], preserve_index=False).train_test_split(test_size=0.1, seed=42)
+    eval_df = split["test"].to_pandas()
+    print(f"Eval examples: {len(eval_df)}")
+
+    # 2. Raw logits from the trained classifier
+    print("Loading intent classifier...")
+    tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True).to(device).eval()
+    classifier = IntentClassifier(tokenizer, model, device)
+    logits = classifier.logits_batch(eval_df['text'].tolist())
+    labels = torch.tensor([model.config.label2id[intent] for intent in eval_df['intent']])
+
+    # 3. Fit and save the temperature
+    temperature = fit_temperature(logits, labels)
+    before = calibration_report(logits, labels)
+    after = calibration_report(logits, labels, temperature)
+    print(f"  Temperature: {temperature:.3f}")
+    print(f"  Accuracy: {after['accuracy']:.4f} (unchanged by scaling)")
+    print(f"  NLL: {before['nll']:.4f} -> {after['nll']:.4f}")
+    print(f"  ECE: {before['ece']:.4f} -> {after['ece']:.4f}")
+
+    save_temperature(model_path, temperature, after)
+    print(f"✅ Confidence temperature saved to: {model_path}/temperature.json")
+
+if __name__ == "__main__":
+    main()
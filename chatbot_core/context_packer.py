@@ -0,0 +1,134 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+INSTRUCTION = (
+    "You are a knowledgeable medical assistant. Based on the conversation context and medical information provided, "
+    "give a clear, helpful, and concise answer to the user's question. Avoid repetition."
+)
+
+class ContextPacker:
+    """Assembles the generator input as token ids within a fixed token budget.
+
+    Every piece of the prompt is tokenized once and the pieces are
+    concatenated as ids. The question and the instruction are always kept
+    whole; the newest history lines get up to history_tokens of what is left,
+    and retrieved passages fill the rest in rank order, trimmed at sentence
+    boundaries and starting at the passage retrieval matched. Token ids of KB
+    passages come from a token store (pre-tokenized at KB build time, see
+    token_store.py) when one is passed to pack(), else are cached by row.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int = 384, history_tokens: int = 96, passage_cache_size: int = 4096):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.history_tokens = history_tokens
+        self.passage_cache_size = passage_cache_size
+        self._passage_cache = OrderedDict()  # row -> token ids of each sentence
+        self._lock = threading.Lock()
+
+        self.instruction_ids = self.encode(INSTRUCTION)
+        self.history_header_ids = self.encode("Previous Conversation:")
+        self.passages_header_ids = self.encode("Medical Information:")
+        self.question_header_ids = self.encode("Current Question:")
+        self.response_header_ids = self.encode("Response:")
+        self.separator_ids = self.encode("---")
+        self.no_context_ids = self.encode("No relevant medical information found.")
+        # Special tokens the tokenizer wraps around an input (</s> at the end for T5)
+        probe = self.encode("medical")
+        wrapped = self.tokenizer("medical")["input_ids"]
+        start = next(i for i in range(len(wrapped)) if wrapped[i:i + len(probe)] == probe)
+        self.prefix_ids, self.suffix_ids = wrapped[:start], wrapped[start + len(probe):]
+
+    def encode(self, text: str) -> list:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def passage_sentences(self, row: int, text: str) -> list:
+        """Token ids of each sentence of a KB passage, tokenized once per row."""
+        with self._lock:
+            sentences = self._passage_cache.get(row)
+            if sentences is not None:
+                self._passage_cache.move_to_end(row)
+                return sentences
+        sentences = [self.encode(sentence) for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+        with self._lock:
+            self._passage_cache[row] = sentences
+            while len(self._passage_cache) > self.passage_cache_size:
+                self._passage_cache.popitem(last=False)
+        return sentences
+
+    def passage_window(self, row: int, text: str, max_tokens: int, first_sentence: int = 0, token_store=None):
+        """Token ids of the passage's whole sentences from first_sentence on that fit in max_tokens.
+
+        When all of them fit, earlier sentences are prepended while they fit
+        (see KBTokenStore.window).
+        """
+        if token_store is not None:
+            return token_store.window(row, first_sentence, max_tokens)
+        sentences = self.passage_sentences(row, text)
+        first = min(max(first_sentence, 0), len(sentences))
+        kept = []
+        end = first
+        for sentence_ids in sentences[first:]:
+            if len(kept) + len(sentence_ids) > max_tokens:
+                break
+            kept.extend(sentence_ids)
+            end += 1
+        if end == len(sentences):
+            for sentence_ids in reversed(sentences[:first]):
+                if len(kept) + len(sentence_ids) > max_tokens:
+                    break
+                kept = sentence_ids + kept
+        return kept
+
+    def clear(self):
+        """Drops cached passage ids, e.g. after the knowledge base changed."""
+        with self._lock:
+            self._passage_cache.clear()
+
+    def pack(self, question: str, history: list, passages: list, token_store=None) -> list:
+        """Returns generator input ids for question, history lines (oldest first) and (row, text) passages, best first.
+
+        A passage may be (row, text, first_sentence) to start the answer at the sentence
+        its retrieved passage begins in. Rows index token_store when given (it must
+        belong to the same KB build as the rows).
+        """
+        # One tokenizer call for everything that is not pre-tokenized
+        question_ids, *history_line_ids = self.tokenizer([question] + list(history), add_special_tokens=False)["input_ids"]
+        fixed = (self.prefix_ids, self.instruction_ids, self.passages_header_ids, self.question_header_ids,
+                 question_ids, self.response_header_ids, self.suffix_ids)
+        budget = self.max_tokens - sum(len(ids) for ids in fixed)
+
+        # Newest history lines first, whole lines only
+        history_ids = []
+        history_budget = min(self.history_tokens, budget - len(self.history_header_ids))
+        for line_ids in reversed(history_line_ids):
+            if len(history_ids) + len(line_ids) > history_budget:
+                break
+            history_ids = line_ids + history_ids
+        if history_ids:
+            budget -= len(self.history_header_ids) + len(history_ids)
+
+        # Passages in rank order, each from its matched sentence and cut after its last sentence that still fits
+        passage_pieces = []
+        used = 0
+        for row, text, *first_sentence in passages:
+            separator = self.separator_ids if passage_pieces else []
+            room = budget - used - len(separator)
+            if room <= 0:  # e.g. a question that alone fills the budget
+                break
+            kept = self.passage_window(row, text, room, *first_sentence, token_store=token_store)
+            if len(kept) == 0:
+                break
+            passage_pieces += [separator, kept]
+            used += len(separator) + len(kept)
+
+        pieces = [self.prefix_ids, self.instruction_ids]
+        if history_ids:
+            pieces += [self.history_header_ids, history_ids]
+        pieces += [self.passages_header_ids] + (passage_pieces or [self.no_context_ids])
+        pieces += [self.question_header_ids, question_ids, self.response_header_ids, self.suffix_ids]
+        return np.concatenate([np.asarray(piece, dtype=np.int64) for piece in pieces]).tolist()
@@ -0,0 +1,51 @@
+# Named generate() settings for the SciFive generator, selectable per deployment
+# (MedicalChatbot(decoding_profile=...), CHATBOT_DECODING_PROFILE) or per request.
+# benchmark_decoding_profiles.py measures latency, throughput and answer quality
+# of each one on a fixed question set.
+
+import json
+
+# Shared by every profile: the fine-tuned generator repeats itself without them
+COMMON = {
+    "max_length": 200,           # Shorter to reduce repetition
+    "repetition_penalty": 1.3,
+    "no_repeat_ngram_size": 3,   # Prevent 3-word repetitions
+}
+
+DECODING_PROFILES = {
+    # Greedy: one decoder pass per token and deterministic. The cheapest profile;
+    # answers are the most extractive and can be terse
+    "fast": {**COMMON, "num_beams": 1, "do_sample": False},
+    # Nucleus sampling: the same cost as fast with more varied wording, not reproducible
+    "sampling": {**COMMON, "num_beams": 1, "do_sample": True, "top_p": 0.9, "temperature": 0.8},
+    # Beam search: about num_beams times the decoder work of fast, usually the most fluent answers
+    "quality": {**COMMON, "num_beams": 4, "do_sample": False, "early_stopping": True},
+    # The original settings: beam search with sampling inside the beams, as costly as
+    # quality without its determinism
+    "beam_sample": {**COMMON, "num_beams": 4, "do_sample": True, "temperature": 0.8, "early_stopping": True},
+}
+
+DEFAULT_DECODING_PROFILE = "beam_sample"
+
+def check_decoding_profile(name: str):
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Unknown decoding profile '{name}', expected one of {tuple(DECODING_PROFILES)}")
+
+def generation_params(name: str) -> dict:
+    check_decoding_profile(name)
+    return dict(DECODING_PROFILES[name])
+
+def decoding_key(params: dict) -> str:
+    """Canonical form of generation settings; answers cached under one key were generated with them."""
+    return json.dumps(params, sort_keys=True)
+
+def supports_assisted_decoding(params: dict) -> bool:
+    """Assisted decoding (a draft model proposing tokens) only verifies a single beam."""
+    return params.get("num_beams", 1) == 1
+
+def streaming_params(name: str) -> dict:
+    """generation_params for streaming: streamers do not support beam search, so beams are dropped."""
+    params = generation_params(name)
+    params.pop("early_stopping", None)
+    params["num_beams"] = 1
+    return params
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+import numpy as np
+from chatbot_core.lazy_imports import torch
+
+def _find(parents: np.ndarray, i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+def near_duplicate_clusters(row_embeddings, index, passage_rows: np.ndarray, threshold: float = 0.95,
+                            neighbors: int = 8, batch_size: int = 4096) -> np.ndarray:
+    """Groups KB rows whose answers are near-duplicates (cosine >= threshold).
+
+    Each row's representative embedding is looked up in the passage index;
+    rows linked by a close enough neighbour are merged (union-find), so
+    paraphrase chains end up in one cluster. Returns one int32 cluster id per
+    row, the smallest row id of its cluster.
+    """
+    num_rows = len(row_embeddings)
+    parents = np.arange(num_rows, dtype=np.int64)
+    for start in range(0, num_rows, batch_size):
+        batch_hits = index.search(row_embeddings[start:start + batch_size], top_k=neighbors + 1)
+        for row, hits in enumerate(batch_hits, start):
+            for hit in hits:
+                if hit['score'] < threshold:
+                    break
+                other = int(passage_rows[hit['corpus_id']])
+                if other != row:
+                    a, b = _find(parents, row), _find(parents, other)
+                    parents[max(a, b)] = min(a, b)
+    return np.array([_find(parents, i) for i in range(num_rows)], dtype=np.int32)
+
+def load_or_build_clusters(path: str, fingerprint: str, build, threshold: float) -> np.ndarray:
+    """Loads near-duplicate cluster ids saved at path, or calls build() and saves them."""
+    meta_path = path + ".json"
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") == fingerprint and meta.get("threshold") == threshold:
+            return np.load(path)
+    clusters = build()
+    np.save(path, clusters)
+    with open(meta_path, "w") as f:
+        json.dump({"fingerprint": fingerprint, "threshold": threshold, "clusters": int(len(np.unique(clusters)))}, f)
+    return clusters
+
+def mmr_select(candidate_embeddings: torch.Tensor, relevance: torch.Tensor, k: int, lambda_: float = 0.7,
+               duplicate_threshold: float = 0.95) -> list:
+    """Maximal marginal relevance: picks k candidates that are relevant but unlike each other.
+
+    candidate_embeddings is (n, d) and relevance (n,) in [0, 1], best first.
+    All pairwise similarities come from one matrix product; candidates at or
+    above duplicate_threshold similarity to an already picked one are never
+    picked. Returns indices into the candidates in pick order.
+    """
+    n = len(candidate_embeddings)
+    if n == 0:
+        return []
+    normalized = torch.nn.functional.normalize(candidate_embeddings.float(), dim=-1)
+    similarity = normalized @ normalized.T
+    relevance = relevance.to(similarity.device, torch.float32)
+
+    selected = []
+    max_similarity = torch.zeros(n, device=similarity.device)  # to anything selected so far
+    available = torch.ones(n, dtype=torch.bool, device=similarity.device)
+    for _ in range(min(k, n)):
+        scores = lambda_ * relevance - (1 - lambda_) * max_similarity
+        scores[~available] = float("-inf")
+        best = int(torch.argmax(scores))
+        if scores[best] == float("-inf"):
+            break
+        selected.append(best)
+        max_similarity = torch.maximum(max_similarity, similarity[best])
+        available &= max_similarity < duplicate_threshold
+        available[best] = False
+    return selected
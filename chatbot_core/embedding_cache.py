@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from chatbot_core.lazy_imports import torch
+
+def embedding_store_dir(db_path: str, model_key: str, unit: str) -> str:
+    """Store of one consumer's embeddings of a KB: <kb>_embeddings/<model>-<unit>.
+
+    encode() compacts a store to the texts of its last call, so consumers that
+    embed different units (the bot's passages, whole completions) or use
+    different models need separate stores, or each run evicts the others' rows.
+    """
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_key)
+    return os.path.join(os.path.splitext(db_path)[0] + "_embeddings", f"{slug}-{unit}")
+
+class EmbeddingCache:
+    """Persistent, content-addressed store of sentence embeddings.
+
+    Every row is keyed by a hash of (model name, text), so the store follows
+    the knowledge base and the retriever model automatically: changed or new
+    rows are re-encoded, unchanged rows are loaded memory-mapped from disk.
+    The store keeps only the texts of the last encode() call; see
+    embedding_store_dir() for giving each consumer its own. A caller that can
+    identify its texts without reading them passes that as source to encode(),
+    and on later starts gets the rows from load_encoded(source) without
+    hashing any text.
+    """
+
+    KEY_DTYPE = 'S20'  # raw sha1 digest
+
+    def __init__(self, cache_dir: str, model, model_name: str):
+        self.cache_dir = cache_dir
+        self.model = model
+        self.model_name = model_name
+        self.keys_path = os.path.join(cache_dir, "keys.npy")
+        self.embeddings_path = os.path.join(cache_dir, "embeddings.npy")
+        self.meta_path = os.path.join(cache_dir, "meta.json")
+        self.fingerprint = None  # hash of the current row keys, set by encode()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _load(self):
+        """Returns (keys, embeddings) from disk, or (None, None) if missing or inconsistent."""
+        if not (os.path.exists(self.keys_path) and os.path.exists(self.embeddings_path)):
+            return None, None
+        try:
+            keys = np.load(self.keys_path)
+            # Copy-on-write mapping: pages are shared with the file and torch can wrap it without a copy
+            embeddings = np.load(self.embeddings_path, mmap_mode='c')
+        except (ValueError, OSError) as e:
+            print(f"Embedding cache unreadable, rebuilding: {e}")
+            return None, None
+        if embeddings.ndim != 2 or len(keys) != embeddings.shape[0]:
+            print("Embedding cache is inconsistent, rebuilding...")
+            return None, None
+        return keys, embeddings
+
+    def load_encoded(self, source: str):
+        """Returns the stored rows if the last encode() call was given this source and model, else None."""
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("source") != source or meta.get("model") != self.model_name:
+            return None
+        keys, embeddings = self._load()
+        if keys is None:
+            return None
+        self.fingerprint = hashlib.sha1(keys.tobytes()).hexdigest()
+        print(f"Loaded {len(keys):,} cached embeddings from {self.cache_dir}")
+        return torch.from_numpy(embeddings)
+
+    def _save_meta(self, source: str):
+        if source is not None:
+            with open(self.meta_path, "w") as f:
+                json.dump({"source": source, "model": self.model_name}, f)
+
+    def encode(self, texts: list, batch_size: int = 32, source: str = None) -> torch.Tensor:
+        """Returns one embedding row per text, encoding only rows missing from the store.
+
+        source identifies texts for load_encoded(); it is recorded with the store.
+        """
+        keys = np.array([self._key(text) for text in texts], dtype=self.KEY_DTYPE)
+        self.fingerprint = hashlib.sha1(keys.tobytes()).hexdigest()
+        old_keys, old_embeddings = self._load()
+
+        if old_keys is not None and old_keys.shape == keys.shape and np.array_equal(old_keys, keys):
+            print(f"Loaded {len(keys):,} cached embeddings from {self.cache_dir}")
+            self._save_meta(source)
+            return torch.from_numpy(old_embeddings)
+
+        # The store is about to change, so whatever source it recorded no longer holds
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+        if old_keys is not None:
+            positions = {key: i for i, key in enumerate(old_keys.tolist())}
+            old_rows = np.fromiter((positions.get(key, -1) for key in keys.tolist()), dtype=np.int64, count=len(keys))
+        else:
+            old_rows = np.full(len(keys), -1, dtype=np.int64)
+
+        missing = np.flatnonzero(old_rows < 0)
+        cached = np.flatnonzero(old_rows >= 0)
+        print(f"Embedding cache: {len(cached):,} rows reused, {len(missing):,} rows to encode")
+
+        new_embeddings = None
+        if len(missing):
+            new_embeddings = self.model.encode(
+                [texts[i] for i in missing],
+                convert_to_numpy=True,
+                show_progress_bar=True,
+                batch_size=batch_size
+            ).astype(np.float32, copy=False)
+            dim = new_embeddings.shape[1]
+        else:
+            dim = old_embeddings.shape[1]
+
+        # Write the compacted store to temp files, then swap it in
+        tmp_embeddings_path = self.embeddings_path + ".tmp.npy"
+        tmp_keys_path = self.keys_path + ".tmp.npy"
+        embeddings = np.lib.format.open_memmap(tmp_embeddings_path, mode='w+', dtype=np.float32, shape=(len(keys), dim))
+        if len(cached):
+            embeddings[cached] = old_embeddings[old_rows[cached]]
+        if new_embeddings is not None:
+            embeddings[missing] = new_embeddings
+        embeddings.flush()
+        del embeddings, old_embeddings
+        np.save(tmp_keys_path, keys)
+
+        os.replace(tmp_embeddings_path, self.embeddings_path)
+        os.replace(tmp_keys_path, self.keys_path)
+        self._save_meta(source)
+
+        return torch.from_numpy(np.load(self.embeddings_path, mmap_mode='c'))
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+def input_key(input_ids) -> str:
+    return hashlib.sha1(np.asarray(input_ids, dtype=np.int64).tobytes()).hexdigest()
+
+class EncoderCache:
+    """LRU cache of generator encoder states, keyed by a hash of the whole input.
+
+    T5's encoder attends in both directions, so the state of every token
+    depends on the entire input and a shared prefix (instruction, history)
+    has no reusable states of its own. An input is only skipped when the
+    exact same ids were encoded before: a repeated follow-up, a retry or
+    regeneration, the same input under another decoding profile, or a
+    streamed and a non-streamed request for one question. Entries hold
+    (seq_len, d_model) tensors without padding and are evicted least
+    recently used first once their total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> hidden states, oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, input_ids):
+        key = input_key(input_ids)
+        with self._lock:
+            states = self._entries.get(key)
+            if states is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return states
+
+    def put(self, input_ids, states):
+        size = states.element_size() * states.nelement()
+        if size > self.max_bytes:
+            return
+        key = input_key(input_ids)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.element_size() * previous.nelement()
+            self._entries[key] = states
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.element_size() * evicted.nelement()
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,32 @@
+class RequestFeatures:
+    """Features of one prompt, each computed at most once per request.
+
+    Every pipeline stage (emergency check, intent, response cache, retrieval)
+    reads from the same instance, so the keyword scan and the PubMedBERT query
+    embedding are produced lazily on first use and then shared.
+
+    get_retriever_model is called only when the embedding is first needed:
+    with background loading the retriever may still be missing when the
+    request starts, and the stages that embed check readiness first.
+    """
+
+    def __init__(self, prompt: str, keyword_matcher, get_retriever_model, device: str):
+        self.prompt = prompt
+        self._keyword_matcher = keyword_matcher
+        self._get_retriever_model = get_retriever_model
+        self._device = device
+        self._keyword_matches = None
+        self._query_embedding = None
+
+    @property
+    def keyword_matches(self) -> list:
+        if self._keyword_matches is None:
+            self._keyword_matches = self._keyword_matcher.find_all(self.prompt)
+        return self._keyword_matches
+
+    @property
+    def query_embedding(self):
+        if self._query_embedding is None:
+            retriever_model = self._get_retriever_model()
+            self._query_embedding = retriever_model.encode(self.prompt, convert_to_tensor=True, device=self._device)
+        return self._query_embedding
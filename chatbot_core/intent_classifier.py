@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+
+# torch, sklearn and joblib are imported where they are used, so importing this module stays cheap
+if TYPE_CHECKING:
+    import torch
+    from sklearn.pipeline import Pipeline
+
+# Alternative intent heads saved next to the BioBERT classifier
+FAST_INTENT_FILE = "fast_intent.joblib"
+EMBEDDING_INTENT_FILE = "embedding_intent.joblib"
+
+# Written next to the classifier weights by train_intent_classifier.py / calibrate_intent_classifier.py
+TEMPERATURE_FILE = "temperature.json"
+
+def fit_temperature(logits: torch.Tensor, labels: torch.Tensor, max_iter: int = 100) -> float:
+    """Fits the single temperature T minimising held-out NLL of softmax(logits / T).
+
+    Dividing by T never changes the argmax, so accuracy is untouched; only the
+    probabilities are rescaled to match how often the classifier is right.
+    """
+    import torch
+    logits, labels = logits.detach().float(), labels.detach().long()
+    log_temperature = torch.zeros(1, requires_grad=True)  # optimise log T so that T stays positive
+    optimizer = torch.optim.LBFGS([log_temperature], lr=0.1, max_iter=max_iter)
+
+    def closure():
+        optimizer.zero_grad()
+        loss = torch.nn.functional.cross_entropy(logits / log_temperature.exp(), labels)
+        loss.backward()
+        return loss
+
+    optimizer.step(closure)
+    return float(log_temperature.detach().exp())
+
+def calibration_report(logits: torch.Tensor, labels: torch.Tensor, temperature: float = 1.0, n_bins: int = 15) -> dict:
+    """NLL and expected calibration error (ECE) of softmax(logits / temperature)"""
+    import torch
+    logits, labels = logits.detach().float(), labels.detach().long()
+    probabilities = torch.softmax(logits / temperature, dim=-1)
+    confidences, predictions = probabilities.max(dim=-1)
+    correct = (predictions == labels).float()
+
+    ece = 0.0
+    bin_edges = torch.linspace(0, 1, n_bins + 1)
+    for low, high in zip(bin_edges[:-1], bin_edges[1:]):
+        in_bin = (confidences > low) & (confidences <= high)
+        if in_bin.any():
+            ece += in_bin.float().mean().item() * abs(confidences[in_bin].mean().item() - correct[in_bin].mean().item())
+
+    return {
+        "nll": torch.nn.functional.cross_entropy(logits / temperature, labels).item(),
+        "ece": ece,
+        "accuracy": correct.mean().item()
+    }
+
+def save_temperature(model_path: str, temperature: float, report: dict = None):
+    with open(os.path.join(model_path, TEMPERATURE_FILE), "w") as f:
+        json.dump({"temperature": temperature, **(report or {})}, f, indent=2)
+
+def load_temperature(model_path: str) -> float:
+    """Fitted temperature for the classifier in model_path, or 1.0 (raw softmax) if it was never calibrated"""
+    path = os.path.join(model_path, TEMPERATURE_FILE)
+    if not os.path.exists(path):
+        return 1.0
+    with open(path) as f:
+        return float(json.load(f)["temperature"])
+
+class IntentClassifier:
+    """Transformer intent classifier with batched, length-bucketed inference.
+
+    Prompts are tokenized without padding, sorted by length and run in
+    batches padded only to the longest prompt of each batch, so short
+    prompts never pay for max_length. Probabilities are temperature-scaled
+    (see fit_temperature), so a confidence of 0.8 means right about 80% of
+    the time on the held-out split. With length_buckets set (compiled
+    models), batches are padded up to the next bucket instead, so the model
+    only ever sees those sequence lengths.
+    """
+
+    def __init__(self, tokenizer, model, device: str, max_length: int = 128, batch_size: int = 32,
+                 temperature: float = 1.0, length_buckets: tuple = None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.temperature = temperature
+        self.length_buckets = length_buckets
+
+    def logits_batch(self, prompts: list) -> torch.Tensor:
+        """Returns an (N, num_labels) tensor of logits, in the order of prompts."""
+        import torch
+        encoded = self.tokenizer(prompts, truncation=True, max_length=self.max_length)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        order = sorted(range(len(prompts)), key=lengths.__getitem__)
+
+        logits = [None] * len(prompts)
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start:start + self.batch_size]
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in bucket]
+            if self.length_buckets:
+                longest = max(lengths[i] for i in bucket)
+                padded_length = next((length for length in self.length_buckets if length >= longest), longest)
+                inputs = self.tokenizer.pad(features, padding="max_length", max_length=padded_length, return_tensors="pt")
+            else:
+                inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+            inputs = inputs.to(self.device)
+            with torch.no_grad():
+                batch_logits = self.model(**inputs).logits.float().cpu()
+            for i, row in zip(bucket, batch_logits):
+                logits[i] = row
+        return torch.stack(logits) if logits else torch.empty(0)
+
+    def classify_batch(self, prompts: list) -> list:
+        """Returns one (label, calibrated probability) pair per prompt."""
+        import torch
+        if not prompts:
+            return []
+        probabilities = torch.softmax(self.logits_batch(prompts) / self.temperature, dim=-1)
+        confidences, class_ids = probabilities.max(dim=-1)
+        id2label = self.model.config.id2label
+        return [(id2label[int(class_id)], float(confidence)) for class_id, confidence in zip(class_ids, confidences)]
+
+class FastIntentClassifier:
+    """Cheap first-stage intent classifier: TF-IDF features and a linear model.
+
+    Settles the easy, high-confidence prompts so they never reach the
+    transformer; anything below the caller's threshold falls through.
+    """
+
+    def __init__(self, pipeline: Pipeline = None):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        self.pipeline = pipeline or Pipeline([
+            ("tfidf", TfidfVectorizer(lowercase=True, ngram_range=(1, 2), sublinear_tf=True)),
+            ("classifier", LogisticRegression(max_iter=2000, C=10.0))
+        ])
+
+    def train(self, texts: list, labels: list):
+        self.pipeline.fit(texts, labels)
+        return self
+
+    def classify_batch(self, prompts: list) -> list:
+        """Returns one (label, probability) pair per prompt."""
+        probabilities = self.pipeline.predict_proba(prompts)
+        best = np.argmax(probabilities, axis=1)
+        classes = self.pipeline.classes_
+        return [(classes[i], float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    def classify(self, prompt: str) -> tuple:
+        return self.classify_batch([prompt])[0]
+
+    def save(self, path: str):
+        import joblib
+        joblib.dump(self.pipeline, path)
+
+    @classmethod
+    def load(cls, path: str):
+        import joblib
+        return cls(joblib.load(path))
+
+class EmbeddingIntentHead:
+    """Linear intent head on the retriever's (PubMedBERT) query embedding.
+
+    An alternative to the separate BioBERT classifier: medical questions need
+    the query embedding for retrieval anyway, so classifying from it saves a
+    whole transformer forward pass per request.
+    """
+
+    def __init__(self, pipeline: Pipeline = None):
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+        self.pipeline = pipeline or Pipeline([
+            ("scale", StandardScaler()),
+            ("classifier", LogisticRegression(max_iter=2000, C=1.0))
+        ])
+
+    @staticmethod
+    def _as_matrix(embeddings) -> np.ndarray:
+        if hasattr(embeddings, "detach"):  # torch tensor
+            embeddings = embeddings.detach().float().cpu().numpy()
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        return matrix.reshape(-1, matrix.shape[-1])
+
+    def train(self, embeddings, labels: list):
+        self.pipeline.fit(self._as_matrix(embeddings), labels)
+        return self
+
+    def classify_batch(self, embeddings) -> list:
+        """Returns one (label, probability) pair per embedding row."""
+        probabilities = self.pipeline.predict_proba(self._as_matrix(embeddings))
+        best = np.argmax(probabilities, axis=1)
+        classes = self.pipeline.classes_
+        return [(classes[i], float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    def classify(self, embedding) -> tuple:
+        return self.classify_batch(embedding)[0]
+
+    def save(self, path: str):
+        import joblib
+        joblib.dump(self.pipeline, path)
+
+    @classmethod
+    def load(cls, path: str):
+        import joblib
+        return cls(joblib.load(path))
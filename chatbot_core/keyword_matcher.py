@@ -0,0 +1,86 @@
+from collections import deque, namedtuple
+
+# Endings a keyword may carry and still count as a whole word: "chest pains", "headaches", "fevers"
+INFLECTION_SUFFIXES = ("s", "es", "ed", "ing")
+
+# One whole-word occurrence of a keyword: text[start:end] == pattern (case-insensitive);
+# an inflection suffix after it ("seizures", "strokes") is not part of [start, end)
+KeywordMatch = namedtuple("KeywordMatch", ["pattern", "group", "start", "end"])
+
+class KeywordMatcher:
+    """Aho–Corasick automaton over named groups of keywords.
+
+    Built once; find_all makes a single pass over the text whatever the number
+    of keywords. A match must start at a word boundary ("cold" does not match
+    inside "scolded") and end at one, optionally after an inflection suffix,
+    so "seizures" and "chest pains" still match "seizure" and "chest pain".
+    """
+
+    def __init__(self, groups: dict):
+        self.patterns = []  # pattern index -> (pattern, group)
+        self._goto = [{}]   # state -> {char: next state}
+        self._fail = [0]
+        self._output = [[]]  # state -> pattern indices ending here, including via failure links
+
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                self._add(self._normalize(keyword), group)
+        self._build_failure_links()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # Lowered per character and kept as is where lowering would change the length
+        # (e.g. "İ"), so the output has the input's length and match offsets index the original text
+        return "".join(lower if len(lower := char.lower()) == 1 else char for char in text).replace("’", "'")
+
+    def _add(self, pattern: str, group: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self.patterns))
+        self.patterns.append((pattern, group))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    @staticmethod
+    def _ends_word(text: str, end: int) -> bool:
+        if end == len(text) or not text[end].isalnum():
+            return True
+        for suffix in INFLECTION_SUFFIXES:
+            suffix_end = end + len(suffix)
+            if text.startswith(suffix, end) and (suffix_end == len(text) or not text[suffix_end].isalnum()):
+                return True
+        return False
+
+    def find_all(self, text: str) -> list:
+        """Returns every whole-word keyword occurrence in text, in order of their end position."""
+        text = self._normalize(text)
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern_index in self._output[state]:
+                pattern, group = self.patterns[pattern_index]
+                start, end = i + 1 - len(pattern), i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and self._ends_word(text, end):
+                    matches.append(KeywordMatch(pattern, group, start, end))
+        return matches
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import numpy as np
+from chatbot_core.lazy_imports import pandas as pd, pyarrow as pa, pyarrow_ipc
+
+# Bumped whenever the columns or their meaning change; artifacts of another version are rebuilt
+KB_SCHEMA_VERSION = 1
+KB_ARTIFACT_SUFFIX = ".kb.arrow"
+
+# Columns the create_*_knowledge_base.py scripts use for a row's origin
+SOURCE_COLUMNS = ("source", "source_dataset")
+
+def kb_schema() -> pa.Schema:
+    return pa.schema([
+        ("row_id", pa.int64()), ("prompt", pa.large_string()), ("completion", pa.large_string()),
+        ("source", pa.large_string())
+    ])
+
+def kb_artifact_path(db_path: str) -> str:
+    """The compiled artifact of a KB CSV, saved next to it."""
+    return os.path.splitext(db_path)[0] + KB_ARTIFACT_SUFFIX
+
+def csv_fingerprint(csv_path: str) -> str:
+    """Size and modification time of the CSV: detects a rebuilt KB without reading the file."""
+    stat = os.stat(csv_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def knowledge_base_table(df: pd.DataFrame, default_source: str, first_row_id: int = 0) -> pa.Table:
+    """The KB table of a prompt/completion frame, as a builder script holds it or read_csv() returns it.
+
+    row_id is the row's position in the frame, so in the CSV written from it,
+    counted before rows with a missing or empty question or answer are
+    dropped; ids do not shift when a row is cleaned out. source comes from a
+    source column when the frame has one, else default_source.
+    """
+    source_column = next((column for column in SOURCE_COLUMNS if column in df.columns), None)
+    frame = pd.DataFrame({
+        "row_id": np.arange(first_row_id, first_row_id + len(df), dtype=np.int64),
+        "prompt": df["prompt"].to_numpy(),
+        "completion": df["completion"].to_numpy(),
+        "source": df[source_column].fillna(default_source).astype(str).to_numpy() if source_column else default_source,
+    })
+    # Empty strings become NaN when a CSV is read back, so they are dropped here as well
+    for column in ("prompt", "completion"):
+        frame[column] = frame[column].where(frame[column] != "")
+    frame = frame.dropna(subset=["prompt", "completion"])
+    frame["prompt"] = frame["prompt"].astype(str)
+    frame["completion"] = frame["completion"].astype(str)
+    return pa.Table.from_pandas(frame, schema=kb_schema(), preserve_index=False)
+
+def read_csv_table(csv_path: str, first_row_id: int = 0) -> pa.Table:
+    """Parses a KB CSV; rows without their own source are labelled with the file name."""
+    source = os.path.splitext(os.path.basename(csv_path))[0]
+    return knowledge_base_table(pd.read_csv(csv_path), source, first_row_id)
+
+def save_knowledge_base(table: pa.Table, path: str, source_fingerprint: str = None):
+    """Writes the table as one uncompressed Arrow IPC record batch, which open() memory-maps without copying."""
+    metadata = {"schema_version": KB_SCHEMA_VERSION, "rows": table.num_rows, "source_fingerprint": source_fingerprint}
+    table = table.cast(kb_schema()).combine_chunks().replace_schema_metadata(
+        {key: json.dumps(value) for key, value in metadata.items()}
+    )
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pyarrow_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+
+class KnowledgeBase:
+    """Question/answer rows of the knowledge base, backed by a memory-mapped Arrow table.
+
+    Text stays in the mapped file: opening the KB reads only the file footer,
+    workers share the pages, and looking up a retrieved row decodes that one
+    string. Rows are addressed by position (the corpus ids of every index);
+    row_id is the stable id of the row in its source CSV.
+    """
+
+    def __init__(self, table: pa.Table, path: str = None):
+        self.table = table
+        self.path = path
+        self.metadata = {key.decode(): json.loads(value) for key, value in (table.schema.metadata or {}).items()}
+        # One chunk per column is written, so lookups index that array in place
+        self._columns = {
+            name: column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+            for name, column in zip(table.column_names, table.columns)
+        }
+
+    @classmethod
+    def open(cls, path: str) -> KnowledgeBase:
+        with pa.memory_map(path, "r") as source:
+            table = pyarrow_ipc.open_file(source).read_all()
+        return cls(table, path)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def schema_version(self):
+        return self.metadata.get("schema_version")
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the KB content without reading it, to key the indexes and stores derived from it.
+
+        That is the fingerprint of the CSV the artifact was compiled from, or for an
+        artifact combining several CSVs the artifact file's own size and modification
+        time; only a KB built in memory has its text hashed.
+        """
+        source = self.metadata.get("source_fingerprint")
+        if source is None and self.path is not None:
+            source = "artifact:" + csv_fingerprint(self.path)
+        if source is None:
+            digest = hashlib.sha1()
+            for document in self.documents():
+                digest.update(document.encode("utf-8"))
+                digest.update(b"\0")
+            source = "content:" + digest.hexdigest()
+        return f"{source}:{len(self)}:{self.schema_version}"
+
+    def prompt(self, row: int) -> str:
+        return self._columns["prompt"][row].as_py()
+
+    def completion(self, row: int) -> str:
+        return self._columns["completion"][row].as_py()
+
+    def source(self, row: int) -> str:
+        return self._columns["source"][row].as_py()
+
+    def row_id(self, row: int) -> int:
+        return self._columns["row_id"][row].as_py()
+
+    def prompts(self) -> list:
+        return self._columns["prompt"].to_pylist()
+
+    def completions(self) -> list:
+        return self._columns["completion"].to_pylist()
+
+    def documents(self) -> list:
+        """Question and answer of every row joined by a newline, as BM25 indexes them."""
+        return [prompt + "\n" + completion for prompt, completion in zip(self.prompts(), self.completions())]
+
+    def sample_rows(self, n: int, seed: int = 42) -> list:
+        return np.random.default_rng(seed).choice(len(self), size=min(n, len(self)), replace=False).tolist()
+
+def load_or_build_knowledge_base(db_path: str) -> KnowledgeBase:
+    """Opens the compiled KB, converting the CSV at db_path first if its artifact is missing or stale.
+
+    db_path may also name an artifact (*.kb.arrow) directly, e.g. one written
+    by convert_knowledge_base.py from several CSVs; it is opened as is.
+    """
+    if db_path.endswith(KB_ARTIFACT_SUFFIX):
+        kb = KnowledgeBase.open(db_path)
+        if kb.schema_version != KB_SCHEMA_VERSION:
+            raise ValueError(f"{db_path} has KB schema version {kb.schema_version}, expected {KB_SCHEMA_VERSION}; "
+                             "convert the CSVs again with convert_knowledge_base.py")
+        return kb
+
+    path = kb_artifact_path(db_path)
+    if os.path.exists(path):
+        try:
+            kb = KnowledgeBase.open(path)
+        except (OSError, ValueError) as e:
+            print(f"Compiled knowledge base unreadable, rebuilding: {e}")
+        else:
+            # Without the CSV (e.g. a deployment shipping only the artifact) the artifact is used as is
+            if kb.schema_version == KB_SCHEMA_VERSION and (
+                not os.path.exists(db_path) or kb.metadata.get("source_fingerprint") == csv_fingerprint(db_path)
+            ):
+                print(f"Loaded compiled knowledge base ({len(kb):,} rows) from {path}")
+                return kb
+            print("Compiled knowledge base is stale, rebuilding...")
+    print(f"Compiling knowledge base {db_path}...")
+    save_knowledge_base(read_csv_table(db_path), path, csv_fingerprint(db_path))
+    return KnowledgeBase.open(path)
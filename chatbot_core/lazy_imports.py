@@ -0,0 +1,38 @@
+import importlib
+import threading
+
+class LazyModule:
+    """Stands in for a heavy module (torch, transformers, ...) and imports it on first attribute access.
+
+    Importing chatbot_core modules for tooling stays cheap: torch and friends
+    are only loaded once a model is actually used. profile_startup.py shows
+    what each of them costs.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}{' (loaded)' if self._module is not None else ''}>"
+
+torch = LazyModule("torch")
+pandas = LazyModule("pandas")
+transformers = LazyModule("transformers")
+modeling_outputs = LazyModule("transformers.modeling_outputs")
+sentence_transformers = LazyModule("sentence_transformers")
+sentence_transformers_util = LazyModule("sentence_transformers.util")
+faiss = LazyModule("faiss")
+pyarrow = LazyModule("pyarrow")
+pyarrow_ipc = LazyModule("pyarrow.ipc")
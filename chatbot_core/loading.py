@@ -0,0 +1,65 @@
+import threading
+import time
+
+class ModelsNotReady(Exception):
+    """Raised for a request that needs models which are still loading; carries LoadProgress.snapshot()."""
+
+    def __init__(self, progress: dict):
+        super().__init__("The models needed for this request are still loading")
+        self.progress = progress
+
+class LoadProgress:
+    """Status and timing of each model loading stage.
+
+    Stages run on background threads through run(); request handlers call
+    require() for the stages they depend on and get ModelsNotReady, with a
+    snapshot to report to the client, while any of them is unfinished.
+    """
+
+    def __init__(self, stages: list):
+        self.started_at = time.time()
+        self._stages = {stage: {"status": "pending", "seconds": None} for stage in stages}
+        self.failures = {}  # stage -> exception
+        self._lock = threading.Lock()
+
+    def run(self, stage: str, load) -> bool:
+        """Runs load() as stage; returns whether it succeeded."""
+        with self._lock:
+            self._stages[stage]["status"] = "loading"
+        start = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            with self._lock:
+                self._stages[stage].update(status="failed", seconds=round(time.perf_counter() - start, 2))
+                self.failures[stage] = e
+            print(f"Loading {stage} failed: {e}")
+            return False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stages[stage].update(status="ready", seconds=round(elapsed, 2))
+        print(f"Loaded {stage} in {elapsed:.1f}s")
+        return True
+
+    def is_ready(self, *stages) -> bool:
+        with self._lock:
+            return all(self._stages[stage]["status"] == "ready" for stage in (stages or self._stages))
+
+    def require(self, *stages):
+        if not self.is_ready(*stages):
+            raise ModelsNotReady(self.snapshot())
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.failures)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {stage: dict(info) for stage, info in self._stages.items()}
+            errors = {stage: str(e) for stage, e in self.failures.items()}
+        return {
+            "ready": all(info["status"] == "ready" for info in stages.values()),
+            "elapsed_seconds": round(time.time() - self.started_at, 1),
+            "stages": stages,
+            "errors": errors,
+        }
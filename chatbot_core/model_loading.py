@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+from chatbot_core.lazy_imports import sentence_transformers, torch, transformers
+from chatbot_core.shared_weights import load_shared_model, model_fingerprint, share_module_weights
+
+# fp32: eager PyTorch as trained
+# int8: dynamic int8 quantization of every nn.Linear (CPU only)
+# onnx: exported ONNX Runtime graphs via optimum (optional dependency)
+# compiled: fp32 weights run as torch.compile graphs over padded length buckets, warmed up at startup
+INFERENCE_MODES = ("fp32", "int8", "onnx", "compiled")
+
+# Inputs are padded up to the next bucket in compiled mode, so only these shapes are ever compiled
+INTENT_LENGTH_BUCKETS = (16, 32, 64, 128)
+GENERATOR_LENGTH_BUCKETS = (64, 128, 256)  # plus the generator's max_input_tokens
+
+def check_inference_mode(inference_mode: str, device: str, shared_weights_dir: str = None):
+    if inference_mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode '{inference_mode}', expected one of {INFERENCE_MODES}")
+    if inference_mode in ("int8", "onnx") and device != "cpu":
+        raise ValueError(f"Inference mode '{inference_mode}' is only supported on CPU")
+    if inference_mode in ("int8", "onnx") and shared_weights_dir:
+        raise ValueError("Shared memory-mapped weights are only supported with inference_mode='fp32' or 'compiled'")
+
+def bucket_length(length: int, buckets: tuple) -> int:
+    """Smallest bucket that fits length; lengths beyond the last bucket are kept as they are."""
+    return next((bucket for bucket in buckets if bucket >= length), length)
+
+def compile_module(module: torch.nn.Module, recompile_limit: int = 64) -> torch.nn.Module:
+    """Compiles module.forward for static shapes; each new input shape compiles once, up to recompile_limit."""
+    import torch._dynamo
+    # Renamed from cache_size_limit in newer PyTorch releases
+    limit_name = "recompile_limit" if hasattr(torch._dynamo.config, "recompile_limit") else "cache_size_limit"
+    setattr(torch._dynamo.config, limit_name, max(getattr(torch._dynamo.config, limit_name), recompile_limit))
+    module.forward = torch.compile(module.forward, dynamic=False)
+    return module
+
+def quantize_int8(module: torch.nn.Module) -> torch.nn.Module:
+    """Dynamic int8 quantization: Linear weights stored as int8, activations quantized per batch."""
+    return torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def _load_onnx(model_class, model_path: str):
+    """Loads an ONNX Runtime export of model_path, exporting it next to the model on first use."""
+    onnx_dir = model_path.rstrip("/\\") + "_onnx"
+    if os.path.isdir(onnx_dir):
+        return model_class.from_pretrained(onnx_dir)
+    print(f"Exporting {model_path} to ONNX (first run only)...")
+    model = model_class.from_pretrained(model_path, export=True)
+    model.save_pretrained(onnx_dir)
+    return model
+
+def load_intent_model(model_path: str, device: str, inference_mode: str = "fp32", shared_weights_dir: str = None):
+    if inference_mode == "onnx":
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        return _load_onnx(ORTModelForSequenceClassification, model_path)
+    if shared_weights_dir:
+        model = load_shared_model(transformers.AutoModelForSequenceClassification, model_path, shared_weights_dir, "intent_classifier")
+    else:
+        model = transformers.AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
+    model = model.to(device).eval()
+    if inference_mode == "compiled":
+        return compile_module(model)
+    return quantize_int8(model) if inference_mode == "int8" else model
+
+def load_generator(model_path: str, device: str, inference_mode: str = "fp32", shared_weights_dir: str = None,
+                   name: str = "generator"):
+    if inference_mode == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        return _load_onnx(ORTModelForSeq2SeqLM, model_path)
+    if shared_weights_dir:
+        model = load_shared_model(transformers.AutoModelForSeq2SeqLM, model_path, shared_weights_dir, name)
+    else:
+        model = transformers.AutoModelForSeq2SeqLM.from_pretrained(model_path, local_files_only=True)
+    model = model.to(device).eval()
+    if inference_mode == "compiled":
+        # generate() runs the encoder once per input and the model's forward once per decoder step;
+        # decoder steps keep a static shape with cache_implementation="static" (see MedicalChatbot)
+        compile_module(model.get_encoder())
+        return compile_module(model)
+    return quantize_int8(model) if inference_mode == "int8" else model
+
+def check_draft_model(draft_tokenizer, tokenizer, inference_mode: str):
+    """A draft model for assisted decoding must propose ids from the generator's own vocabulary."""
+    if inference_mode in ("onnx", "compiled"):
+        raise ValueError(f"Assisted decoding with a draft model is not supported with inference_mode='{inference_mode}'")
+    if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+        raise ValueError("The draft model's tokenizer does not match the generator's vocabulary")
+
+def load_retriever(model_name: str, device: str, inference_mode: str = "fp32", shared_weights_dir: str = None):
+    if inference_mode == "onnx":
+        # Needs sentence-transformers>=3.2 with optimum installed
+        return sentence_transformers.SentenceTransformer(model_name, device=device, backend="onnx")
+    model = sentence_transformers.SentenceTransformer(model_name, device=device)
+    if shared_weights_dir:
+        share_module_weights(model, shared_weights_dir, "retriever-" + model_fingerprint(model_name))
+        model.to(device)
+    return quantize_int8(model) if inference_mode == "int8" else model
+
+def embedding_model_key(model_name: str, inference_mode: str) -> str:
+    """Name under which a retriever's embeddings are cached; reduced precision modes embed differently."""
+    # The retriever stays eager fp32 in compiled mode
+    return model_name if inference_mode in ("fp32", "compiled") else f"{model_name}#{inference_mode}"
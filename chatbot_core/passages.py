@@ -0,0 +1,149 @@
+import json
+import os
+import numpy as np
+# One sentence splitter for passages, the context packer and the token store, so sentence indices agree
+from chatbot_core.context_packer import SENTENCE_BOUNDARY
+
+def split_passages(text: str, max_words: int = 180, overlap_words: int = 40) -> list:
+    """Splits text into passages of at most max_words words along sentence boundaries.
+
+    Consecutive passages share up to overlap_words words of trailing sentences,
+    so a fact spanning a boundary is still whole in one of them. Texts that
+    already fit are returned as a single passage, unchanged.
+    """
+    return [passage for passage, _ in passage_spans(text, max_words, overlap_words)]
+
+def passage_spans(text: str, max_words: int = 180, overlap_words: int = 40) -> list:
+    """split_passages() with the index of the sentence each passage starts in.
+
+    Sentences are the non-blank parts of SENTENCE_BOUNDARY.split(text), as the
+    token store and the context packer count them.
+    """
+    words = text.split()
+    if len(words) <= max_words:
+        return [(text, 0)]
+
+    # Sentences longer than a passage are cut into word windows first, each remembering its sentence
+    windows = []
+    for sentence_index, sentence in enumerate(s for s in SENTENCE_BOUNDARY.split(text) if s.strip()):
+        sentence_words = sentence.split()
+        for start in range(0, len(sentence_words), max_words):
+            windows.append((sentence_words[start:start + max_words], sentence_index))
+
+    passages = []
+    current = []
+    current_words = 0
+    for window in windows:
+        if current and current_words + len(window[0]) > max_words:
+            passages.append((" ".join(word for w, _ in current for word in w), current[0][1]))
+            carry = []
+            carry_words = 0
+            for previous in reversed(current):
+                if carry_words + len(previous[0]) > overlap_words:
+                    break
+                carry.insert(0, previous)
+                carry_words += len(previous[0])
+            current, current_words = carry, carry_words
+        current.append(window)
+        current_words += len(window[0])
+    if current:
+        passages.append((" ".join(word for w, _ in current for word in w), current[0][1]))
+    return passages
+
+class KBPassages:
+    """Retrieval units of the knowledge base and their mapping back to KB rows.
+
+    Each row contributes its question (optional) followed by its answer split
+    into overlapping passages. passage_rows[p] is the KB row of passage p and
+    the passages of row r are row_offsets[r]:row_offsets[r + 1];
+    representatives[r] is the first answer passage of row r. first_sentences[p]
+    is the sentence of the row's answer that passage p starts in (0 for the
+    question), so the context packer can start an answer at its matched passage.
+    The passage texts are only needed to embed them, so build() hands them to
+    the caller instead of keeping them for the life of the process.
+    """
+
+    ARRAYS = ("passage_rows", "row_offsets", "representatives", "first_sentences")  # saved by save()
+
+    def __init__(self, passage_rows: np.ndarray, row_offsets: np.ndarray, representatives: np.ndarray,
+                 first_sentences: np.ndarray):
+        self.passage_rows = passage_rows
+        self.row_offsets = row_offsets
+        self.representatives = representatives
+        self.first_sentences = first_sentences
+
+    @classmethod
+    def build(cls, completions: list, questions: list = None, max_words: int = 180, overlap_words: int = 40) -> tuple:
+        """Returns the passages of the KB and their texts, in passage order."""
+        texts = []
+        first_sentences = []
+        counts = np.zeros(len(completions), dtype=np.int64)
+        for row, completion in enumerate(completions):
+            spans = passage_spans(completion, max_words, overlap_words)
+            if questions is not None:
+                spans.insert(0, (questions[row], 0))
+            texts.extend(text for text, _ in spans)
+            first_sentences.extend(sentence for _, sentence in spans)
+            counts[row] = len(spans)
+
+        row_offsets = np.zeros(len(completions) + 1, dtype=np.int64)
+        np.cumsum(counts, out=row_offsets[1:])
+        passage_rows = np.repeat(np.arange(len(completions), dtype=np.int32), counts)
+        representatives = row_offsets[:-1] + (1 if questions is not None else 0)
+        passages = cls(passage_rows, row_offsets, representatives, np.array(first_sentences, dtype=np.int32))
+        return passages, texts
+
+    def __len__(self) -> int:
+        return len(self.passage_rows)
+
+    def save(self, path: str, fingerprint: str):
+        """Writes the passage arrays to the directory path."""
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"fingerprint": fingerprint, "passages": len(self)}, f)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str):
+        """Memory-maps passages saved with the same fingerprint, or returns None."""
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            if json.load(f).get("fingerprint") != fingerprint:
+                print("Saved KB passages are stale, rebuilding...")
+                return None
+        try:
+            arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in cls.ARRAYS]
+        except (ValueError, OSError) as e:
+            print(f"Saved KB passages unreadable, rebuilding: {e}")
+            return None
+        return cls(*arrays)
+
+    def collapse(self, hits: list) -> list:
+        """Turns best-first passage hits into best-first row hits.
+
+        Each row keeps the score of its best passage, whose id is kept as 'passage_id'.
+        """
+        rows = {}
+        for hit in hits:
+            row = int(self.passage_rows[hit['corpus_id']])
+            if row not in rows:
+                rows[row] = {'corpus_id': row, 'score': hit['score'], 'passage_id': hit['corpus_id']}
+        return list(rows.values())
+
+def load_or_build_passages(path: str, fingerprint: str, build) -> tuple:
+    """Loads the passages saved at path, or calls build() and saves its passages.
+
+    build() returns (passages, texts) like KBPassages.build(); fingerprint must
+    identify the KB and the split parameters. Returns (passages, texts), with
+    texts None when the passages were loaded.
+    """
+    passages = KBPassages.load(path, fingerprint)
+    if passages is not None:
+        print(f"Loaded {len(passages):,} KB passages from {path}")
+        return passages, None
+    passages, texts = build()
+    passages.save(path, fingerprint)
+    return passages, texts
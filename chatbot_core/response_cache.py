@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class ResponseCache:
+    """LRU/TTL cache of generated answers for near-duplicate questions.
+
+    Lookups try the normalized question text first, then cosine similarity of
+    the query embedding against every cached question in one matrix-vector
+    product. Only answers generated without conversation history belong here;
+    the caller is responsible for not storing history-dependent answers.
+
+    Every entry belongs to a variant, the generation settings its answer was
+    produced with (see decoding.decoding_key); lookups only return answers of
+    the requested variant.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, similarity_threshold: float = 0.96):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (variant, normalized text) -> (slot, response, expires_at), oldest first
+        self._slot_keys = [None] * max_entries
+        self._variant_ids = {}  # variant -> small int stored per slot
+        self._slot_variants = np.full(max_entries, -1, dtype=np.int32)
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._matrix = None            # (max_entries, dim) normalized query embeddings, allocated on first put
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = re.sub(r'[^\w\s]', ' ', text.lower())
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        if hasattr(embedding, "detach"):
+            embedding = embedding.detach().cpu().numpy()
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _remove(self, key: tuple):
+        slot, _, _ = self._entries.pop(key)
+        self._valid[slot] = False
+        self._slot_keys[slot] = None
+        self._free_slots.append(slot)
+
+    def _live(self, key: tuple):
+        """Returns the entry for key if present and not expired, refreshing its LRU position."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_exact(self, query: str, variant: str = ""):
+        """Returns the cached answer for the same normalized question and variant, or None."""
+        with self._lock:
+            entry = self._live((variant, self.normalize(query)))
+            if entry is not None:
+                self.exact_hits += 1
+                return entry[1]
+            return None
+
+    def get_similar(self, embedding, variant: str = ""):
+        """Returns the answer of the most similar cached question of variant above the threshold, or None.
+
+        Call after get_exact missed; a miss here is counted as a cache miss.
+        """
+        with self._lock:
+            candidates = self._valid & (self._slot_variants == self._variant_ids.get(variant, -1))
+            if self._matrix is not None and candidates.any():
+                scores = self._matrix @ self._unit(embedding)
+                scores[~candidates] = -np.inf
+                slot = int(np.argmax(scores))
+                if scores[slot] >= self.similarity_threshold:
+                    entry = self._live(self._slot_keys[slot])
+                    if entry is not None:
+                        self.semantic_hits += 1
+                        return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, embedding, response: str, variant: str = ""):
+        key = (variant, self.normalize(query))
+        vector = self._unit(embedding)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if not self._free_slots:
+                self._remove(next(iter(self._entries)))  # least recently used
+                self.evictions += 1
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            slot = self._free_slots.pop()
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._slot_keys[slot] = key
+            self._slot_variants[slot] = self._variant_ids.setdefault(variant, len(self._variant_ids))
+            self._entries[key] = (slot, response, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self):
+        """Drops every entry, e.g. after the knowledge base has been rebuilt."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -1,7 +1,7 @@
 import torch
-import pandas as pd
 from sentence_transformers import SentenceTransformer, util
-import os
+from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+from chatbot_core.knowledge_base import load_or_build_knowledge_base
 
 class Retriever:
     def __init__(self, knowledge_base_path: str, model_name: str = 'dmis-lab/biobert-base-cased-v1.1'):
@@ -10,18 +10,13 @@ class Retriever:
         
         # Load and process the knowledge base
         print("Loading knowledge base...")
-        df = pd.read_csv(knowledge_base_path).dropna(subset=['prompt', 'completion'])
-        self.knowledge_base = df['completion'].tolist() # We search the answers/completions
+        self.knowledge_base = load_or_build_knowledge_base(knowledge_base_path).completions() # We search the answers/completions
         
-        # Pre-compute embeddings for the knowledge base for fast search
-        embeddings_path = 'kb_embeddings.pt'
-        if os.path.exists(embeddings_path):
-            print("Loading existing knowledge base embeddings...")
-            self.kb_embeddings = torch.load(embeddings_path, map_location=self.device)
-        else:
-            print("Computing knowledge base embeddings (this may take a while)...")
-            self.kb_embeddings = self.model.encode(self.knowledge_base, convert_to_tensor=True, device=self.device)
-            torch.save(self.kb_embeddings, embeddings_path)
+        # Pre-compute embeddings for the knowledge base for fast search.
+        # The cache is keyed by (model, text) so it follows KB and model changes.
+        cache_dir = embedding_store_dir(knowledge_base_path, model_name, "completions")
+        self.embedding_cache = EmbeddingCache(cache_dir, self.model, model_name)
+        self.kb_embeddings = self.embedding_cache.encode(self.knowledge_base).to(self.device)
         print("Retriever initialized.")
 
     def search(self, query: str, top_k: int = 3) -> str:
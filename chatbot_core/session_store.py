@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+class SessionStore(ABC):
+    """Conversation history per session_id, bounded in count and idle time.
+
+    Backends keep at most max_entries history lines per session, forget
+    sessions idle for longer than idle_ttl seconds and evict the least
+    recently used session once max_sessions is exceeded.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 3600, max_entries: int = 6):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+
+    @abstractmethod
+    def history(self, session_id: str) -> list:
+        """Returns the session's history lines, oldest first (empty for unknown or expired sessions)."""
+
+    @abstractmethod
+    def append(self, session_id: str, *entries: str):
+        """Adds history lines to the session, creating it if needed."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Session count, memory use and eviction counters, as reported by /stats."""
+
+class MemorySessionStore(SessionStore):
+    """In-process backend: an LRU-ordered dict, so both idle and overflow eviction pop from the front."""
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 3600, max_entries: int = 6):
+        super().__init__(max_sessions, idle_ttl, max_entries)
+        self._sessions = OrderedDict()  # session_id -> [deque of lines, last_seen, bytes]
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    @staticmethod
+    def _size(line: str) -> int:
+        return sys.getsizeof(line)
+
+    def _drop(self, session_id: str):
+        _, _, size = self._sessions.pop(session_id)
+        self.bytes_used -= size + self._size(session_id)
+
+    def _evict(self, now: float):
+        while self._sessions:
+            session_id, (_, last_seen, _) = next(iter(self._sessions.items()))
+            if now - last_seen > self.idle_ttl:
+                self.evicted_idle += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evicted_lru += 1
+            else:
+                break
+            self._drop(session_id)
+
+    def history(self, session_id: str) -> list:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            if time.monotonic() - session[1] > self.idle_ttl:
+                self._drop(session_id)
+                self.evicted_idle += 1
+                return []
+            return list(session[0])
+
+    def append(self, session_id: str, *entries: str):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = [deque(maxlen=self.max_entries), now, 0]
+                self._sessions[session_id] = session
+                self.bytes_used += self._size(session_id)
+            for line in entries:
+                if len(session[0]) == self.max_entries:
+                    dropped = self._size(session[0][0])
+                    session[2] -= dropped
+                    self.bytes_used -= dropped
+                session[0].append(line)
+                session[2] += self._size(line)
+                self.bytes_used += self._size(line)
+            session[1] = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": self.bytes_used,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru
+            }
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite backend, so several server processes on one host share conversations.
+
+    Stands in for an external store such as Redis: every read and write goes
+    through the database file (WAL mode), one connection per thread.
+    """
+
+    def __init__(self, db_path: str, max_sessions: int = 10000, idle_ttl: float = 3600, max_entries: int = 6):
+        super().__init__(max_sessions, idle_ttl, max_entries)
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, history TEXT NOT NULL, last_seen REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def history(self, session_id: str) -> list:
+        row = self._connection().execute(
+            "SELECT history FROM sessions WHERE session_id = ? AND last_seen >= ?",
+            (session_id, time.time() - self.idle_ttl)
+        ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def append(self, session_id: str, *entries: str):
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT history FROM sessions WHERE session_id = ? AND last_seen >= ?",
+                (session_id, now - self.idle_ttl)
+            ).fetchone()
+            lines = (json.loads(row[0]) if row else []) + list(entries)
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, history, last_seen) VALUES (?, ?, ?)",
+                (session_id, json.dumps(lines[-self.max_entries:]), now)
+            )
+            conn.execute("DELETE FROM sessions WHERE last_seen < ?", (now - self.idle_ttl,))
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                "SELECT session_id FROM sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        sessions, history_bytes = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(history)), 0) FROM sessions"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "max_sessions": self.max_sessions,
+            "bytes": history_bytes,
+            "file_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        }
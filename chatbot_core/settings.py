@@ -0,0 +1,36 @@
+import os
+
+# Repository root, one level above chatbot_core/
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def chatbot_config(project_root: str = PROJECT_ROOT) -> dict:
+    """Keyword arguments for MedicalChatbot shared by the Flask and ASGI servers."""
+    return {
+        "generative_model_path": os.path.join(project_root, "outputs/scifive_finetuned_final"),
+        "classifier_model_path": os.path.join(project_root, "outputs/intent_classifier_final"),
+        # KB CSV, compiled to a memory-mapped *.kb.arrow next to it on first start, or such an artifact
+        # itself; see convert_knowledge_base.py
+        "db_path": os.environ.get("CHATBOT_DB_PATH", os.path.join(project_root, "data/knowledge_base_final.csv")),
+        # See benchmark_ann_index.py for the recall/latency trade-off. Pre-forked workers share only
+        # ivf and ivfpq indexes; every worker loads its own copy of a flat or hnsw index
+        "index_backend": os.environ.get("CHATBOT_INDEX_BACKEND", "hnsw"),
+        "batching": True,         # concurrent requests share generate calls, see benchmark_batching.py
+        # Largest shared generate call; asgi.py runs at least this many inference workers so batches can fill
+        "max_batch_size": int(os.environ.get("CHATBOT_MAX_BATCH_SIZE", 8)),
+        # Serve emergency keywords and greetings at once; medical questions get 503 until models are loaded
+        "background_loading": True,
+        # fp32, int8 (dynamic quantization), onnx or compiled (torch.compile, warmed up before
+        # the server reports ready); see benchmark_quantization.py
+        "inference_mode": os.environ.get("CHATBOT_INFERENCE_MODE", "fp32"),
+        # biobert or embedding (linear head on the retrieval embedding); see benchmark_intent_backends.py
+        "intent_backend": os.environ.get("CHATBOT_INTENT_BACKEND", "biobert"),
+        # fast, sampling, quality or beam_sample; see chatbot_core/decoding.py and benchmark_decoding_profiles.py
+        "decoding_profile": os.environ.get("CHATBOT_DECODING_PROFILE", "beam_sample"),
+        # Small generator with the same vocabulary for assisted decoding of single-beam profiles;
+        # see benchmark_assisted_decoding.py
+        "draft_model_path": os.environ.get("CHATBOT_DRAFT_MODEL"),
+        # Set by gunicorn_conf.py so pre-forked workers memory-map one copy of the weights
+        "shared_weights_dir": os.environ.get("CHATBOT_SHARED_WEIGHTS_DIR"),
+        # SQLite session store shared by all workers; in-process store when unset
+        "session_db_path": os.environ.get("CHATBOT_SESSION_DB"),
+    }
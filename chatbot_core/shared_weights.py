@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from chatbot_core.lazy_imports import torch, transformers
+
+# Memory-mapped model weights for multi-process serving.
+#
+# Each model is exported once to a torch.save file. Worker processes build the
+# model skeleton on the meta device and assign the tensors from torch.load(mmap=True),
+# so the weights live in the page cache and are shared by every process that maps them.
+
+def model_fingerprint(model_path: str) -> str:
+    """Short hash of a model directory's files, so retrained models get a new export."""
+    digest = hashlib.sha1(model_path.encode("utf-8"))
+    if os.path.isdir(model_path):
+        for name in sorted(os.listdir(model_path)):
+            stat = os.stat(os.path.join(model_path, name))
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+def export_module(module: torch.nn.Module, path: str):
+    """Writes parameters and all buffers (including non-persistent ones) to path atomically."""
+    state_dict = module.state_dict()
+    extra_buffers = {name: buffer for name, buffer in module.named_buffers() if name not in state_dict}
+    tmp_path = path + ".tmp"
+    torch.save({"state_dict": state_dict, "buffers": extra_buffers}, tmp_path)
+    os.replace(tmp_path, path)
+
+def _set_buffer(module: torch.nn.Module, name: str, tensor: torch.Tensor):
+    owner_name, _, leaf = name.rpartition(".")
+    owner = module.get_submodule(owner_name) if owner_name else module
+    owner._buffers[leaf] = tensor
+
+def assign_from_export(module: torch.nn.Module, path: str):
+    """Replaces the module's tensors with memory-mapped ones from an export file."""
+    export = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    module.load_state_dict(export["state_dict"], assign=True)
+    for name, tensor in export["buffers"].items():
+        _set_buffer(module, name, tensor)
+    if hasattr(module, "tie_weights"):
+        module.tie_weights()
+    return module.eval()
+
+def load_shared_model(model_class, model_path: str, shared_dir: str, name: str):
+    """Loads a transformers model with its weights memory-mapped from shared_dir.
+
+    The export is created on first use; under a pre-fork server do this in the
+    master process (see gunicorn_conf.py) so workers never race to write it.
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    path = os.path.join(shared_dir, f"{name}-{model_fingerprint(model_path)}.pt")
+    if not os.path.exists(path):
+        print(f"Exporting {name} weights for memory-mapped loading...")
+        export_module(model_class.from_pretrained(model_path, local_files_only=True), path)
+
+    config = transformers.AutoConfig.from_pretrained(model_path, local_files_only=True)
+    with torch.device("meta"):
+        model = model_class.from_config(config)
+    if model.can_generate() and os.path.exists(os.path.join(model_path, "generation_config.json")):
+        model.generation_config = transformers.GenerationConfig.from_pretrained(model_path, local_files_only=True)
+    return assign_from_export(model, path)
+
+def share_module_weights(module: torch.nn.Module, shared_dir: str, name: str):
+    """Swaps an already-loaded module's weights for memory-mapped copies.
+
+    Used for the sentence-transformers retriever, whose loader cannot start from
+    the meta device; the private copy is freed once its tensors are replaced.
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    path = os.path.join(shared_dir, f"{name}.pt")
+    if not os.path.exists(path):
+        print(f"Exporting {name} weights for memory-mapped loading...")
+        export_module(module, path)
+    return assign_from_export(module, path)
+
+def prepare_shared_artifacts():
+    """Builds the chatbot once so the weight exports, compiled KB, embedding cache and index exist on disk."""
+    from chatbot_core.bot import MedicalChatbot
+    from chatbot_core.settings import chatbot_config
+
+    config = chatbot_config()
+    config["batching"] = False
+    config["background_loading"] = False  # return only once everything is written
+    config["warmup"] = False  # compiled graphs live in the workers, not in files
+    MedicalChatbot(**config)
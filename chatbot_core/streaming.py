@@ -0,0 +1,117 @@
+import re
+import threading
+
+from chatbot_core.lazy_imports import torch, transformers
+
+class IncrementalCleaner:
+    """Streaming counterpart of MedicalChatbot._clean_response.
+
+    Runs the parts of the cleanup that only need local context on partial
+    text: boilerplate phrases are removed as soon as they are complete, and a
+    sentence is dropped once its first key_length characters repeat an earlier
+    sentence. Text is held back only while it could still be the start of a
+    phrase or of a repeated sentence; the first sentence cannot repeat, so it
+    streams immediately. The whole-response cleanup still runs at the end.
+    """
+
+    def __init__(self, phrases: list, key_length: int = 80):
+        self.phrases = [phrase.lower() for phrase in phrases]
+        self.max_phrase_length = max((len(phrase) for phrase in self.phrases), default=0)
+        self.key_length = key_length
+        self.pending = ""   # text not yet checked for phrases
+        self.current = ""   # the sentence being generated
+        self.held = ""      # part of the current sentence waiting for a dedup decision
+        self.mode = "stream"
+        self.seen = set()
+
+    def feed(self, text: str) -> str:
+        """Adds newly generated text and returns the part that is safe to show."""
+        self.pending += text
+        return self._drain(final=False)
+
+    def flush(self) -> str:
+        """Returns whatever was still held back once generation has finished."""
+        out = self._drain(final=True)
+        if self.held:
+            key = self._key(self.current)
+            if not (key and key in self.seen):
+                out += self.held
+            self.held = ""
+        return out
+
+    def _key(self, sentence: str) -> str:
+        return sentence.strip().rstrip('.!?').strip().lower()[:self.key_length]
+
+    def _remove_phrases(self, final: bool):
+        """Removes complete phrases from pending; returns the index text must be held from, if any."""
+        while True:
+            lower = self.pending.lower()
+            best = None
+            for phrase in self.phrases:
+                i = lower.find(phrase)
+                if i >= 0 and (best is None or i < best[0]):
+                    best = (i, len(phrase))
+            if best is None:
+                return None
+            start, length = best
+            # Same tail as the batch regex (optional period, whitespace); wait until it is visible
+            tail_end = re.compile(r'\.?\s*').match(self.pending, start + length).end()
+            if tail_end == len(self.pending) and not final:
+                return start
+            self.pending = self.pending[:start] + self.pending[tail_end:]
+
+    def _phrase_prefix_length(self) -> int:
+        """Length of the longest suffix of pending that could grow into a phrase."""
+        lower = self.pending.lower()
+        for n in range(min(len(lower), self.max_phrase_length), 0, -1):
+            suffix = lower[-n:]
+            if any(phrase.startswith(suffix) for phrase in self.phrases):
+                return n
+        return 0
+
+    def _drain(self, final: bool) -> str:
+        hold_from = self._remove_phrases(final)
+        ready_length = len(self.pending)
+        if not final:
+            ready_length -= self._phrase_prefix_length()
+            if hold_from is not None:
+                ready_length = min(ready_length, hold_from)
+        ready, self.pending = self.pending[:ready_length], self.pending[ready_length:]
+        return "".join(self._sentence_piece(piece) for piece in re.split(r'(?<=[.!?])', ready) if piece)
+
+    def _sentence_piece(self, piece: str) -> str:
+        ended = piece.endswith(('.', '!', '?'))
+        self.current += piece
+
+        if self.mode == "stream":
+            out = piece
+        elif self.mode == "drop":
+            out = ""
+        else:
+            # Hold the sentence until enough of it is known to tell whether it repeats
+            self.held += piece
+            out = ""
+            key = self._key(self.current)
+            if ended or len(key) >= self.key_length:
+                if key and key in self.seen:
+                    self.mode = "drop"
+                else:
+                    self.mode = "stream"
+                    out = self.held
+                self.held = ""
+
+        if ended:
+            key = self._key(self.current)
+            if key:
+                self.seen.add(key)
+            self.current = ""
+            self.mode = "hold"
+        return out
+
+def cancellation_criteria(cancelled: threading.Event):
+    """Stopping criteria for generate() that end generation at the next token once cancelled is set."""
+    class Cancelled(transformers.StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), cancelled.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    return transformers.StoppingCriteriaList([Cancelled()])
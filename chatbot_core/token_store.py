@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from itertools import chain
+import numpy as np
+from chatbot_core.context_packer import SENTENCE_BOUNDARY
+
+class KBTokenStore:
+    """Generator token ids of every KB answer, split into sentences, in flat arrays.
+
+    tokens (int32) holds all ids back to back; sentence s is
+    tokens[sentence_offsets[s]:sentence_offsets[s + 1]] and the sentences of
+    row r are sentence_offsets[row_offsets[r]:row_offsets[r + 1] + 1]. The
+    arrays are memory-mapped, so workers share them and building a prompt
+    only slices and concatenates ids.
+    """
+
+    def __init__(self, tokens: np.ndarray = None, sentence_offsets: np.ndarray = None, row_offsets: np.ndarray = None):
+        self.tokens = tokens
+        self.sentence_offsets = sentence_offsets
+        self.row_offsets = row_offsets
+
+    def build(self, texts: list, tokenizer, batch_size: int = 10000):
+        sentences = []
+        counts = np.zeros(len(texts), dtype=np.int64)
+        for row, text in enumerate(texts):
+            row_sentences = [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+            sentences.extend(row_sentences)
+            counts[row] = len(row_sentences)
+
+        lengths = np.zeros(len(sentences), dtype=np.int64)
+        token_batches = []
+        for start in range(0, len(sentences), batch_size):
+            batch_ids = tokenizer(sentences[start:start + batch_size], add_special_tokens=False)["input_ids"]
+            lengths[start:start + len(batch_ids)] = [len(ids) for ids in batch_ids]
+            token_batches.append(np.fromiter(chain.from_iterable(batch_ids), dtype=np.int32))
+
+        self.tokens = np.concatenate(token_batches) if token_batches else np.zeros(0, dtype=np.int32)
+        self.sentence_offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.sentence_offsets[1:])
+        self.row_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.row_offsets[1:])
+        return self
+
+    def __len__(self) -> int:
+        return len(self.row_offsets) - 1
+
+    def prefix(self, row: int, max_tokens: int) -> np.ndarray:
+        """The row's longest run of whole leading sentences within max_tokens, as one view into the store."""
+        return self.window(row, 0, max_tokens)
+
+    def window(self, row: int, first_sentence: int, max_tokens: int) -> np.ndarray:
+        """Whole sentences of the row from first_sentence on within max_tokens, as one view into the store.
+
+        When the rest of the row fits, the window grows back over the sentences
+        before first_sentence while they fit, so the text keeps its order. A
+        budget of zero or less gives an empty window; first_sentence is clamped
+        to the row, so one past its end behaves like an empty tail.
+        """
+        offsets = self.sentence_offsets[self.row_offsets[row]:self.row_offsets[row + 1] + 1]
+        max_tokens = max(max_tokens, 0)
+        first = min(max(first_sentence, 0), len(offsets) - 1)
+        end = first + np.searchsorted(offsets[first + 1:] - offsets[first], max_tokens, side='right')
+        start = first
+        if end == len(offsets) - 1:
+            start = min(np.searchsorted(offsets[:first + 1], offsets[end] - max_tokens, side='left'), end)
+        return self.tokens[offsets[start]:offsets[end]]
+
+    def save(self, path: str, fingerprint: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "tokens.npy"), self.tokens)
+        np.save(os.path.join(path, "sentence_offsets.npy"), self.sentence_offsets)
+        np.save(os.path.join(path, "row_offsets.npy"), self.row_offsets)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"fingerprint": fingerprint, "rows": len(self), "tokens": int(len(self.tokens))}, f)
+
+    def load(self, path: str, fingerprint: str) -> bool:
+        """Memory-maps a saved store if it was built from the same texts and tokenizer."""
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path) as f:
+            if json.load(f).get("fingerprint") != fingerprint:
+                print("Saved KB token store is stale, rebuilding...")
+                return False
+        try:
+            self.tokens = np.load(os.path.join(path, "tokens.npy"), mmap_mode='r')
+            self.sentence_offsets = np.load(os.path.join(path, "sentence_offsets.npy"), mmap_mode='r')
+            self.row_offsets = np.load(os.path.join(path, "row_offsets.npy"), mmap_mode='r')
+        except (ValueError, OSError) as e:
+            print(f"Saved KB token store unreadable, rebuilding: {e}")
+            return False
+        return True
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Identifies a tokenizer by its vocabulary, so a retrained generator invalidates the store."""
+    vocab = sorted(tokenizer.get_vocab().items())
+    return hashlib.sha1(json.dumps(vocab).encode("utf-8")).hexdigest()
+
+def load_or_build_token_store(path: str, texts_fingerprint: str, get_texts, tokenizer) -> KBTokenStore:
+    """Loads the token store saved at path, or builds and saves it if it is missing or stale.
+
+    texts_fingerprint identifies the answers (see load_or_build_bm25); get_texts()
+    returns them and is only called to build.
+    """
+    store = KBTokenStore()
+    fingerprint = hashlib.sha1(f"{texts_fingerprint}:{tokenizer_fingerprint(tokenizer)}".encode()).hexdigest()
+    if store.load(path, fingerprint):
+        print(f"Loaded KB token store ({len(store):,} rows, {len(store.tokens):,} tokens) from {path}")
+        return store
+    texts = get_texts()
+    print(f"Tokenizing {len(texts):,} KB answers for the token store...")
+    store.build(texts, tokenizer)
+    store.save(path, fingerprint)
+    # Reopen memory-mapped, like a later start would
+    store.load(path, fingerprint)
+    return store
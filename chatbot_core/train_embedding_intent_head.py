@@ -0,0 +1,45 @@
+import pandas as pd
+import torch
+from datasets import Dataset
+from sentence_transformers import SentenceTransformer
+from sklearn.metrics import accuracy_score, f1_score
+from intent_classifier import EmbeddingIntentHead
+
+def main():
+    # 1. Load the Intent Dataset
+    print("Loading intent dataset...")
+    df = pd.read_csv('../data/intent_training_dataset_v3_final.csv').dropna()
+    print(f"Dataset size: {len(df)} examples")
+
+    # 2. Use the same held-out split as train_intent_classifier.py
+    split = Dataset.from_pandas(df[['text', 'intent']], preserve_index=False).train_test_split(test_size=0.1, seed=42)
+    train_df = split["train"].to_pandas()
+    eval_df = split["test"].to_pandas()
+    print(f"Train examples: {len(train_df)}")
+    print(f"Eval examples: {len(eval_df)}")
+
+    # 3. Encode with the retriever the chatbot already runs for every medical question
+    model_name = 'microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext'
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print("Encoding prompts with PubMedBERT...")
+    retriever = SentenceTransformer(model_name, device=device)
+    train_embeddings = retriever.encode(train_df['text'].tolist(), batch_size=64, show_progress_bar=True)
+    eval_embeddings = retriever.encode(eval_df['text'].tolist(), batch_size=64, show_progress_bar=True)
+
+    # 4. Train the linear head
+    print("Training embedding intent head...")
+    head = EmbeddingIntentHead().train(train_embeddings, train_df['intent'].tolist())
+
+    # 5. Evaluate
+    predictions = [label for label, _ in head.classify_batch(eval_embeddings)]
+    print(f"  Accuracy: {accuracy_score(eval_df['intent'], predictions):.4f}")
+    print(f"  F1 Score: {f1_score(eval_df['intent'], predictions, average='weighted'):.4f}")
+
+    # 6. Save next to the transformer classifier, where MedicalChatbot looks for it
+    output_path = "../outputs/intent_classifier_final/embedding_intent.joblib"
+    head.save(output_path)
+    print(f"✅ Embedding intent head saved to: {output_path}")
+    print("   Start the bot with intent_backend='embedding' to use it")
+
+if __name__ == "__main__":
+    main()
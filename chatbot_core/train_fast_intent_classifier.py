@@ -0,0 +1,35 @@
+import pandas as pd
+from datasets import Dataset
+from sklearn.metrics import accuracy_score, f1_score
+from intent_classifier import FastIntentClassifier
+
+def main():
+    # 1. Load the Intent Dataset
+    print("Loading intent dataset...")
+    df = pd.read_csv('../data/intent_training_dataset_v3_final.csv').dropna()
+    print(f"Dataset size: {len(df)} examples")
+
+    # 2. Use the same held-out split as train_intent_classifier.py
+    split = Dataset.from_pandas(df[['text', 'intent']], preserve_index=False).train_test_split(test_size=0.1, seed=42)
+    train_df = split["train"].to_pandas()
+    eval_df = split["test"].to_pandas()
+    print(f"Train examples: {len(train_df)}")
+    print(f"Eval examples: {len(eval_df)}")
+
+    # 3. Train the TF-IDF + logistic regression fast path
+    print("Training fast-path intent classifier...")
+    classifier = FastIntentClassifier().train(train_df['text'].tolist(), train_df['intent'].tolist())
+
+    # 4. Evaluate
+    predictions = [label for label, _ in classifier.classify_batch(eval_df['text'].tolist())]
+    print(f"  Accuracy: {accuracy_score(eval_df['intent'], predictions):.4f}")
+    print(f"  F1 Score: {f1_score(eval_df['intent'], predictions, average='weighted'):.4f}")
+
+    # 5. Save next to the transformer classifier, where MedicalChatbot looks for it
+    output_path = "../outputs/intent_classifier_final/fast_intent.joblib"
+    classifier.save(output_path)
+    print(f"✅ Fast-path intent classifier saved to: {output_path}")
+    print("   Run evaluate_intent_fast_path.py to pick the confidence threshold")
+
+if __name__ == "__main__":
+    main()
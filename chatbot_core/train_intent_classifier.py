@@ -4,6 +4,7 @@ import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer
 from datasets import Dataset
 from sklearn.metrics import accuracy_score, f1_score
+from intent_classifier import calibration_report, fit_temperature, save_temperature
 
 def main():
     # 1. Load the Intent Dataset
@@ -93,6 +94,18 @@ def main():
     print(f"  F1 Score: {eval_results.get('eval_f1', 'N/A')}")
     print(f"  Loss: {eval_results.get('eval_loss', 'N/A')}")
     
+    # 8b. Fit temperature scaling on the held-out split so the bot reports calibrated confidence
+    print("Calibrating confidence with temperature scaling...")
+    eval_output = trainer.predict(eval_dataset)
+    eval_logits = torch.tensor(eval_output.predictions)
+    eval_labels = torch.tensor(eval_output.label_ids)
+    temperature = fit_temperature(eval_logits, eval_labels)
+    before = calibration_report(eval_logits, eval_labels)
+    after = calibration_report(eval_logits, eval_labels, temperature)
+    print(f"  Temperature: {temperature:.3f}")
+    print(f"  NLL: {before['nll']:.4f} -> {after['nll']:.4f}")
+    print(f"  ECE: {before['ece']:.4f} -> {after['ece']:.4f}")
+    
     # 9. Save the Final Model
     print("Saving intent classifier...")
     trainer.save_model("../outputs/intent_classifier_final")
@@ -109,9 +122,12 @@ def main():
     with open("../outputs/intent_classifier_final/label_mapping.json", "w") as f:
         json.dump(label_mapping, f)
     
+    save_temperature("../outputs/intent_classifier_final", temperature, after)
+    
     print("✅ Intent classifier training complete!")
     print(f"✅ Model saved to: ../outputs/intent_classifier_final")
     print(f"✅ Label mappings saved for inference")
+    print(f"✅ Confidence temperature saved to: ../outputs/intent_classifier_final/temperature.json")
 
 if __name__ == "__main__":
     main()
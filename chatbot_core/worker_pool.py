@@ -0,0 +1,78 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+class QueueFullError(Exception):
+    """Raised when the admission queue is full; the caller should retry after retry_after seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class InferencePool:
+    """Fixed pool of inference worker threads behind a bounded admission queue.
+
+    Work is admitted only while the queue has room, so under overload callers
+    are turned away immediately instead of waiting behind an ever-growing backlog.
+    """
+
+    def __init__(self, num_workers: int = 2, max_queue: int = 16, retry_after: int = 5):
+        self.num_workers = num_workers
+        self.retry_after = retry_after
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"inference-worker-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queues fn(*args, **kwargs) for a worker, or raises QueueFullError if the queue is full."""
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError(self.retry_after)
+        return future
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.num_workers,
+            "active": self.active,
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self.active += 1
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
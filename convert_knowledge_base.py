@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Knowledge Base Converter
+Compiles prompt/completion KB CSVs into the Arrow artifact the chatbot
+memory-maps at startup (row_id, prompt, completion, source; schema version
+in the file metadata)
+
+With one CSV the artifact goes next to it (data/knowledge_base_final.kb.arrow)
+and is recompiled automatically whenever the CSV changes. Several CSVs are
+concatenated into one artifact; point CHATBOT_DB_PATH at it. Rows without a
+source column are labelled with their file name.
+"""
+
+import argparse
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+
+from chatbot_core.knowledge_base import (
+    KnowledgeBase, csv_fingerprint, kb_artifact_path, read_csv_table, save_knowledge_base
+)
+from chatbot_core.settings import PROJECT_ROOT
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("csv_paths", nargs="*", default=[os.path.join(PROJECT_ROOT, "data/knowledge_base_final.csv")])
+    parser.add_argument("--output", help="artifact path (default: next to the CSV; required for several CSVs)")
+    args = parser.parse_args()
+    if len(args.csv_paths) > 1 and not args.output:
+        # Next to a CSV it would count as that CSV's (stale) artifact and be recompiled from it alone
+        parser.error("--output is required when combining several CSVs")
+
+    output = args.output or kb_artifact_path(args.csv_paths[0])
+    print("KNOWLEDGE BASE CONVERTER")
+    print("="*60)
+
+    tables = []
+    next_row_id = 0
+    for csv_path in args.csv_paths:
+        start = time.perf_counter()
+        # row_id continues across files, so it stays unique in the combined artifact
+        table = read_csv_table(csv_path, first_row_id=next_row_id)
+        if table.num_rows:
+            next_row_id = table.column("row_id")[-1].as_py() + 1
+        print(f"{csv_path}: {table.num_rows:,} rows, parsed in {time.perf_counter() - start:.2f}s")
+        tables.append(table)
+
+    # A single CSV's artifact is tagged with its fingerprint, so the chatbot keeps using it until the CSV changes
+    fingerprint = csv_fingerprint(args.csv_paths[0]) if len(args.csv_paths) == 1 else None
+    save_knowledge_base(pa.concat_tables(tables), output, fingerprint)
+
+    start = time.perf_counter()
+    kb = KnowledgeBase.open(output)
+    open_seconds = time.perf_counter() - start
+    sources = pd.Series(kb.table.column("source").to_pylist()).value_counts()
+    print(f"\nWrote {output}: {len(kb):,} rows, {os.path.getsize(output) / 2**20:.1f} MB, "
+          f"schema version {kb.schema_version}")
+    print(f"Memory-mapped open: {open_seconds * 1000:.1f} ms")
+    for source, count in sources.items():
+        print(f"  {source}: {count:,} rows")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Combines pqa_labeled, pqa_unlabeled, and pqa_artificial for maximum coverage
 
 import pandas as pd
 import os
+from chatbot_core.knowledge_base import csv_fingerprint, kb_artifact_path, knowledge_base_table, save_knowledge_base
 
 def load_and_process_dataset(dataset_path, dataset_name):
     """Load and process a single PubMedQA dataset"""
@@ -156,10 +157,13 @@ def create_combined_knowledge_base():
     
     # Save new comprehensive knowledge base
     final_df.to_csv(output_path, index=False)
+    # Compiled KB next to the CSV, keeping the source_dataset column the CSV drops
+    save_knowledge_base(knowledge_base_table(combined_df, 'pubmedqa'), kb_artifact_path(output_path),
+                        csv_fingerprint(output_path))
     
     print(f"\nSUCCESS - COMPREHENSIVE KNOWLEDGE BASE CREATED")
     print("="*60)
-    print(f"Output file: {output_path}")
+    print(f"Output file: {output_path} (compiled: {kb_artifact_path(output_path)})")
     print(f"Total entries: {len(final_df):,}")
     print(f"Unique questions: {final_df['prompt'].nunique():,}")
     print(f"Unique completions: {final_df['completion'].nunique():,}")
@@ -190,9 +194,8 @@ def show_configuration_update():
     print("  To:")
     print("    'data/knowledge_base_final.csv'")
     
-    print(f"\nCLEAN CACHE AND RESTART:")
-    print("  rm chatbot_core/kb_embeddings.pt")
-    print("  python3 app.py")
+    print(f"\nRESTART:")
+    print("  python3 app.py  (only new or changed entries are re-embedded)")
 
 if __name__ == "__main__":
     print("COMPREHENSIVE PUBMEDQA KNOWLEDGE BASE CREATOR")
@@ -6,6 +6,7 @@ Replace technical PubMedQA content with NIH patient education content
 
 import pandas as pd
 import os
+from chatbot_core.knowledge_base import csv_fingerprint, kb_artifact_path, knowledge_base_table, save_knowledge_base
 
 def create_medquad_knowledge_base():
     """Create patient-friendly knowledge base from MedQuAD dataset"""
@@ -95,10 +96,13 @@ def create_medquad_knowledge_base():
     
     # Save new patient-friendly knowledge base
     knowledge_df.to_csv(current_kb_path, index=False)
+    # Compiled KB next to the CSV, so the chatbot starts without parsing it
+    save_knowledge_base(knowledge_base_table(knowledge_df, 'medquad_nih'), kb_artifact_path(current_kb_path),
+                        csv_fingerprint(current_kb_path))
     
     print(f"\nSUCCESS - PATIENT-FRIENDLY KNOWLEDGE BASE CREATED")
     print("="*60)
-    print(f"Output file: {current_kb_path}")
+    print(f"Output file: {current_kb_path} (compiled: {kb_artifact_path(current_kb_path)})")
     print(f"Total entries: {len(knowledge_df):,}")
     print(f"Source: NIH MedlinePlus (patient education)")
     print(f"Content type: Patient-friendly medical information")
@@ -7,6 +7,7 @@ for comprehensive medical coverage
 
 import pandas as pd
 import os
+from chatbot_core.knowledge_base import csv_fingerprint, kb_artifact_path, knowledge_base_table, save_knowledge_base
 
 def load_pubmedqa_datasets():
     """Load and process all 3 PubMedQA datasets"""
@@ -200,6 +201,9 @@ def create_ultimate_knowledge_base():
     
     # Save ultimate knowledge base
     final_df.to_csv(current_kb_path, index=False)
+    # Compiled KB next to the CSV, keeping the source column the CSV drops
+    save_knowledge_base(knowledge_base_table(ultimate_df, 'ultimate'), kb_artifact_path(current_kb_path),
+                        csv_fingerprint(current_kb_path))
     
     # Calculate quality metrics
     avg_question_length = final_df['prompt'].str.len().mean()
@@ -208,7 +212,7 @@ def create_ultimate_knowledge_base():
     
     print(f"\nULTIMATE KNOWLEDGE BASE CREATED")
     print("="*50)
-    print(f"Output file: {current_kb_path}")
+    print(f"Output file: {current_kb_path} (compiled: {kb_artifact_path(current_kb_path)})")
     print(f"Total entries: {len(final_df):,}")
     print(f"Unique questions: {final_df['prompt'].nunique():,}")
     print(f"Unique completions: {final_df['completion'].nunique():,}")
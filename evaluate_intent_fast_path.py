@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Intent Fast-Path Evaluation
+Reports how often the TF-IDF fast path settles a prompt on its own at several
+confidence thresholds, and how much accuracy that gives up compared with
+sending every prompt to the BioBERT classifier
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import torch
+from datasets import Dataset
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from chatbot_core.intent_classifier import FastIntentClassifier, IntentClassifier
+
+THRESHOLDS = [0.5, 0.7, 0.8, 0.9, 0.95, 0.99]
+
+def main():
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    classifier_path = os.path.join(project_root, "outputs/intent_classifier_final")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    print("INTENT FAST-PATH EVALUATION")
+    print("="*60)
+
+    # Same held-out split as train_intent_classifier.py and train_fast_intent_classifier.py
+    df = pd.read_csv(os.path.join(project_root, "data/intent_training_dataset_v3_final.csv")).dropna()
+    split = Dataset.from_pandas(df[['text', 'intent']], preserve_index=False).train_test_split(test_size=0.1, seed=42)
+    eval_df = split["test"].to_pandas()
+    texts = eval_df['text'].tolist()
+    labels = np.array(eval_df['intent'].tolist())
+    print(f"Eval examples: {len(texts)}")
+
+    fast = FastIntentClassifier.load(os.path.join(classifier_path, "fast_intent.joblib"))
+    start = time.perf_counter()
+    fast_results = [fast.classify(text) for text in texts]
+    fast_ms = (time.perf_counter() - start) / len(texts) * 1000
+    fast_labels = np.array([label for label, _ in fast_results])
+    fast_confidence = np.array([confidence for _, confidence in fast_results])
+
+    tokenizer = AutoTokenizer.from_pretrained(classifier_path, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(classifier_path, local_files_only=True).to(device).eval()
+    transformer = IntentClassifier(tokenizer, model, device)
+    start = time.perf_counter()
+    transformer_labels = np.array([transformer.classify_batch([text])[0][0] for text in texts])
+    transformer_ms = (time.perf_counter() - start) / len(texts) * 1000
+
+    transformer_accuracy = np.mean(transformer_labels == labels)
+    print(f"\nBioBERT only:   accuracy {transformer_accuracy:.4f}, {transformer_ms:.2f} ms/prompt")
+    print(f"Fast path only: accuracy {np.mean(fast_labels == labels):.4f}, {fast_ms:.2f} ms/prompt")
+
+    print(f"\n{'threshold':>9} {'fires':>8} {'fast acc':>9} {'BioBERT acc':>12} {'combined':>9} {'given up':>9} {'est ms':>8}")
+    print("-"*70)
+    for threshold in THRESHOLDS:
+        fired = fast_confidence >= threshold
+        combined = np.where(fired, fast_labels, transformer_labels)
+        combined_accuracy = np.mean(combined == labels)
+        fast_accuracy = np.mean(fast_labels[fired] == labels[fired]) if fired.any() else float("nan")
+        transformer_on_fired = np.mean(transformer_labels[fired] == labels[fired]) if fired.any() else float("nan")
+        # Every prompt pays for the fast path; the rest also pay for BioBERT
+        estimated_ms = fast_ms + (1 - fired.mean()) * transformer_ms
+        print(f"{threshold:>9.2f} {fired.mean():>8.1%} {fast_accuracy:>9.4f} {transformer_on_fired:>12.4f} "
+              f"{combined_accuracy:>9.4f} {transformer_accuracy - combined_accuracy:>+9.4f} {estimated_ms:>8.2f}")
+
+    print("\n'fast acc' and 'BioBERT acc' are measured on the prompts where the fast path fires.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Pre-fork serving configuration for the ASGI app
+
+Run with:  gunicorn -c gunicorn_conf.py asgi:app
+
+The master process exports the model weights and builds the embedding cache and
+retrieval index once. Each worker then memory-maps the weights, the KB embedding
+matrix and the index from those files, so the read-only data lives once in the
+page cache and an extra worker costs only its activation memory.
+
+FAISS can map only IVF indexes (CHATBOT_INDEX_BACKEND=ivf or ivfpq). The default
+hnsw index, like flat, is read into every worker, which logs a warning; budget
+its size once per worker or switch the backend. Loading it in the master before
+forking is not an option: the models and index load in the workers, because the
+master must not initialise torch.
+
+Tuning (environment variables):
+  CHATBOT_PROCESSES           worker processes (default 2)
+  CHATBOT_SHARED_WEIGHTS_DIR  where exported weights are kept (default outputs/shared_weights)
+  CHATBOT_INDEX_BACKEND       exact, flat, ivf, hnsw (default) or ivfpq
+  CHATBOT_SESSION_DB          SQLite file holding conversations shared by all workers
+                              (default outputs/sessions.sqlite3)
+"""
+
+import os
+import subprocess
+import sys
+
+from chatbot_core.settings import PROJECT_ROOT
+
+workers = int(os.environ.get("CHATBOT_PROCESSES", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.environ.get("CHATBOT_BIND", "0.0.0.0:5000")
+preload_app = False
+timeout = 600  # workers load models in the background, but allow slow first heartbeats
+
+# Inherited by the workers through the environment
+os.environ["CHATBOT_PROCESSES"] = str(workers)
+os.environ.setdefault("CHATBOT_SHARED_WEIGHTS_DIR", os.path.join(PROJECT_ROOT, "outputs/shared_weights"))
+# A session may hit any worker, so histories must live outside the worker processes
+os.environ.setdefault("CHATBOT_SESSION_DB", os.path.join(PROJECT_ROOT, "outputs/sessions.sqlite3"))
+
+def on_starting(server):
+    """Creates every shared artifact once, before any worker starts, so workers never race to write them.
+
+    This runs in a child interpreter: the master must not initialise torch's
+    thread pools before forking the workers.
+    """
+    server.log.info("Preparing shared model weights, embeddings and index...")
+    subprocess.run(
+        [sys.executable, "-c", "from chatbot_core.shared_weights import prepare_shared_artifacts; prepare_shared_artifacts()"],
+        cwd=PROJECT_ROOT, check=True
+    )
+    server.log.info("Shared artifacts ready, starting workers.")
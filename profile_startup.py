@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Startup Profiler
+Breaks down where server startup time goes:
+
+  import        each heavy dependency and the chatbot modules, imported alone
+                in a fresh interpreter (shared dependencies count in each row)
+  tokenizer     generator and intent classifier tokenizers
+  weights       intent classifier, generator and retriever weights
+  kb            compiled knowledge base load (CSV conversion when stale) and passages
+  embedding     passage embeddings (read from the embedding cache when warm)
+  index         retrieval index, BM25 index and KB token store
+
+Stages after the imports run one after another in this process. The servers
+load the three models concurrently (see chatbot_core/loading.py), so their
+wall time is below the sum shown here; the "Model loading finished" log
+line has the real per-stage timings.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from chatbot_core.settings import PROJECT_ROOT, chatbot_config
+
+RETRIEVER_MODEL = 'microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract-fulltext'
+
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "sklearn", "pandas", "pyarrow", "faiss"]
+IMPORTS = ["numpy"] + HEAVY_MODULES + ["chatbot_core.bot", "app", "asgi"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def profile_import(module: str) -> dict:
+    """Imports module in a fresh interpreter, so nothing is already cached."""
+    probe = IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+class StageTimer:
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, category: str, name: str, fn):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        self.rows.append((category, name, elapsed))
+        print(f"  {category:<10} {name:<32} {elapsed:>8.2f}s")
+        return result
+
+def main():
+    config = chatbot_config()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--imports-only", action="store_true", help="Only profile import times")
+    parser.add_argument("--inference-mode", default=config["inference_mode"])
+    parser.add_argument("--index-backend", default=config["index_backend"])
+    args = parser.parse_args()
+
+    print("STARTUP PROFILE")
+    print("="*60)
+    print(f"\n{'import':<24} {'seconds':>8}  heavy modules loaded")
+    print("-"*60)
+    for module in IMPORTS:
+        result = profile_import(module)
+        if "error" in result:
+            print(f"{module:<24} {'-':>8}  not importable: {result['error']}")
+        else:
+            print(f"{module:<24} {result['seconds']:>8.2f}  {', '.join(result['heavy']) or '-'}")
+    if args.imports_only:
+        return
+
+    def import_frameworks():
+        import torch
+        from transformers import AutoTokenizer
+        return torch, AutoTokenizer
+
+    # Imported here, after the import probes, and timed as their own stage
+    timer = StageTimer()
+    print("\nLoading stages (sequential):")
+    torch, AutoTokenizer = timer("import", "torch + transformers", import_frameworks)
+    from chatbot_core.bm25_index import load_or_build_bm25
+    from chatbot_core.ann_index import load_or_build_index
+    from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+    from chatbot_core.knowledge_base import load_or_build_knowledge_base
+    from chatbot_core.model_loading import embedding_model_key, load_generator, load_intent_model, load_retriever
+    from chatbot_core.passages import KBPassages, load_or_build_passages
+    from chatbot_core.token_store import load_or_build_token_store
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    mode = args.inference_mode
+    gen_path, classifier_path, db_path = config["generative_model_path"], config["classifier_model_path"], config["db_path"]
+    kb_base = os.path.splitext(db_path)[0]
+
+    gen_tokenizer = timer("tokenizer", "generator tokenizer", lambda: AutoTokenizer.from_pretrained(gen_path, local_files_only=True))
+    timer("tokenizer", "intent tokenizer", lambda: AutoTokenizer.from_pretrained(classifier_path, local_files_only=True))
+
+    timer("weights", f"intent classifier ({mode})", lambda: load_intent_model(classifier_path, device, mode))
+    timer("weights", f"generator ({mode})", lambda: load_generator(gen_path, device, mode))
+    retriever = timer("weights", f"retriever ({mode})", lambda: load_retriever(RETRIEVER_MODEL, device, mode))
+
+    db = timer("kb", "compiled KB", lambda: load_or_build_knowledge_base(db_path))
+    # Same artifacts and keys as the bot (default passage settings), so a warm start is measured
+    passages_fingerprint = f"{db.fingerprint}:True:180:40"
+    build_passages = lambda: KBPassages.build(db.completions(), db.prompts())
+    passages, passage_texts = timer("kb", "passages", lambda: load_or_build_passages(
+        kb_base + ".passages", passages_fingerprint, build_passages
+    ))
+
+    model_key = embedding_model_key(RETRIEVER_MODEL, mode)
+    embedding_cache = EmbeddingCache(embedding_store_dir(db_path, model_key, "passages"), retriever, model_key)
+
+    def load_embeddings():
+        embeddings = embedding_cache.load_encoded(passages_fingerprint)
+        if embeddings is None:
+            texts = passage_texts if passage_texts is not None else build_passages()[1]
+            embeddings = embedding_cache.encode(texts, batch_size=32, source=passages_fingerprint)
+        return embeddings
+
+    embeddings = timer("embedding", f"{len(passages):,} passages", load_embeddings)
+
+    timer("index", f"{args.index_backend} index", lambda: load_or_build_index(
+        kb_base + f".{args.index_backend}.faiss", embeddings.to(device), embedding_cache.fingerprint, backend=args.index_backend
+    ))
+    timer("index", "BM25 index", lambda: load_or_build_bm25(kb_base + ".bm25", db.fingerprint, db.documents))
+    timer("index", "KB token store", lambda: load_or_build_token_store(
+        kb_base + ".tokens", db.fingerprint, db.completions, gen_tokenizer
+    ))
+
+    total = sum(elapsed for _, _, elapsed in timer.rows)
+    print(f"\n{'category':<12} {'seconds':>8} {'share':>7}")
+    print("-"*30)
+    for category in dict.fromkeys(category for category, _, _ in timer.rows):
+        seconds = sum(elapsed for c, _, elapsed in timer.rows if c == category)
+        print(f"{category:<12} {seconds:>8.2f} {seconds / total:>7.1%}")
+    print(f"{'total':<12} {total:>8.2f}")
+    slowest = max(timer.rows, key=lambda row: row[2])
+    print(f"\nSlowest stage: {slowest[0]} / {slowest[1]} ({slowest[2]:.2f}s, {slowest[2] / total:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from chatbot_core.bm25_index import BM25Index, load_or_build_bm25, reciprocal_rank_fusion, texts_fingerprint, tokenize
+
+TEXTS = [
+    "What is metformin?\nMetformin lowers blood sugar in type 2 diabetes.",
+    "What causes anemia?\nIron deficiency is the most common cause of anemia.",
+    "What is BRCA1?\nBRCA1 is a gene; mutations raise breast cancer risk.",
+    "How is diabetes treated?\nDiet, exercise and medication control blood sugar.",
+]
+
+def corpus_ids(hits) -> list:
+    return [hit['corpus_id'] for hit in hits]
+
+class BM25IndexTest(unittest.TestCase):
+    def test_tokenize_drops_stopwords_and_keeps_gene_symbols(self):
+        self.assertEqual(tokenize("What is the BRCA1 gene?"), ["brca1", "gene"])
+
+    def test_rare_term_ranks_its_document_first(self):
+        index = BM25Index().build(TEXTS)
+        self.assertEqual(corpus_ids(index.search("metformin dose", top_k=2))[0], 0)
+        self.assertEqual(corpus_ids(index.search("brca1", top_k=3)), [2])
+        self.assertEqual(index.search("the of and", top_k=3), [])
+
+    def test_scores_are_sorted_and_limited_to_top_k(self):
+        hits = BM25Index().build(TEXTS).search("diabetes blood sugar", top_k=2)
+        self.assertEqual(len(hits), 2)
+        self.assertGreaterEqual(hits[0]['score'], hits[1]['score'])
+        self.assertEqual(set(corpus_ids(hits)), {0, 3})
+
+    def test_postings_budget_reads_rare_terms_completely(self):
+        texts = [f"common filler {i}" for i in range(50)] + ["common rare"]
+        index = BM25Index(max_postings=4).build(texts)
+        # The rare term's one posting fits, the common term gets the remaining three
+        self.assertEqual(corpus_ids(index.search("common rare", top_k=1)), [50])
+
+    def test_saved_index_is_reloaded_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "kb.bm25")
+            built = load_or_build_bm25(path, texts_fingerprint(TEXTS), lambda: TEXTS)
+            loaded = load_or_build_bm25(path, texts_fingerprint(TEXTS), self.fail, mmap=True)
+            self.assertEqual(loaded.search("anemia iron", top_k=2), built.search("anemia iron", top_k=2))
+            # Other texts invalidate the saved index
+            self.assertFalse(BM25Index().load(path, "other fingerprint"))
+
+class ReciprocalRankFusionTest(unittest.TestCase):
+    def test_documents_found_by_both_rankings_come_first(self):
+        dense = [{'corpus_id': 1, 'score': 0.9}, {'corpus_id': 2, 'score': 0.8}]
+        lexical = [{'corpus_id': 2, 'score': 12.0}, {'corpus_id': 3, 'score': 7.0}]
+        self.assertEqual(corpus_ids(reciprocal_rank_fusion([dense, lexical])), [2, 1, 3])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from chatbot_core.context_packer import INSTRUCTION, ContextPacker
+from chatbot_core.token_store import KBTokenStore
+from tests.word_tokenizer import word_tokenizer
+
+HEADERS = ["Previous Conversation:", "Medical Information:", "Current Question:", "Response:", "---",
+           "No relevant medical information found."]
+ANSWERS = [
+    "Anemia is a lack of red blood cells. Iron deficiency is the most common cause. Fatigue is typical.",
+    "Metformin lowers blood sugar. It is taken with meals.",
+    "Migraine causes throbbing headaches. Light and noise make it worse.",
+]
+QUESTION = "What causes anemia and fatigue?"
+HISTORY = ["User: I feel tired", "Bot: Tiredness has many causes", "User: I also look pale"]
+
+class ContextPackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = word_tokenizer([INSTRUCTION, QUESTION] + HEADERS + ANSWERS + HISTORY)
+
+    def decode(self, ids: list) -> str:
+        return self.tokenizer.decode(ids, skip_special_tokens=True)
+
+    def test_prompt_has_every_section_in_order(self):
+        ids = ContextPacker(self.tokenizer).pack(QUESTION, HISTORY, list(enumerate(ANSWERS)))
+        self.assertEqual(ids[-1], self.tokenizer.eos_token_id)
+        text = self.decode(ids)
+        sections = [INSTRUCTION, "Previous Conversation", HISTORY[-1], "Medical Information", ANSWERS[0],
+                    ANSWERS[2], "Current Question", QUESTION, "Response"]
+        positions = [text.find(self.decode(self.tokenizer(section)["input_ids"])) for section in sections]
+        self.assertNotIn(-1, positions)
+        self.assertEqual(positions, sorted(positions))
+
+    def test_budget_keeps_question_and_cuts_passages_at_sentences(self):
+        packer = ContextPacker(self.tokenizer)
+        fixed_tokens = len(packer.pack(QUESTION, [], [])) - len(packer.no_context_ids)
+        first_sentence = self.tokenizer("Anemia is a lack of red blood cells.", add_special_tokens=False)["input_ids"]
+        packer.max_tokens = fixed_tokens + len(first_sentence) + 3  # too little for the next sentence
+        ids = packer.pack(QUESTION, [], list(enumerate(ANSWERS)))
+        self.assertLessEqual(len(ids), packer.max_tokens)
+        text = self.decode(ids)
+        self.assertIn(self.decode(self.tokenizer("Anemia is a lack of red blood cells.")["input_ids"]), text)
+        self.assertNotIn("Iron", text)
+        self.assertNotIn("Metformin", text)
+        self.assertIn(self.decode(self.tokenizer(QUESTION)["input_ids"]), text)
+
+    def test_newest_whole_history_lines_fit_the_history_budget(self):
+        line_lengths = [len(self.tokenizer(line, add_special_tokens=False)["input_ids"]) for line in HISTORY]
+        packer = ContextPacker(self.tokenizer, history_tokens=line_lengths[-1] + line_lengths[-2])
+        text = self.decode(packer.pack(QUESTION, HISTORY, []))
+        self.assertIn("also", text)
+        self.assertIn("Tiredness", text)
+        self.assertNotIn("feel", text)
+
+    def test_over_long_question_is_packed_without_passages(self):
+        question = " ".join(["What causes anemia and fatigue?"] * 100)
+        packer = ContextPacker(self.tokenizer, max_tokens=128)
+        for token_store in (None, KBTokenStore().build(ANSWERS, self.tokenizer)):
+            ids = packer.pack(question, HISTORY, list(enumerate(ANSWERS)), token_store=token_store)
+            text = self.decode(ids)
+            self.assertEqual(text.count("anemia"), 100)
+            self.assertNotIn("Anemia", text)
+            self.assertNotIn("Tiredness", text)
+            self.assertIn("No relevant medical information found", text)
+
+    def test_no_passages_says_so(self):
+        text = self.decode(ContextPacker(self.tokenizer).pack(QUESTION, [], []))
+        self.assertIn("No relevant medical information found", text)
+
+if __name__ == "__main__":
+    unittest.main()
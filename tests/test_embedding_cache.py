@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from chatbot_core.embedding_cache import EmbeddingCache, embedding_store_dir
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True, show_progress_bar=False, batch_size=32):
+        self.encoded.extend(texts)
+        return np.array([[len(text), sum(map(ord, text))] for text in texts], dtype=np.float32)
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "kb.csv")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_only_new_texts_are_encoded(self):
+        model = FakeModel()
+        cache = EmbeddingCache(embedding_store_dir(self.db_path, "model", "passages"), model, "model")
+        first = cache.encode(["a", "bb"]).numpy().copy()
+        second = cache.encode(["bb", "a", "ccc"]).numpy()
+        self.assertEqual(model.encoded, ["a", "bb", "ccc"])
+        np.testing.assert_array_equal(second[:2], first[::-1])
+
+    def test_unchanged_texts_load_without_encoding(self):
+        model = FakeModel()
+        store = embedding_store_dir(self.db_path, "model", "passages")
+        EmbeddingCache(store, model, "model").encode(["a", "bb"])
+        cache = EmbeddingCache(store, model, "model")
+        embeddings = cache.encode(["a", "bb"])
+        self.assertEqual(model.encoded, ["a", "bb"])
+        self.assertEqual(tuple(embeddings.shape), (2, 2))
+        self.assertIsNotNone(cache.fingerprint)
+
+    def test_encoded_rows_load_by_source_without_texts(self):
+        model = FakeModel()
+        store = embedding_store_dir(self.db_path, "model", "passages")
+        first = EmbeddingCache(store, model, "model").encode(["a", "bb"], source="kb:1").numpy().copy()
+        cache = EmbeddingCache(store, model, "model")
+        np.testing.assert_array_equal(cache.load_encoded("kb:1").numpy(), first)
+        self.assertIsNotNone(cache.fingerprint)
+        self.assertIsNone(cache.load_encoded("kb:2"))
+        # Encoding other texts without a source forgets the recorded one
+        cache.encode(["ccc"])
+        self.assertIsNone(cache.load_encoded("kb:1"))
+
+    def test_consumers_do_not_evict_each_other(self):
+        model = FakeModel()
+        passages = EmbeddingCache(embedding_store_dir(self.db_path, "model", "passages"), model, "model")
+        completions = EmbeddingCache(embedding_store_dir(self.db_path, "model", "completions"), model, "model")
+        other_model = EmbeddingCache(embedding_store_dir(self.db_path, "org/other#int8", "passages"), model, "org/other#int8")
+        passages.encode(["p1", "p2"])
+        completions.encode(["c1"])
+        other_model.encode(["p1"])
+        model.encoded.clear()
+        passages.encode(["p1", "p2"])
+        self.assertEqual(model.encoded, [])
+
+    def test_store_dir_is_a_single_path_component(self):
+        store = embedding_store_dir(self.db_path, "microsoft/PubMedBERT#int8", "passages")
+        self.assertEqual(os.path.dirname(store), os.path.join(self.tmp_dir.name, "kb_embeddings"))
+        self.assertEqual(os.path.basename(store), "microsoft_PubMedBERT_int8-passages")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import torch
+
+from chatbot_core.bot import KBState, MedicalChatbot
+from chatbot_core.passages import KBPassages
+
+class FakeKnowledgeBase:
+    def __init__(self, completions: list):
+        self.completions = completions
+
+    def completion(self, row: int) -> str:
+        return self.completions[row]
+
+class FakeIndex:
+    """Exact search over the KB embeddings; on_search runs while the search is in flight."""
+
+    def __init__(self, embeddings, on_search=None):
+        self.embeddings = embeddings
+        self.on_search = on_search
+
+    def search(self, query_embedding, top_k: int):
+        if self.on_search is not None:
+            self.on_search()
+        scores = self.embeddings @ query_embedding
+        order = torch.argsort(scores, descending=True)[:top_k]
+        return [[{'corpus_id': int(i), 'score': float(scores[i])} for i in order]]
+
+def kb_state(name: str, num_rows: int, on_search=None) -> KBState:
+    completions = [f"{name} answer {row}: " + "this is a long enough answer about the condition. " * 2
+                   for row in range(num_rows)]
+    passages, _ = KBPassages.build(completions)
+    embeddings = torch.nn.functional.normalize(torch.eye(num_rows, 8)[:, :8] + 0.1, dim=1)
+    return KBState(f"{name}.csv", FakeKnowledgeBase(completions), None, embeddings, FakeIndex(embeddings, on_search),
+                   passages, np.arange(num_rows), None, None)
+
+class KBSwapTest(unittest.TestCase):
+    def make_bot(self) -> MedicalChatbot:
+        # Only the attributes retrieval needs; no models are loaded
+        bot = MedicalChatbot.__new__(MedicalChatbot)
+        bot.mmr_lambda = 0.7
+        bot.duplicate_threshold = 0.95
+        return bot
+
+    def test_reload_during_retrieval_keeps_one_kb_build(self):
+        bot = self.make_bot()
+        new_kb = kb_state("new", 2)  # fewer rows: old row ids may not even exist in it
+
+        def reload():
+            bot.kb = new_kb
+
+        bot.kb = kb_state("old", 6, on_search=reload)
+        query = bot.kb.embeddings[4]
+        context = bot._retrieve_context("question", top_k=3, query_embedding=query)
+        self.assertIs(bot.kb, new_kb)
+        self.assertTrue(context.startswith("old answer 4"))
+        self.assertNotIn("new answer", context)
+
+    def test_retrieve_rows_uses_the_given_kb(self):
+        bot = self.make_bot()
+        old_kb = kb_state("old", 6)
+        bot.kb = kb_state("new", 6)
+        rows = bot._retrieve_rows("question", top_k=2, query_embedding=old_kb.embeddings[1], kb=old_kb)
+        self.assertEqual(rows[0], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from chatbot_core.bot import EMERGENCY_KEYWORDS, SHORT_MEDICAL_TERMS
+from chatbot_core.keyword_matcher import KeywordMatcher
+
+class KeywordMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher({"emergency": EMERGENCY_KEYWORDS, "short_medical": SHORT_MEDICAL_TERMS})
+
+    def groups(self, text: str) -> set:
+        return {match.group for match in self.matcher.find_all(text)}
+
+    def patterns(self, text: str) -> list:
+        return [match.pattern for match in self.matcher.find_all(text)]
+
+    def test_no_match_inside_longer_word(self):
+        self.assertEqual(self.matcher.find_all("my teacher scolded me"), [])
+        self.assertEqual(self.matcher.find_all("the painting is nice"), [])
+
+    def test_inflected_emergency_phrases(self):
+        self.assertIn("emergency", self.groups("I keep having seizures"))
+        self.assertIn("emergency", self.groups("he had two strokes"))
+        self.assertIn("emergency", self.groups("chest pains since morning"))
+        self.assertIn("emergency", self.groups("she is choking"))
+
+    def test_inflected_short_medical_terms(self):
+        self.assertEqual(self.groups("headaches"), {"short_medical"})
+        self.assertEqual(self.groups("fevers again"), {"short_medical"})
+        self.assertEqual(self.groups("coughing"), {"short_medical"})
+
+    def test_offsets_index_original_text(self):
+        text = "Sudden CHEST PAIN now"
+        match = next(m for m in self.matcher.find_all(text) if m.pattern == "chest pain")
+        self.assertEqual(text[match.start:match.end].lower(), "chest pain")
+
+    def test_offsets_after_characters_that_lower_to_two(self):
+        text = "İİ sudden chest pain"  # "İ".lower() is two characters
+        match = next(m for m in self.matcher.find_all(text) if m.pattern == "chest pain")
+        self.assertEqual(text[match.start:match.end], "chest pain")
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(self.patterns("severe chest pain"), ["severe chest pain", "chest pain", "pain"])
+
+    def test_curly_apostrophe(self):
+        self.assertIn("can't breathe", self.patterns("I can’t breathe"))
+
+    def test_suffix_must_end_the_word(self):
+        # "colds" is an inflection, "coldest" and "painter" are other words
+        self.assertEqual(self.patterns("two colds"), ["cold"])
+        self.assertEqual(self.patterns("the coldest painter"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import threading
+import unittest
+
+from chatbot_core.bot import MedicalChatbot
+from chatbot_core.keyword_matcher import KeywordMatcher
+from chatbot_core.loading import LoadProgress, ModelsNotReady
+
+class FakeRetriever:
+    def __init__(self):
+        self.prompts = []
+
+    def encode(self, prompt, convert_to_tensor=False, device=None):
+        self.prompts.append(prompt)
+        return [0.0, 1.0]
+
+class LoadProgressTest(unittest.TestCase):
+    def test_require_raises_until_stage_is_ready(self):
+        progress = LoadProgress(["retriever", "generator"])
+        with self.assertRaises(ModelsNotReady) as raised:
+            progress.require("retriever")
+        self.assertEqual(raised.exception.progress["stages"]["retriever"]["status"], "pending")
+
+        self.assertTrue(progress.run("retriever", lambda: None))
+        progress.require("retriever")
+        self.assertFalse(progress.is_ready())
+
+    def test_failed_stage_is_reported(self):
+        progress = LoadProgress(["generator"])
+
+        def fail():
+            raise OSError("missing weights")
+
+        self.assertFalse(progress.run("generator", fail))
+        self.assertTrue(progress.failed)
+        snapshot = progress.snapshot()
+        self.assertEqual(snapshot["stages"]["generator"]["status"], "failed")
+        self.assertEqual(snapshot["errors"], {"generator": "missing weights"})
+        with self.assertRaises(ModelsNotReady):
+            progress.require("generator")
+
+    def test_stage_runs_on_another_thread(self):
+        progress = LoadProgress(["retriever"])
+        started, release = threading.Event(), threading.Event()
+
+        def load():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=progress.run, args=("retriever", load))
+        thread.start()
+        started.wait(5)
+        self.assertEqual(progress.snapshot()["stages"]["retriever"]["status"], "loading")
+        release.set()
+        thread.join(5)
+        self.assertTrue(progress.is_ready("retriever"))
+
+class RequestFeaturesLoadingRaceTest(unittest.TestCase):
+    def make_bot(self):
+        # Only the attributes _features needs; no models are loaded
+        bot = MedicalChatbot.__new__(MedicalChatbot)
+        bot.keyword_matcher = KeywordMatcher({"emergency": ["stroke"]})
+        bot.retriever_model = None
+        bot.device = "cpu"
+        return bot
+
+    def test_features_built_before_retriever_loads_use_it_once_loaded(self):
+        bot = self.make_bot()
+        features = bot._features("what causes anemia")  # request arrives while the retriever is loading
+        bot.retriever_model = FakeRetriever()  # loading finishes while it waits
+        self.assertEqual(features.query_embedding, [0.0, 1.0])
+        self.assertEqual(bot.retriever_model.prompts, ["what causes anemia"])
+
+    def test_query_embedding_is_computed_once(self):
+        bot = self.make_bot()
+        bot.retriever_model = FakeRetriever()
+        features = bot._features("what causes anemia")
+        features.query_embedding
+        features.query_embedding
+        self.assertEqual(len(bot.retriever_model.prompts), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from chatbot_core.context_packer import SENTENCE_BOUNDARY, ContextPacker
+from chatbot_core.passages import SENTENCE_BOUNDARY as PASSAGE_SENTENCE_BOUNDARY
+from chatbot_core.passages import KBPassages, load_or_build_passages, passage_spans, split_passages
+from chatbot_core.token_store import KBTokenStore
+from tests.word_tokenizer import word_tokenizer
+
+SENTENCES = [
+    "Fever is a raised body temperature.",
+    "Rest and drink plenty of fluids.",
+    "A dry cough often follows a cold.",
+    "Honey soothes the throat at night.",
+    "See a doctor if breathing is hard.",
+]
+ANSWER = " ".join(SENTENCES)
+
+class PassageSpansTest(unittest.TestCase):
+    def test_sentences_are_split_like_the_context_packer_does(self):
+        self.assertIs(PASSAGE_SENTENCE_BOUNDARY, SENTENCE_BOUNDARY)
+
+    def test_short_text_is_one_passage_from_the_first_sentence(self):
+        self.assertEqual(passage_spans(ANSWER, max_words=100), [(ANSWER, 0)])
+        self.assertEqual(split_passages(ANSWER, max_words=100), [ANSWER])
+
+    def test_passages_record_the_sentence_they_start_in(self):
+        spans = passage_spans(ANSWER, max_words=14, overlap_words=0)
+        self.assertEqual([sentence for _, sentence in spans], [0, 2, 4])
+        for text, sentence in spans:
+            self.assertTrue(text.startswith(SENTENCES[sentence]))
+
+    def test_windows_of_a_long_sentence_start_in_that_sentence(self):
+        long_sentence = " ".join(f"w{i}" for i in range(30)) + "."
+        spans = passage_spans("Short one. " + long_sentence, max_words=12, overlap_words=0)
+        self.assertEqual([sentence for _, sentence in spans], [0, 1, 1, 1])  # 2, 12, 12 and 6 words
+
+    def test_kb_passages_map_questions_to_the_first_sentence(self):
+        passages, texts = KBPassages.build([ANSWER, "Short answer."], ["What is fever?", "Q?"], max_words=14, overlap_words=0)
+        self.assertEqual(len(texts), len(passages))
+        self.assertFalse(hasattr(passages, "texts"))
+        self.assertEqual(passages.first_sentences.tolist(), [0, 0, 2, 4, 0, 0])
+        hits = passages.collapse([{'corpus_id': 3, 'score': 0.9}, {'corpus_id': 1, 'score': 0.8}])
+        self.assertEqual(hits, [{'corpus_id': 0, 'score': 0.9, 'passage_id': 3}])
+
+    def test_saved_passages_are_loaded_without_texts(self):
+        build = lambda: KBPassages.build([ANSWER, "Short answer."], max_words=14, overlap_words=0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "kb.passages")
+            built, texts = load_or_build_passages(path, "kb:1", build)
+            self.assertEqual(len(texts), len(built))
+            loaded, texts = load_or_build_passages(path, "kb:1", self.fail)
+            self.assertIsNone(texts)
+            self.assertEqual(loaded.first_sentences.tolist(), built.first_sentences.tolist())
+            # Another KB or split rebuilds them
+            _, texts = load_or_build_passages(path, "kb:2", build)
+            self.assertIsNotNone(texts)
+
+class MatchedPassagePackingTest(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = word_tokenizer([ANSWER])
+        self.store = KBTokenStore().build([ANSWER], self.tokenizer)
+
+    def packed_answer(self, max_tokens: int, first_sentence: int, token_store=None) -> str:
+        packer = ContextPacker(self.tokenizer)
+        ids = packer.passage_window(0, ANSWER, max_tokens, first_sentence, token_store=token_store)
+        return self.tokenizer.decode(list(ids))
+
+    def test_matched_sentence_is_packed_first(self):
+        for token_store in (None, self.store):
+            # Room for two sentences: the matched one and the next, not the head of the answer
+            self.assertEqual(self.packed_answer(16, 2, token_store),
+                             self.tokenizer.decode(self.tokenizer(" ".join(SENTENCES[2:4]))["input_ids"],
+                                                   skip_special_tokens=True))
+
+    def test_room_left_after_the_tail_goes_to_earlier_sentences(self):
+        tail = self.tokenizer(" ".join(SENTENCES[2:]), add_special_tokens=False)["input_ids"]
+        for token_store in (None, self.store):
+            self.assertEqual(self.packed_answer(len(tail) + 8, 2, token_store),
+                             self.tokenizer.decode(self.tokenizer(" ".join(SENTENCES[1:]), add_special_tokens=False)["input_ids"]))
+
+    def test_window_from_the_first_sentence_is_the_prefix(self):
+        for max_tokens in (0, 7, 20, 100):
+            self.assertEqual(self.store.window(0, 0, max_tokens).tolist(), self.store.prefix(0, max_tokens).tolist())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import unittest
+
+import numpy as np
+
+from chatbot_core.decoding import decoding_key, generation_params, streaming_params
+from chatbot_core.response_cache import ResponseCache
+
+def unit(*values) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_exact_hit_ignores_case_and_punctuation(self):
+        cache = ResponseCache()
+        cache.put("What causes anemia?", unit(1, 0), "iron deficiency")
+        self.assertEqual(cache.get_exact("what causes   ANEMIA"), "iron deficiency")
+        self.assertIsNone(cache.get_exact("what causes fever"))
+
+    def test_similar_hit_above_threshold_only(self):
+        cache = ResponseCache(similarity_threshold=0.95)
+        cache.put("what causes anemia", unit(1, 0), "iron deficiency")
+        self.assertEqual(cache.get_similar(unit(1, 0.1)), "iron deficiency")
+        self.assertIsNone(cache.get_similar(unit(1, 1)))
+        self.assertEqual(cache.stats()["semantic_hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_variants_are_kept_apart(self):
+        cache = ResponseCache()
+        fast, quality = decoding_key(generation_params("fast")), decoding_key(generation_params("quality"))
+        cache.put("what causes anemia", unit(1, 0), "greedy answer", fast)
+        self.assertIsNone(cache.get_exact("what causes anemia", quality))
+        self.assertIsNone(cache.get_similar(unit(1, 0), quality))
+        self.assertEqual(cache.get_exact("what causes anemia", fast), "greedy answer")
+        self.assertEqual(cache.get_similar(unit(1, 0), fast), "greedy answer")
+
+        cache.put("what causes anemia", unit(1, 0), "beam answer", quality)
+        self.assertEqual(cache.get_exact("what causes anemia", quality), "beam answer")
+        self.assertEqual(cache.get_exact("what causes anemia", fast), "greedy answer")
+
+    def test_streaming_key_differs_only_with_beam_search(self):
+        self.assertNotEqual(decoding_key(streaming_params("quality")), decoding_key(generation_params("quality")))
+        self.assertEqual(decoding_key(streaming_params("fast")), decoding_key(generation_params("fast")))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("first", unit(1, 0), "1")
+        cache.put("second", unit(0, 1), "2")
+        cache.get_exact("first")
+        cache.put("third", unit(1, 1), "3")
+        self.assertIsNone(cache.get_exact("second"))
+        self.assertEqual(cache.get_exact("first"), "1")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_not_returned(self):
+        cache = ResponseCache(ttl_seconds=0.01)
+        cache.put("what causes anemia", unit(1, 0), "iron deficiency")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get_exact("what causes anemia"))
+        self.assertIsNone(cache.get_similar(unit(1, 0)))
+
+    def test_invalidate_drops_everything(self):
+        cache = ResponseCache()
+        cache.put("what causes anemia", unit(1, 0), "iron deficiency")
+        cache.invalidate()
+        self.assertIsNone(cache.get_exact("what causes anemia"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from chatbot_core.session_store import MemorySessionStore, SessionStore, SQLiteSessionStore
+
+class SessionStoreContract:
+    """Behaviour both backends share; subclasses provide make_store()."""
+
+    def test_unknown_session_has_no_history(self):
+        self.assertEqual(self.make_store().history("nobody"), [])
+
+    def test_history_keeps_the_last_entries_in_order(self):
+        store = self.make_store(max_entries=3)
+        store.append("a", "User: hi", "Assistant: hello")
+        store.append("a", "User: fever?", "Assistant: rest")
+        self.assertEqual(store.history("a"), ["Assistant: hello", "User: fever?", "Assistant: rest"])
+        self.assertEqual(store.history("b"), [])
+
+    def test_idle_session_expires(self):
+        store = self.make_store(idle_ttl=60)
+        store.append("a", "User: hi")
+        later_monotonic, later_time = time.monotonic() + 61, time.time() + 61
+        with mock.patch("time.monotonic", return_value=later_monotonic), \
+                mock.patch("time.time", return_value=later_time):
+            self.assertEqual(store.history("a"), [])
+
+    def test_least_recently_used_session_is_evicted(self):
+        store = self.make_store(max_sessions=2)
+        now = time.time()
+        for offset, session_id in enumerate(("a", "b", "c")):
+            # Distinct timestamps, so the SQLite backend orders sessions deterministically
+            with mock.patch("time.time", return_value=now + offset):
+                store.append(session_id, "User: " + session_id)
+        self.assertEqual(store.history("a"), [])
+        self.assertEqual(store.history("c"), ["User: c"])
+        self.assertEqual(store.stats()["sessions"], 2)
+
+class MemorySessionStoreTest(SessionStoreContract, unittest.TestCase):
+    def make_store(self, **params) -> SessionStore:
+        return MemorySessionStore(**params)
+
+    def test_bytes_return_to_zero_when_sessions_are_evicted(self):
+        store = MemorySessionStore(max_sessions=1)
+        store.append("a", "User: hi")
+        store.append("b", "User: hello")
+        store.append("c", "User: hey")
+        self.assertEqual(store.stats()["evicted_lru"], 2)
+        store.max_sessions = 0
+        store.append("d", "User: bye")
+        self.assertEqual(store.stats()["bytes"], 0)
+
+class SQLiteSessionStoreTest(SessionStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def make_store(self, **params) -> SessionStore:
+        return SQLiteSessionStore(os.path.join(self.tmp.name, "sessions.sqlite3"), **params)
+
+    def test_two_stores_share_one_file(self):
+        self.make_store().append("a", "User: hi")
+        self.assertEqual(self.make_store().history("a"), ["User: hi"])
+
+class SessionStoreBaseTest(unittest.TestCase):
+    def test_backend_must_implement_every_method(self):
+        class Incomplete(SessionStore):
+            def history(self, session_id: str) -> list:
+                return []
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+if __name__ == "__main__":
+    unittest.main()
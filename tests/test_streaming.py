@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+
+import torch
+
+from chatbot_core.bot import PROBLEMATIC_PHRASES, MedicalChatbot
+from chatbot_core.streaming import IncrementalCleaner
+from tests.word_tokenizer import word_tokenizer
+
+def stream(text: str, chunk_size: int, key_length: int = 80) -> tuple:
+    """Feeds text in chunks; returns everything shown and the output of each feed."""
+    cleaner = IncrementalCleaner(PROBLEMATIC_PHRASES, key_length)
+    pieces = [cleaner.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    return "".join(pieces) + cleaner.flush(), pieces
+
+class IncrementalCleanerTest(unittest.TestCase):
+    def test_output_does_not_depend_on_chunking(self):
+        text = ("Chat Doctor. Rest and drink fluids. Take paracetamol for the fever. "
+                "Rest and drink fluids. Wish you good health. See a doctor if it lasts.")
+        expected = "Rest and drink fluids. Take paracetamol for the fever. See a doctor if it lasts."
+        for chunk_size in (1, 2, 3, 7, 16, len(text)):
+            self.assertEqual(stream(text, chunk_size)[0], expected, chunk_size)
+
+    def test_phrase_split_across_chunks_is_removed(self):
+        text = "Thanks for your question on Chat Doctor. Anemia has many causes."
+        self.assertEqual(stream(text, 4)[0], "Anemia has many causes.")
+
+    def test_first_sentence_streams_before_it_ends(self):
+        _, pieces = stream("Iron deficiency is common in pregnancy.", 5)
+        self.assertEqual(pieces[0], "Iron ")
+
+    def test_text_that_may_start_a_phrase_is_held_back(self):
+        cleaner = IncrementalCleaner(PROBLEMATIC_PHRASES)
+        self.assertEqual(cleaner.feed("Rest well. Wish you"), "Rest well.")
+        self.assertEqual(cleaner.feed(" a quick recovery."), " Wish you a quick recovery.")
+
+    def test_repeat_is_detected_by_its_key_prefix(self):
+        text = "Drink water often today. Drink water often tomorrow. Sleep."
+        self.assertEqual(stream(text, 3, key_length=17)[0], "Drink water often today. Sleep.")
+
+    def test_unfinished_last_sentence_is_released_on_flush(self):
+        cleaner = IncrementalCleaner(PROBLEMATIC_PHRASES)
+        shown = cleaner.feed("Fever is common. Rest")
+        self.assertEqual(shown + cleaner.flush(), "Fever is common. Rest")
+
+class FakeGenerator:
+    """Streams the words of answer one by one, recording how many generate calls overlap."""
+
+    def __init__(self, tokenizer, answer: str, delay: float = 0.01):
+        self.answer_ids = tokenizer(answer, add_special_tokens=False)["input_ids"]
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.steps = 0
+        self._lock = threading.Lock()
+
+    def generate(self, streamer=None, stopping_criteria=None, **params):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            streamer.put(torch.tensor([[0]]))  # the prompt, which the streamer skips
+            for step, token_id in enumerate(self.answer_ids):
+                time.sleep(self.delay)
+                self.steps += 1
+                streamer.put(torch.tensor([token_id]))
+                if stopping_criteria(torch.tensor([self.answer_ids[:step + 1]]), None).all():
+                    break
+            streamer.end()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+def streaming_bot(answer: str, max_concurrent_streams: int = None, delay: float = 0.01) -> MedicalChatbot:
+    # Only the attributes _generate_stream needs; no models are loaded
+    bot = MedicalChatbot.__new__(MedicalChatbot)
+    bot.gen_tokenizer = word_tokenizer([answer])
+    bot.gen_model = FakeGenerator(bot.gen_tokenizer, answer, delay)
+    bot.decoding_profile = "fast"
+    bot.inference_mode = "fp32"
+    bot.draft_model = None
+    bot.stream_slots = threading.BoundedSemaphore(max_concurrent_streams) if max_concurrent_streams else None
+    bot._generator_inputs = lambda batch: {}
+    return bot
+
+class GenerateStreamTest(unittest.TestCase):
+    def test_concurrent_streams_are_capped(self):
+        answer = "Rest and drink plenty of fluids."
+        bot = streaming_bot(answer, max_concurrent_streams=2)
+        outputs = []
+
+        def consume():
+            outputs.append("".join(bot._generate_stream([1, 2, 3])))
+
+        threads = [threading.Thread(target=consume) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(bot.gen_model.max_active, 2)
+        self.assertEqual(outputs, [bot.gen_tokenizer.decode(bot.gen_model.answer_ids)] * 5)
+
+    def test_closing_the_stream_stops_generation(self):
+        answer = " ".join(f"w{i}" for i in range(50)) + "."
+        bot = streaming_bot(answer, max_concurrent_streams=1)
+        pieces = bot._generate_stream([1, 2, 3])
+        next(pieces)
+        pieces.close()  # the client went away
+        # The slot is given back once generation has stopped, long before all 51 tokens
+        self.assertTrue(bot.stream_slots.acquire(timeout=5))
+        self.assertLess(bot.gen_model.steps, len(bot.gen_model.answer_ids))
+
+if __name__ == "__main__":
+    unittest.main()
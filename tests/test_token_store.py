@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from chatbot_core.bm25_index import texts_fingerprint
+from chatbot_core.context_packer import ContextPacker
+from chatbot_core.token_store import KBTokenStore, load_or_build_token_store
+from tests.word_tokenizer import word_tokenizer
+
+ANSWERS = [
+    "Anemia is a lack of red blood cells. Iron deficiency is the most common cause!  Fatigue is typical.",
+    "Metformin lowers blood sugar.",
+    "Migraine causes throbbing headaches? Light and noise make it worse.",
+]
+
+class KBTokenStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = word_tokenizer(ANSWERS)
+
+    def test_prefix_matches_tokenizing_the_answer(self):
+        store = KBTokenStore().build(ANSWERS, self.tokenizer)
+        packer = ContextPacker(self.tokenizer, passage_cache_size=0)
+        self.assertEqual(len(store), len(ANSWERS))
+        for row, answer in enumerate(ANSWERS):
+            for max_tokens in (0, 5, 9, 17, 100):
+                self.assertEqual(store.prefix(row, max_tokens).tolist(),
+                                 list(packer.passage_window(row, answer, max_tokens)), (row, max_tokens))
+
+    def test_prefix_keeps_whole_sentences(self):
+        store = KBTokenStore().build(ANSWERS, self.tokenizer)
+        first = self.tokenizer("Anemia is a lack of red blood cells.", add_special_tokens=False)["input_ids"]
+        self.assertEqual(store.prefix(0, len(first)).tolist(), first)
+        self.assertEqual(store.prefix(0, len(first) + 3).tolist(), first)
+        self.assertEqual(len(store.prefix(0, len(first) - 1)), 0)
+
+    def test_window_handles_budgets_and_sentences_out_of_range(self):
+        texts = ["Anemia is a lack of red blood cells. Iron deficiency is common.", "x", ""]
+        tokenizer = word_tokenizer(texts)
+        store = KBTokenStore().build(texts, tokenizer)
+        packer = ContextPacker(tokenizer, passage_cache_size=0)
+        whole = tokenizer(texts[0], add_special_tokens=False)["input_ids"]
+        cases = [
+            (0, 5, -3, []),     # negative budget, sentence past the end
+            (0, 1, -1, []),
+            (0, 0, 0, []),
+            (0, 5, 100, whole),  # past the end: an empty tail, the rest of the room goes to earlier sentences
+            (0, -2, 100, whole),
+            (2, 0, -1, []),     # row without sentences
+            (2, 3, 10, []),
+        ]
+        for row, first_sentence, max_tokens, expected in cases:
+            with self.subTest(row=row, first_sentence=first_sentence, max_tokens=max_tokens):
+                self.assertEqual(store.window(row, first_sentence, max_tokens).tolist(), expected)
+                self.assertEqual(list(packer.passage_window(row, texts[row], max_tokens, first_sentence)), expected)
+
+    def test_packing_with_the_store_matches_tokenizing(self):
+        store = KBTokenStore().build(ANSWERS, self.tokenizer)
+        packer = ContextPacker(self.tokenizer, max_tokens=120)
+        passages = [(2, ANSWERS[2]), (0, ANSWERS[0], 1)]
+        self.assertEqual(packer.pack("What causes anemia?", [], passages, token_store=store),
+                         packer.pack("What causes anemia?", [], passages))
+
+    def test_saved_store_is_memory_mapped_and_rebuilt_for_other_texts(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "kb.tokens")
+            built = load_or_build_token_store(path, texts_fingerprint(ANSWERS), lambda: ANSWERS, self.tokenizer)
+            self.assertIsInstance(built.tokens, np.memmap)
+            # A fresh store is loaded without asking for the texts
+            loaded = load_or_build_token_store(path, texts_fingerprint(ANSWERS), self.fail, self.tokenizer)
+            self.assertEqual(loaded.prefix(0, 100).tolist(), built.prefix(0, 100).tolist())
+            rebuilt = load_or_build_token_store(path, texts_fingerprint(ANSWERS[:2]), lambda: ANSWERS[:2], self.tokenizer)
+            self.assertEqual(len(rebuilt), 2)
+
+if __name__ == "__main__":
+    unittest.main()